@@ -0,0 +1,341 @@
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import asyncio
+import math
+import os
+import time
+from monitor.module import percentile
+
+MAX_ACTIVE = int(os.getenv("ADMISSION_MAX_ACTIVE", "8"))
+MAX_QUEUED = int(os.getenv("ADMISSION_MAX_QUEUED", "64"))
+MAX_QUEUED_PER_CLIENT = int(os.getenv("ADMISSION_MAX_PER_CLIENT", "4"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+
+LOAD_SHEDDING = os.getenv("LOAD_SHEDDING", "true").lower() == "true"
+SHED_QUEUE_DEPTH = int(os.getenv("SHED_QUEUE_DEPTH", "16"))
+SHED_P95_SECONDS = float(os.getenv("SHED_P95_SECONDS", "20"))
+SHED_RECOVER_SECONDS = float(os.getenv("SHED_RECOVER_SECONDS", "15"))
+SHED_MIN_SAMPLES = int(os.getenv("SHED_MIN_SAMPLES", "20"))
+
+# Request latencies (queue wait + service) older than this don't count towards shedding
+LATENCY_WINDOW_SECONDS = 30.0
+
+# Service time assumed for Retry-After before any request has finished
+DEFAULT_SERVICE_SECONDS = 5.0
+SERVICE_EWMA_ALPHA = 0.2
+
+# Recent queue waits kept for percentiles
+WAIT_WINDOW = 1000
+
+class Overloaded(Exception):
+    """The wait queue is full (or the wait timed out); retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+@dataclass
+class _Waiter:
+    client: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+class AdmissionController:
+    """
+    Bounded concurrency for agent work, with a fair FIFO wait queue
+
+    At most `max_active` requests run at once and each client (a workflow
+    session) runs one request at a time, in arrival order - a session's
+    orchestrator can only work on one step at a time. When a slot frees
+    up, clients with waiting requests take turns, so one busy client
+    can't starve the rest. Requests past the queue limits, or that wait
+    longer than `queue_timeout`, are turned away with a Retry-After
+    estimate instead of piling up.
+
+    Optional background work (speculative steps) takes slots through
+    admit_background: it only gets a slot no waiting request can use,
+    holds at most `max_background` at once, and isn't counted as queued.
+    """
+
+    def __init__(self,
+                 max_active: int = MAX_ACTIVE,
+                 max_queued: int = MAX_QUEUED,
+                 max_queued_per_client: int = MAX_QUEUED_PER_CLIENT,
+                 queue_timeout: float = QUEUE_TIMEOUT_SECONDS,
+                 max_background: Optional[int] = None):
+        self.max_active = max_active
+        self.max_background = max_background if max_background is not None else max(1, max_active // 2)
+        self.max_queued = max_queued
+        self.max_queued_per_client = max_queued_per_client
+        self.queue_timeout = queue_timeout
+        self._active_clients: Dict[str, int] = {}
+        self._active = 0
+        # Clients in turn order, each with its own FIFO of waiting requests
+        self._waiting: "OrderedDict[str, deque[_Waiter]]" = OrderedDict()
+        self._queued = 0
+        self._background: "deque[asyncio.Future]" = deque()
+        self._background_active = 0
+        self._wait_times: "deque[float]" = deque(maxlen=WAIT_WINDOW)
+        # (finished at, seconds from arrival to finish) per admitted request
+        self._latencies: "deque[Tuple[float, float]]" = deque(maxlen=WAIT_WINDOW)
+        # (when, queue depth) each time a request joins or leaves the wait queue
+        self._depths: "deque[Tuple[float, int]]" = deque(maxlen=WAIT_WINDOW)
+        self._service_seconds: Optional[float] = None
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead of a new request has likely drained"""
+        service = self._service_seconds or DEFAULT_SERVICE_SECONDS
+        return max(1, math.ceil(service * (self._queued + 1) / self.max_active))
+
+    def wait_percentile(self, q: float) -> float:
+        return percentile(list(self._wait_times), q)
+
+    def recent_latencies(self, window_seconds: float = LATENCY_WINDOW_SECONDS) -> List[float]:
+        """End-to-end latencies of requests that finished within the last `window_seconds`"""
+        cutoff = time.monotonic() - window_seconds
+        return [latency for finished, latency in self._latencies if finished >= cutoff]
+
+    def latency_percentile(self, q: float, window_seconds: float = LATENCY_WINDOW_SECONDS) -> float:
+        return percentile(self.recent_latencies(window_seconds), q)
+
+    def peak_queued(self, window_seconds: float) -> int:
+        """Deepest the wait queue has been over the last `window_seconds`"""
+        cutoff = time.monotonic() - window_seconds
+        return max([self._queued] + [depth for at, depth in self._depths if at >= cutoff])
+
+    def _reject(self, message: str) -> Overloaded:
+        self.rejected += 1
+        return Overloaded(message, self.retry_after())
+
+    def _start(self, client: str):
+        self._active += 1
+        self._active_clients[client] = self._active_clients.get(client, 0) + 1
+        self.admitted += 1
+
+    def _finish(self, client: str, service_seconds: Optional[float]):
+        self._active -= 1
+        remaining = self._active_clients.get(client, 1) - 1
+        if remaining:
+            self._active_clients[client] = remaining
+        else:
+            self._active_clients.pop(client, None)
+        if service_seconds is not None:
+            self._service_seconds = service_seconds if self._service_seconds is None else (
+                SERVICE_EWMA_ALPHA * service_seconds + (1 - SERVICE_EWMA_ALPHA) * self._service_seconds
+            )
+
+    def _remove(self, waiter: _Waiter):
+        queue = self._waiting.get(waiter.client)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._waiting[waiter.client]
+
+    def _grant_background(self) -> bool:
+        while self._background and self._background_active < self.max_background:
+            future = self._background.popleft()
+            if future.done():
+                continue
+            self._active += 1
+            self._background_active += 1
+            future.set_result(None)
+            return True
+        return False
+
+    def _finish_background(self):
+        self._active -= 1
+        self._background_active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to waiting clients, one request per client per turn, then to background work"""
+        while self._active < self.max_active:
+            for client, queue in self._waiting.items():
+                if client not in self._active_clients:
+                    break
+            else:
+                if not self._grant_background():
+                    return
+                continue
+
+            waiter = queue.popleft()
+            self._depths.append((time.monotonic(), self._queued))
+            self._queued -= 1
+            if queue:
+                self._waiting.move_to_end(client)
+            else:
+                del self._waiting[client]
+            if waiter.future.done():
+                continue
+            self._start(client)
+            self._wait_times.append(time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, client: str) -> AsyncIterator[None]:
+        """Hold a slot for the body of the block; raises Overloaded instead of queueing without bound"""
+        arrived = time.monotonic()
+        if self._waiting or self._active >= self.max_active or client in self._active_clients:
+            if self._queued >= self.max_queued:
+                raise self._reject(f"Server busy: {self._queued} requests already waiting")
+            if len(self._waiting.get(client, ())) >= self.max_queued_per_client:
+                raise self._reject(f"Too many queued requests for this session ({self.max_queued_per_client} max)")
+
+            waiter = _Waiter(client, asyncio.get_running_loop().create_future())
+            self._waiting.setdefault(client, deque()).append(waiter)
+            self._queued += 1
+            self._depths.append((time.monotonic(), self._queued))
+            self._dispatch()
+            try:
+                await asyncio.wait_for(waiter.future, self.queue_timeout)
+            except BaseException as e:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # Granted just as the caller gave up; pass the slot on
+                    self._finish(client, None)
+                    self._dispatch()
+                else:
+                    self._remove(waiter)
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timed_out += 1
+                    raise self._reject(f"Timed out after {self.queue_timeout:g}s waiting for a free slot")
+                raise
+        else:
+            self._start(client)
+            self._wait_times.append(0.0)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            finished = time.monotonic()
+            self._latencies.append((finished, finished - arrived))
+            self._finish(client, finished - started)
+            self._dispatch()
+
+    @asynccontextmanager
+    async def admit_background(self) -> AsyncIterator[None]:
+        """Hold a low-priority slot for the block; waits (without a timeout) behind every request"""
+        if (self._waiting or self._background or self._active >= self.max_active
+                or self._background_active >= self.max_background):
+            future = asyncio.get_running_loop().create_future()
+            self._background.append(future)
+            self._dispatch()
+            try:
+                await future
+            except BaseException:
+                if future.done() and not future.cancelled():
+                    self._finish_background()
+                elif future in self._background:
+                    self._background.remove(future)
+                raise
+        else:
+            self._active += 1
+            self._background_active += 1
+
+        try:
+            yield
+        finally:
+            self._finish_background()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "max_active": self.max_active,
+            "queued": self._queued,
+            "max_queued": self.max_queued,
+            "waiting_clients": len(self._waiting),
+            "background_active": self._background_active,
+            "background_waiting": len(self._background),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_p50_ms": round(self.wait_percentile(50) * 1000, 1),
+            "wait_p95_ms": round(self.wait_percentile(95) * 1000, 1),
+            "latency_p95_ms": round(self.latency_percentile(95) * 1000, 1),
+            "service_avg_ms": round(self._service_seconds * 1000, 1) if self._service_seconds else None,
+            "retry_after_seconds": self.retry_after()
+        }
+
+class LoadShedder:
+    """
+    Decides when agent steps should skip the LLM to keep latency bounded
+
+    Shedding starts as soon as the admission queue is `queue_depth` deep
+    or the p95 latency of recently finished requests reaches
+    `p95_seconds`. The p95 only counts once at least `min_samples`
+    requests finished in the window; at low traffic it is just the
+    slowest LLM call or two, which says nothing about load. Steps then use the agents' deterministic fallbacks,
+    which finish in milliseconds and drain the queue instead of adding to
+    it. LLM routing comes back once the queue has stayed under half its
+    threshold for `recover_seconds` and the p95 has dropped under half of
+    its own; the gap between the two marks keeps it from flapping at the
+    boundary.
+    """
+
+    def __init__(self,
+                 admission: AdmissionController,
+                 queue_depth: int = SHED_QUEUE_DEPTH,
+                 p95_seconds: float = SHED_P95_SECONDS,
+                 recover_seconds: float = SHED_RECOVER_SECONDS,
+                 min_samples: int = SHED_MIN_SAMPLES,
+                 enabled: bool = LOAD_SHEDDING):
+        self.admission = admission
+        self.queue_depth = queue_depth
+        self.p95_seconds = p95_seconds
+        self.recover_seconds = recover_seconds
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self.shedding = False
+        self._shedding_since: Optional[float] = None
+        self.episodes = 0
+
+    def should_shed(self) -> bool:
+        """Checked by each agent step before it calls the LLM"""
+        if not self.enabled:
+            return False
+
+        now = time.monotonic()
+        queued = self.admission.queued
+        latencies = self.admission.recent_latencies()
+        p95 = percentile(latencies, 95) if len(latencies) >= self.min_samples else 0.0
+        if queued >= self.queue_depth or p95 >= self.p95_seconds:
+            if not self.shedding:
+                self.shedding = True
+                self._shedding_since = now
+                self.episodes += 1
+                print(f"🔻 Shedding load: {queued} queued, p95 {p95:.1f}s - agent steps use deterministic fallbacks")
+        elif (self.shedding
+                and self.admission.peak_queued(self.recover_seconds) <= self.queue_depth // 2
+                and p95 <= self.p95_seconds / 2):
+            self.shedding = False
+            print(f"🔺 Load back to normal after {now - self._shedding_since:.0f}s - LLM routing restored")
+        return self.shedding
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "shedding": self.shedding,
+            "shedding_seconds": round(time.monotonic() - self._shedding_since, 1) if self.shedding else 0.0,
+            "episodes": self.episodes,
+            "queue_depth_threshold": self.queue_depth,
+            "p95_threshold_seconds": self.p95_seconds,
+            "recover_seconds": self.recover_seconds,
+            "min_samples": self.min_samples
+        }
+
+agent_admission = AdmissionController()
+load_shedder = LoadShedder(agent_admission)
@@ -1,18 +1,29 @@
 # Multi-Agent Backend for CTV Advertising Platform
 # Neural Ads - Connected TV Advertising Agents
 
-from .campaign_parser import CampaignParserAgent
-from .advertiser_preferences import AdvertiserPreferencesAgent  
-from .audience_generation import AudienceGenerationAgent
-from .lineitem_generator import LineItemGeneratorAgent
-from .multi_agent_orchestrator import MultiAgentOrchestrator
-from .cot_agent import COTReasoningAgent  # Keep for backward compatibility
+# Agents are imported on first attribute access, so importing one submodule
+# (e.g. agents.campaign_parser) doesn't load every agent.
+import importlib
+
+_EXPORTS = {
+    'CampaignParserAgent': '.campaign_parser',
+    'AdvertiserPreferencesAgent': '.advertiser_preferences',
+    'AudienceGenerationAgent': '.audience_generation',
+    'LineItemGeneratorAgent': '.lineitem_generator',
+    'MultiAgentOrchestrator': '.multi_agent_orchestrator',
+    'COTReasoningAgent': '.cot_agent'  # Keep for backward compatibility
+}
 
 __all__ = [
     'CampaignParserAgent',
-    'AdvertiserPreferencesAgent', 
+    'AdvertiserPreferencesAgent',
     'AudienceGenerationAgent',
     'LineItemGeneratorAgent',
     'MultiAgentOrchestrator',
     'COTReasoningAgent'
-] 
\ No newline at end of file
+]
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,14 +3,21 @@ Advertiser Preferences Agent - Step 2: Historical Data Analysis
 Neural Ads - Connected TV Advertising Platform
 """
 
-import json
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
+from functools import cached_property
+from .llm import load_environment, create_openai_client
+from .vector_snapshot import FeatureVector, VectorSnapshot, load_vector_snapshot
 
-load_dotenv()
+load_environment()
+
+# Used when the LLM is unavailable or skipped
+DEFAULT_INSIGHTS = (
+    "Strong performance in premium content environments",
+    "Focus on evening and weekend dayparts",
+    "Leverage cross-network strategy for scale"
+)
 
 @dataclass
 class AdvertiserPreferences:
@@ -37,55 +44,49 @@ class AdvertiserPreferencesAgent:
     """
     
     def __init__(self):
-        self.client = AsyncOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY", "your_api_key_here")
-        )
         self.model = os.getenv("AGENT_MODEL", "gpt-4o-mini")
-        self.advertiser_data = self._load_advertiser_database()
     
-    def _load_advertiser_database(self) -> List[Dict]:
-        """Load the advertiser vector database from JSON file"""
+    @cached_property
+    def client(self):
+        """OpenAI client, created the first time this agent calls the LLM"""
+        return create_openai_client()
+    
+    @cached_property
+    def snapshot(self) -> Optional[VectorSnapshot]:
+        """Advertiser vectors, attached the first time an analysis needs them"""
+        return self._load_advertiser_database()
+    
+    @property
+    def data_version(self) -> str:
+        # Content hash identifies the data snapshot cached step results came from
+        return self.snapshot.version if self.snapshot is not None else "none"
+    
+    def reload_database(self, snapshot: Optional[VectorSnapshot] = None) -> str:
+        """
+        Re-read the vector database, or adopt `snapshot` when another
+        session already reloaded it; returns the new data version
+        """
+        self.snapshot = snapshot if snapshot is not None else self._load_advertiser_database(refresh=True)
+        return self.data_version
+    
+    def _load_advertiser_database(self, refresh: bool = False) -> Optional[VectorSnapshot]:
+        """Attach to the shared advertiser vector snapshot (published on first load)"""
         try:
-            # Try local file first
-            db_path = os.path.join(os.path.dirname(__file__), "../advertiser_vector_database_full.json")
-            if not os.path.exists(db_path):
-                # Fallback to original path
-                db_path = os.path.join(os.path.dirname(__file__), "../../advertiser_vector_database_full.json")
-            
-            with open(db_path, 'r') as f:
-                data = json.load(f)
-                print(f"✅ Loaded advertiser database with {len(data)} advertisers")
-                return data
+            return load_vector_snapshot(refresh=refresh)
         except Exception as e:
             print(f"❌ Error loading advertiser database: {e}")
-            return []
+            return None
     
     def _find_advertiser_data(self, advertiser_name: str) -> Dict[str, Any]:
         """Find advertiser data by name (fuzzy matching)"""
-        advertiser_lower = advertiser_name.lower()
-        
-        # Try exact match first
-        for record in self.advertiser_data:
-            if record['metadata']['advertiser'].lower() == advertiser_lower:
-                return record
-        
-        # Try partial match
-        for record in self.advertiser_data:
-            if advertiser_lower in record['metadata']['advertiser'].lower():
-                return record
-        
-        # Try reverse partial match
-        for record in self.advertiser_data:
-            if record['metadata']['advertiser'].lower() in advertiser_lower:
-                return record
-        
-        return None
+        if self.snapshot is None:
+            return None
+        row = self.snapshot.find(advertiser_name)
+        return self.snapshot.record(row) if row is not None else None
     
-    def _extract_top_preferences(self, vector_data: Dict[str, float], prefix: str, top_n: int = 5) -> List[str]:
+    def _extract_top_preferences(self, vector_data: FeatureVector, prefix: str, top_n: int = 5) -> List[str]:
         """Extract top preferences from vector data for a given prefix"""
-        filtered = {k: v for k, v in vector_data.items() if k.startswith(prefix) and v > 0}
-        sorted_items = sorted(filtered.items(), key=lambda x: x[1], reverse=True)
-        return [item[0].replace(f"{prefix}:", "").replace(";", " + ") for item, score in sorted_items[:top_n]]
+        return [feature.replace(f"{prefix}:", "").replace(";", " + ") for feature, score in vector_data.top(prefix, top_n)]
     
     def _calculate_cpm_range(self, advertiser_data: Dict) -> Dict[str, float]:
         """Calculate CPM range based on network and channel preferences"""
@@ -128,8 +129,16 @@ class AdvertiserPreferencesAgent:
             "completion_rate": round(min(base_completion, 95.0), 1)
         }
     
-    async def analyze_advertiser_patterns(self, advertiser: str, campaign_objective: str) -> AdvertiserPreferences:
-        """Analyze historical patterns using real advertiser data"""
+    async def analyze_advertiser_patterns(self,
+                                          advertiser: str,
+                                          campaign_objective: str,
+                                          use_llm: bool = True) -> AdvertiserPreferences:
+        """
+        Analyze historical patterns using real advertiser data
+        
+        With use_llm=False the vector analysis still runs (it's local) but
+        the AI insights are replaced by the standard ones.
+        """
         
         # Find advertiser in database
         advertiser_data = self._find_advertiser_data(advertiser)
@@ -162,7 +171,10 @@ class AdvertiserPreferencesAgent:
         performance = self._generate_performance_metrics(advertiser_data)
         
         # Generate AI insights using OpenAI
-        insights = await self._generate_ai_insights(advertiser, vector, campaign_objective)
+        if use_llm:
+            insights = await self._generate_ai_insights(advertiser, vector, campaign_objective)
+        else:
+            insights = list(DEFAULT_INSIGHTS)
         
         return AdvertiserPreferences(
             advertiser=advertiser,
@@ -214,11 +226,7 @@ class AdvertiserPreferencesAgent:
             
         except Exception as e:
             print(f"AI insights generation error: {e}")
-            return [
-                "Strong performance in premium content environments",
-                "Focus on evening and weekend dayparts",
-                "Leverage cross-network strategy for scale"
-            ]
+            return list(DEFAULT_INSIGHTS)
     
     def _fallback_analysis(self, advertiser: str, campaign_objective: str) -> AdvertiserPreferences:
         """Fallback analysis when advertiser not found in database"""
@@ -7,10 +7,10 @@ import json
 import os
 from typing import Dict, Any, List
 from dataclasses import dataclass
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
+from functools import cached_property
+from .llm import load_environment, create_openai_client
 
-load_dotenv()
+load_environment()
 
 @dataclass
 class AudienceSegment:
@@ -41,13 +41,22 @@ class AudienceGenerationAgent:
     """
     
     def __init__(self):
-        self.client = AsyncOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY", "your_api_key_here")
-        )
         self.model = os.getenv("AGENT_MODEL", "gpt-4o-mini")
     
-    async def generate_audience_segments(self, advertiser: str, preferences: Dict[str, Any], budget: float) -> AudienceAnalysis:
-        """Generate ACR audience segments and pricing intelligence"""
+    @cached_property
+    def client(self):
+        """OpenAI client, created the first time this agent calls the LLM"""
+        return create_openai_client()
+    
+    async def generate_audience_segments(self,
+                                         advertiser: str,
+                                         preferences: Dict[str, Any],
+                                         budget: float,
+                                         use_llm: bool = True) -> AudienceAnalysis:
+        """Generate ACR audience segments and pricing intelligence (standard segments with use_llm=False)"""
+        
+        if not use_llm:
+            return self._fallback_audience_generation(advertiser, budget)
         
         system_prompt = f"""
         You are Neural, creating ACR audience segments for {advertiser} with budget ${budget:,.0f}.
@@ -0,0 +1,239 @@
+"""
+Budget Allocator - Reach/Impression Optimal Budget Split Across Line Items
+Neural Ads - Connected TV Advertising Platform
+"""
+
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+
+import numpy as np
+
+from .lineitem_generator import CampaignStructure, frequency_cap_per_day
+
+OBJECTIVES = ("reach", "impressions")
+
+BISECTION_ITERATIONS = 100
+
+@dataclass
+class AllocationResult:
+    budgets: np.ndarray
+    impressions: np.ndarray
+    reach: np.ndarray
+    objective: str
+    allocated: float
+    unallocated: float
+
+    @property
+    def feasible(self) -> bool:
+        return self.unallocated < 0.01
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "objective": self.objective,
+            "allocated": round(self.allocated, 2),
+            "unallocated": round(self.unallocated, 2),
+            "estimated_impressions": int(self.impressions.sum()),
+            "estimated_reach": int(self.reach.sum()),
+            "feasible": self.feasible
+        }
+
+def allocation_objective(campaign_objective: str) -> str:
+    """Upper-funnel campaign objectives optimize for reach, everything else for impressions"""
+    objective = (campaign_objective or "").lower()
+    if any(goal in objective for goal in ("awareness", "reach", "consideration")):
+        return "reach"
+    return "impressions"
+
+def _estimate_reach(impressions: np.ndarray, households: np.ndarray) -> np.ndarray:
+    """Poisson reach: households exposed at least once"""
+    safe_households = np.where(households > 0, households, 1.0)
+    return np.where(households > 0, households * -np.expm1(-impressions / safe_households), 0.0)
+
+def _fill(target: float,
+          cpms: np.ndarray,
+          lower: np.ndarray,
+          upper: np.ndarray,
+          households: np.ndarray,
+          objective: str) -> np.ndarray:
+    """
+    Spend `target` on top of `lower` without exceeding `upper`
+
+    Impressions are linear in spend, so the cheapest CPMs fill first.
+    Reach is concave, so the optimum equalizes marginal reach per dollar;
+    the multiplier is found by bisection and every step is one vector op.
+    """
+    headroom = upper - lower
+    capacity = headroom.sum()
+    if target >= capacity:
+        return upper.copy()
+    if target <= 0:
+        return lower.copy()
+
+    if objective == "impressions":
+        order = np.argsort(cpms, kind="stable")
+        cumulative = np.cumsum(headroom[order])
+        extra = np.empty_like(headroom)
+        extra[order] = np.clip(target - (cumulative - headroom[order]), 0.0, headroom[order])
+        return lower + extra
+
+    # d(reach)/d(spend) = (1000 / cpm) * exp(-spend * 1000 / (cpm * households))
+    value = 1000.0 / cpms
+    scale = cpms * np.maximum(households, 1.0) / 1000.0
+
+    def spend_at(log_multiplier: float) -> np.ndarray:
+        unconstrained = scale * (np.log(value) - log_multiplier)
+        return np.clip(unconstrained, lower, upper)
+
+    low, high = float(np.log(value).min()) - 50.0, float(np.log(value).max())
+    for _ in range(BISECTION_ITERATIONS):
+        mid = (low + high) / 2
+        if spend_at(mid).sum() > lower.sum() + target:
+            low = mid
+        else:
+            high = mid
+
+    spend = spend_at(high)
+    # Hand the bisection residual to lines that still have headroom
+    residual = lower.sum() + target - spend.sum()
+    room = upper - spend
+    if residual > 0 and room.sum() > 0:
+        spend = spend + room * min(residual / room.sum(), 1.0)
+
+    return spend
+
+def _round_to_cents(allocation: np.ndarray, total: float, upper: np.ndarray) -> np.ndarray:
+    """Round to cents so the allocation sums exactly to `total`"""
+    cents = np.minimum(np.floor(allocation * 100), np.floor(upper * 100))
+    missing = int(round(total * 100 - cents.sum()))
+    if missing > 0:
+        remainder = allocation * 100 - cents
+        room = np.floor(upper * 100) - cents
+        order = np.argsort(-remainder, kind="stable")
+        order = order[room[order] >= 1]
+        # Largest remainders get a cent each first; when more cents are missing
+        # than there are lines with room, the rest fill remaining room in the same order
+        first = order[:missing]
+        cents[first] += 1
+        room[first] -= 1
+        left = missing - len(first)
+        if left > 0:
+            spare = room[order]
+            cents[order] += np.clip(left - (np.cumsum(spare) - spare), 0, spare)
+        # Cents only go unplaced when the caps can't hold `total`; callers see
+        # them in AllocationResult.unallocated, which is taken from the rounded sum
+    elif missing < 0:
+        cents[np.argmax(cents)] += missing
+    return cents / 100
+
+def allocate_budget(budget: float,
+                    cpms: np.ndarray,
+                    spend_caps: np.ndarray,
+                    households: Optional[np.ndarray] = None,
+                    devices: Optional[List[str]] = None,
+                    device_mix: Optional[Dict[str, float]] = None,
+                    objective: str = "reach") -> AllocationResult:
+    """
+    Split `budget` across line items to maximize reach or impressions
+
+    Each line spends at most spend_caps[i]. With a device mix, every device
+    first gets its target share; whatever a device cannot absorb is then
+    re-optimized across all remaining headroom.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown allocation objective: {objective}")
+
+    cpms = np.maximum(np.asarray(cpms, dtype=float), 0.01)
+    upper = np.maximum(np.asarray(spend_caps, dtype=float), 0.0)
+    # Without household scale reach is unbounded, so maximizing it means maximizing impressions
+    if households is None:
+        households = np.zeros(len(cpms))
+        objective = "impressions" if objective == "reach" else objective
+        scale_known = False
+    else:
+        households = np.asarray(households, dtype=float)
+        scale_known = True
+    lower = np.zeros_like(upper)
+    target = min(float(budget), float(np.floor(upper * 100).sum() / 100))
+
+    if devices is not None and device_mix:
+        devices = np.asarray(devices)
+        present = {d: float(device_mix.get(d, 0.0)) for d in np.unique(devices)}
+        share_total = sum(present.values())
+        if share_total > 0:
+            for device, share in present.items():
+                mask = devices == device
+                lower[mask] = _fill(target * share / share_total, cpms[mask], lower[mask],
+                                    upper[mask], households[mask], objective)
+
+    allocation = _fill(target - lower.sum(), cpms, lower, upper, households, objective)
+    allocation = _round_to_cents(allocation, target, upper)
+
+    impressions = allocation * 1000.0 / cpms
+    reach = _estimate_reach(impressions, households) if scale_known else impressions
+
+    return AllocationResult(
+        budgets=allocation,
+        impressions=impressions,
+        reach=reach,
+        objective=objective,
+        allocated=float(allocation.sum()),
+        unallocated=max(float(budget) - float(allocation.sum()), 0.0)
+    )
+
+def allocate_campaign_budget(structure: CampaignStructure,
+                             flight_days: int,
+                             device_mix: Optional[Dict[str, float]] = None,
+                             segment_scale: Optional[Dict[str, float]] = None,
+                             objective: str = "reach") -> AllocationResult:
+    """
+    Re-allocate a campaign structure's budget in place
+
+    Spend per line is capped by daily_cap x flight days and by the
+    impressions its households can absorb under the frequency cap.
+    """
+    line_items = structure.line_items
+    if not line_items:
+        return allocate_budget(structure.total_budget, np.zeros(0), np.zeros(0), objective=objective)
+
+    flight_days = max(int(flight_days), 1)
+    segment_scale = segment_scale or {}
+    audience_lines: Dict[str, int] = {}
+    for item in line_items:
+        audience_lines[item.audience] = audience_lines.get(item.audience, 0) + 1
+
+    cpms = np.array([float(item.bid_cpm) for item in line_items], dtype=float)
+    daily_caps = np.array([float(item.daily_cap) for item in line_items], dtype=float)
+    frequency = np.array([frequency_cap_per_day(item.frequency_cap) for item in line_items], dtype=float)
+    households = np.array([
+        float(item.targeting_criteria.get("estimated_households")
+              or segment_scale.get(item.audience, 0) / audience_lines[item.audience]
+              or 0)
+        for item in line_items
+    ], dtype=float)
+
+    spend_caps = daily_caps * flight_days
+    scale_known = households > 0
+    scale_caps = households * frequency * flight_days * cpms / 1000.0
+    spend_caps = np.where(scale_known, np.minimum(spend_caps, scale_caps), spend_caps)
+
+    result = allocate_budget(
+        structure.total_budget,
+        cpms,
+        spend_caps,
+        households=households if scale_known.all() else None,
+        devices=[item.device for item in line_items],
+        device_mix=device_mix,
+        objective=objective
+    )
+
+    device_budget: Dict[str, float] = {}
+    for item, amount in zip(line_items, result.budgets):
+        item.budget = float(amount)
+        device_budget[item.device] = device_budget.get(item.device, 0.0) + float(amount)
+
+    if structure.total_budget:
+        structure.budget_allocation = {
+            device: round(amount / structure.total_budget, 4) for device, amount in device_budget.items()
+        }
+
+    return result
@@ -5,12 +5,17 @@ Neural Ads - Connected TV Advertising Platform
 
 import json
 import os
-from typing import Dict, Any, Optional
+import re
+import calendar
+import difflib
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
+from functools import cached_property
+from .llm import load_environment, create_openai_client
+from .vector_snapshot import load_vector_snapshot
 
-load_dotenv()
+load_environment()
 
 @dataclass
 class CampaignParameters:
@@ -21,6 +26,275 @@ class CampaignParameters:
     confidence: float
     additional_requirements: Optional[Dict[str, Any]] = None
 
+DEFAULT_FLIGHT_DAYS = 30
+
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(day|week|month|year)s?', re.IGNORECASE)
+_ISO_DATE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})')
+_QUARTER_PATTERN = re.compile(r'\bQ([1-4])\s*(\d{4})?', re.IGNORECASE)
+_MONTH_NAMES = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+_MONTH_NAMES.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+_MONTH_PATTERN = re.compile(r'\b(' + '|'.join(sorted(_MONTH_NAMES, key=len, reverse=True)) + r')\b\.?\s*(\d{4})?', re.IGNORECASE)
+
+def parse_flight_window(timeline: str, today: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Resolve a free-text timeline into inclusive (start, end) flight dates
+
+    Understands ISO date ranges, quarters ("Q1 2024"), month ranges
+    ("January - March") and durations ("30 days", "6 weeks"). Anything
+    else falls back to a DEFAULT_FLIGHT_DAYS flight starting today.
+    """
+    today = today or date.today()
+    text = timeline or ""
+
+    iso_dates = _ISO_DATE_PATTERN.findall(text)
+    if len(iso_dates) >= 2:
+        start, end = sorted(datetime.strptime(d, "%Y-%m-%d").date() for d in iso_dates[:2])
+        return start, end
+
+    quarter = _QUARTER_PATTERN.search(text)
+    if quarter:
+        year = int(quarter.group(2) or today.year)
+        first_month = (int(quarter.group(1)) - 1) * 3 + 1
+        last_month = first_month + 2
+        return date(year, first_month, 1), date(year, last_month, calendar.monthrange(year, last_month)[1])
+
+    months = _MONTH_PATTERN.findall(text)
+    if months:
+        year = next((int(y) for _, y in months if y), today.year)
+        first_month = _MONTH_NAMES[months[0][0].lower()]
+        last_month = _MONTH_NAMES[months[-1][0].lower()]
+        end_year = year + 1 if last_month < first_month else year
+        return (date(year, first_month, 1),
+                date(end_year, last_month, calendar.monthrange(end_year, last_month)[1]))
+
+    duration = _DURATION_PATTERN.search(text)
+    if duration:
+        amount = float(duration.group(1))
+        unit_days = {"day": 1, "week": 7, "month": 30, "year": 365}[duration.group(2).lower()]
+        days = max(1, int(round(amount * unit_days)))
+        return today, today + timedelta(days=days - 1)
+
+    return today, today + timedelta(days=DEFAULT_FLIGHT_DAYS - 1)
+
+def timeline_to_days(timeline: str) -> int:
+    """Number of flight days described by a free-text timeline"""
+    start, end = parse_flight_window(timeline)
+    return (end - start).days + 1
+
+DEFAULT_ADVERTISER = "Sample Advertiser"
+DEFAULT_BUDGET = 100000.0
+DEFAULT_OBJECTIVE = "awareness"
+DEFAULT_TIMELINE = "30 days"
+
+# Briefs the rule parser scores at or above this skip the LLM
+FAST_PATH_THRESHOLD = 0.85
+
+# Share of the overall confidence each field carries
+FIELD_WEIGHTS = {"advertiser": 0.35, "budget": 0.35, "objective": 0.15, "timeline": 0.15}
+
+_FIELD_LABELS = {
+    "advertiser": "advertiser", "brand": "advertiser", "client": "advertiser",
+    "budget": "budget", "total budget": "budget", "spend": "budget",
+    "objective": "objective", "goal": "objective", "kpi": "objective", "campaign objective": "objective",
+    "timeline": "timeline", "flight": "timeline", "flight dates": "timeline", "dates": "timeline",
+    "duration": "timeline",
+    "target audience": "target_audience", "audience": "target_audience",
+    "additional notes": "notes", "notes": "notes"
+}
+_LABEL_PATTERN = re.compile(
+    r'^[ \t\u2022*\-]*(' + '|'.join(sorted(map(re.escape, _FIELD_LABELS), key=len, reverse=True)) + r')[ \t]*[:\-\u2013][ \t]*(.*?)[ \t]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+_BRACKETED_PATTERN = re.compile(r'\[[^\]]*\]')
+
+_AMOUNT_SUFFIXES = {
+    "k": 1e3, "thousand": 1e3,
+    "m": 1e6, "mm": 1e6, "mil": 1e6, "million": 1e6,
+    "b": 1e9, "bn": 1e9, "billion": 1e9
+}
+_AMOUNT = r'(\d[\d,]*(?:\.\d+)?)\s*(' + '|'.join(sorted(_AMOUNT_SUFFIXES, key=len, reverse=True)) + r')?\b'
+_DOLLAR_AMOUNT_PATTERN = re.compile(r'\$\s*' + _AMOUNT, re.IGNORECASE)
+_BARE_AMOUNT_PATTERN = re.compile(_AMOUNT, re.IGNORECASE)
+
+_OBJECTIVE_KEYWORDS = [
+    ("conversion", ("conversion", "performance", "sales", "acquisition", "leads", "purchase", "roas")),
+    ("consideration", ("consideration", "traffic", "site visits", "store visits")),
+    ("engagement", ("engagement", "interaction", "completion")),
+    ("awareness", ("awareness", "reach", "brand lift", "launch"))
+]
+
+_US_DATE_PATTERN = re.compile(r'\b(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})\b')
+_LONG_DATE_PATTERN = re.compile(
+    r'\b(' + '|'.join(sorted(_MONTH_NAMES, key=len, reverse=True)) + r')\.?\s+(\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s*(\d{4}))?',
+    re.IGNORECASE
+)
+
+def load_advertiser_names() -> Tuple[str, ...]:
+    """Advertiser names from the shared vector snapshot, for resolving brief advertisers"""
+    try:
+        return load_vector_snapshot().advertisers
+    except Exception as e:
+        print(f"❌ Error loading advertiser names: {e}")
+        return ()
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '', re.sub(r"'s\b", '', name.lower()))
+
+def _resolve_advertiser(value: str, advertisers: Tuple[str, ...]) -> Tuple[str, float]:
+    """Map a labelled advertiser onto a known name; unknown brands are kept as written"""
+    normalized = _normalize_name(value)
+    known = {_normalize_name(name): name for name in advertisers}
+    if normalized in known:
+        return known[normalized], 1.0
+    for key, name in known.items():
+        if key and (key in normalized or normalized in key):
+            return name, 0.95
+    close = difflib.get_close_matches(normalized, list(known), n=1, cutoff=0.8)
+    if close:
+        return known[close[0]], 0.9
+    return value.strip(), 0.75
+
+def _find_advertiser(text: str, advertisers: Tuple[str, ...]) -> Optional[str]:
+    """First known advertiser mentioned anywhere in unlabelled text"""
+    hits = []
+    for name in advertisers:
+        match = re.search(r'\b' + re.escape(name) + r"(?:'s)?\b", text, re.IGNORECASE)
+        if match:
+            hits.append((match.start(), name))
+    return min(hits)[1] if hits else None
+
+def parse_amount(text: str, require_dollar: bool = False) -> Optional[float]:
+    """First money amount in text, honouring k/M/B suffixes ("$1.5M", "250k")"""
+    pattern = _DOLLAR_AMOUNT_PATTERN if require_dollar else _BARE_AMOUNT_PATTERN
+    match = pattern.search(text or "")
+    if not match:
+        return None
+    amount = float(match.group(1).replace(',', ''))
+    if match.group(2):
+        amount *= _AMOUNT_SUFFIXES[match.group(2).lower()]
+    return amount
+
+def _match_objective(text: str) -> Optional[str]:
+    text_lower = text.lower()
+    hits = []
+    for objective, keywords in _OBJECTIVE_KEYWORDS:
+        for keyword in keywords:
+            position = text_lower.find(keyword)
+            if position >= 0:
+                hits.append((position, objective))
+    return min(hits)[1] if hits else None
+
+def _explicit_dates(text: str, today: date) -> List[date]:
+    """Calendar dates in text order: ISO, US m/d/yyyy and "March 1, 2025" forms"""
+    found: List[Tuple[int, int, int, Optional[int]]] = []
+    for match in _ISO_DATE_PATTERN.finditer(text):
+        year, month, day = map(int, match.group(1).split('-'))
+        found.append((match.start(), month, day, year))
+    for match in _US_DATE_PATTERN.finditer(text):
+        year = int(match.group(3))
+        found.append((match.start(), int(match.group(1)), int(match.group(2)), year + 2000 if year < 100 else year))
+    for match in _LONG_DATE_PATTERN.finditer(text):
+        year = int(match.group(3)) if match.group(3) else None
+        found.append((match.start(), _MONTH_NAMES[match.group(1).lower()], int(match.group(2)), year))
+
+    # "March 1 - March 31, 2025": a missing year comes from the other date
+    known_year = next((year for _, _, _, year in found if year), today.year)
+    dates = []
+    for _, month, day, year in sorted(found):
+        try:
+            dates.append(date(year or known_year, month, day))
+        except ValueError:
+            continue
+    return dates
+
+def _parse_timeline(value: str, labelled: bool, today: date) -> Tuple[Optional[str], float]:
+    dates = _explicit_dates(value, today)
+    if len(dates) >= 2:
+        start, end = sorted(dates[:2])
+        return f"{start.isoformat()} to {end.isoformat()}", 1.0 if labelled else 0.9
+    if _QUARTER_PATTERN.search(value) or _DURATION_PATTERN.search(value):
+        match = _QUARTER_PATTERN.search(value) or _DURATION_PATTERN.search(value)
+        return (value.strip(), 0.95) if labelled else (match.group(0), 0.7)
+    if labelled and _MONTH_PATTERN.search(value):
+        return value.strip(), 0.9
+    if labelled:
+        return value.strip(), 0.3
+    return None, 0.0
+
+def rule_parse_brief(user_input: str,
+                     advertisers: Optional[Tuple[str, ...]] = None,
+                     today: Optional[date] = None) -> CampaignParameters:
+    """
+    Deterministic extraction for briefs written against the frontend template
+
+    Labelled lines ("Advertiser: ...", "Budget: $500k") are read first;
+    anything missing is looked for in the free text. Each field gets a
+    confidence and the overall confidence is their weighted sum, so callers
+    can decide whether the LLM is needed at all.
+    """
+    advertisers = load_advertiser_names() if advertisers is None else advertisers
+    today = today or date.today()
+    # Unfilled template placeholders ("[Brand Awareness/Performance/etc.]") aren't answers
+    text = _BRACKETED_PATTERN.sub('', user_input or "")
+
+    labelled: Dict[str, str] = {}
+    for label, value in _LABEL_PATTERN.findall(text):
+        field = _FIELD_LABELS[label.lower()]
+        if field not in labelled and value.strip():
+            labelled[field] = value
+
+    confidence = dict.fromkeys(FIELD_WEIGHTS, 0.0)
+
+    advertiser = DEFAULT_ADVERTISER
+    if "advertiser" in labelled:
+        advertiser, confidence["advertiser"] = _resolve_advertiser(labelled["advertiser"], advertisers)
+    else:
+        mentioned = _find_advertiser(text, advertisers)
+        if mentioned:
+            advertiser, confidence["advertiser"] = mentioned, 0.7
+
+    budget = None
+    if "budget" in labelled:
+        budget = parse_amount(labelled["budget"])
+        confidence["budget"] = 1.0 if budget else 0.0
+    if not budget:
+        budget = parse_amount(text, require_dollar=True)
+        confidence["budget"] = 0.8 if budget else 0.0
+
+    objective = None
+    if "objective" in labelled:
+        objective = _match_objective(labelled["objective"])
+        confidence["objective"] = 1.0 if objective else 0.0
+    if not objective:
+        objective = _match_objective(text)
+        confidence["objective"] = 0.7 if objective else 0.0
+
+    timeline = None
+    if "timeline" in labelled:
+        timeline, confidence["timeline"] = _parse_timeline(labelled["timeline"], True, today)
+    if confidence["timeline"] < 0.9:
+        unlabelled, unlabelled_confidence = _parse_timeline(text, False, today)
+        if unlabelled_confidence > confidence["timeline"]:
+            timeline, confidence["timeline"] = unlabelled, unlabelled_confidence
+
+    additional_requirements: Dict[str, Any] = {
+        "source": "rule_parser",
+        "field_confidence": confidence
+    }
+    if "target_audience" in labelled:
+        additional_requirements["target_audience"] = labelled["target_audience"]
+    if "notes" in labelled:
+        additional_requirements["notes"] = labelled["notes"]
+
+    return CampaignParameters(
+        advertiser=advertiser,
+        budget=float(budget or DEFAULT_BUDGET),
+        objective=objective or DEFAULT_OBJECTIVE,
+        timeline=timeline or DEFAULT_TIMELINE,
+        confidence=round(sum(FIELD_WEIGHTS[field] * confidence[field] for field in FIELD_WEIGHTS), 4),
+        additional_requirements=additional_requirements
+    )
+
 class CampaignParserAgent:
     """
     Specialized agent for parsing campaign requirements
@@ -34,14 +308,32 @@ class CampaignParserAgent:
     """
     
     def __init__(self):
-        self.client = AsyncOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY", "your_api_key_here")
-        )
         self.model = os.getenv("AGENT_MODEL", "gpt-4o-mini")
+        self.fast_path_threshold = float(os.getenv("BRIEF_PARSER_THRESHOLD", FAST_PATH_THRESHOLD))
+    
+    @cached_property
+    def client(self):
+        """OpenAI client, created the first time this agent calls the LLM"""
+        return create_openai_client()
     
-    async def parse_campaign_brief(self, user_input: str) -> CampaignParameters:
+    @cached_property
+    def advertiser_names(self) -> Tuple[str, ...]:
+        return load_advertiser_names()
+    
+    def reset_advertiser_names(self):
+        """Forget the cached names; the next brief resolves against the current snapshot"""
+        self.__dict__.pop("advertiser_names", None)
+    
+    async def parse_campaign_brief(self, user_input: str, use_llm: bool = True) -> CampaignParameters:
         """Parse campaign brief and extract structured parameters"""
         
+        # Well-formed briefs are fully answered by the rule parser; no LLM round trip
+        fast_parse = rule_parse_brief(user_input, self.advertiser_names)
+        if fast_parse.confidence >= self.fast_path_threshold:
+            return fast_parse
+        if not use_llm:
+            return self._fallback_parse(user_input)
+        
         system_prompt = """
         You are Neural, a sophisticated ad planning assistant for premium streaming platforms like LG Ads.
         
@@ -100,27 +392,9 @@ class CampaignParserAgent:
     def _fallback_parse(self, user_input: str) -> CampaignParameters:
         """Fallback parsing when OpenAI is unavailable"""
         
-        # Simple keyword extraction
-        budget = 100000
-        if "$" in user_input:
-            # Try to extract budget numbers
-            import re
-            budget_matches = re.findall(r'\$[\d,]+', user_input)
-            if budget_matches:
-                budget_str = budget_matches[0].replace('$', '').replace(',', '')
-                try:
-                    budget = float(budget_str)
-                except:
-                    budget = 100000
-        
-        return CampaignParameters(
-            advertiser="Sample Advertiser",
-            budget=budget,
-            objective="awareness",
-            timeline="30 days",
-            confidence=0.60,
-            additional_requirements={"source": "fallback_parsing"}
-        )
+        parameters = rule_parse_brief(user_input, self.advertiser_names)
+        parameters.additional_requirements["source"] = "fallback_parsing"
+        return parameters
     
     async def generate_reasoning(self, parameters: CampaignParameters) -> str:
         """Generate reasoning text for the parsed parameters"""
@@ -0,0 +1,57 @@
+"""
+Compute Pool - Shared Process Pool for CPU-Bound Planning Work
+Neural Ads - Connected TV Advertising Platform
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", str(os.cpu_count() or 1)))
+
+def worker_context() -> multiprocessing.context.BaseContext:
+    """
+    Multiprocessing context for the app's process pools: workers come from
+    a clean server process instead of forking the threaded event-loop process
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+class ComputePool:
+    """
+    One long-lived process pool for scenario sweeps and reach simulation
+
+    Creating a pool per request paid worker start-up on every call (more
+    than the work itself for small grids) and forked from whichever server
+    thread happened to run it. The app starts this pool once in its
+    lifespan and shuts it down on exit; anything run before then starts
+    it on first use.
+    """
+
+    def __init__(self, workers: int = COMPUTE_WORKERS):
+        self.workers = max(int(workers), 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=worker_context()
+                )
+            return self._executor
+
+    def map(self, fn: Callable[[Any], Any], tasks: Iterable[Any]) -> List[Any]:
+        """Results of fn over tasks, in order; blocks the calling thread"""
+        return list(self.start().map(fn, tasks))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+compute_pool = ComputePool()
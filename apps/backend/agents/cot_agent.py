@@ -8,12 +8,12 @@ import json
 import os
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
+from functools import cached_property
 from enum import Enum
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
+from .llm import load_environment, create_openai_client
 
 # Load environment variables
-load_dotenv()
+load_environment()
 
 class CampaignStep(Enum):
     PARSING = "campaign_data"
@@ -58,14 +58,15 @@ class COTReasoningAgent:
         self.thinking_history = []
         self.agents = {}  # Will hold references to specialized agents
         
-        # Initialize OpenAI client
-        self.client = AsyncOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY", "your_api_key_here")
-        )
         self.model = os.getenv("AGENT_MODEL", "gpt-4o-mini")
         self.temperature = float(os.getenv("AGENT_TEMPERATURE", "0.7"))
         self.max_tokens = int(os.getenv("AGENT_MAX_TOKENS", "2000"))
         
+    @cached_property
+    def client(self):
+        """OpenAI client, created the first time this agent calls the LLM"""
+        return create_openai_client()
+    
     async def process_campaign_request(self, user_input: str, uploaded_files: List = None) -> AgentThought:
         """
         Main entry point for campaign processing
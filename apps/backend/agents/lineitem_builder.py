@@ -0,0 +1,196 @@
+"""
+Line Item Builder - Combinatorial Line Items from Targeting Dimensions
+Neural Ads - Connected TV Advertising Platform
+"""
+
+import re
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from .lineitem_generator import LineItem, CampaignStructure, frequency_cap_per_day
+from .pricing_engine import PricingGrid
+
+MIN_LINE_ITEMS = 50
+MAX_LINE_ITEMS = 1000
+MIN_HOUSEHOLDS = 25000
+MIN_AFFINITY = 0.05
+
+# Preference lists are ordered; each step down the list keeps this share of affinity
+RANK_DECAY = 0.8
+
+DEFAULT_DEVICE_SHARES = {"CTV": 0.70, "Mobile": 0.20, "Desktop": 0.10}
+
+FREQUENCY_CAPS = {"awareness": 3, "consideration": 4, "engagement": 4, "conversion": 5}
+
+def _rank_weights(count: int) -> np.ndarray:
+    """Affinity weights for an ordered preference list (first = 1.0)"""
+    return RANK_DECAY ** np.arange(count, dtype=float)
+
+def _name_token(label: str) -> str:
+    """CamelCase a label into an ad-server safe name token"""
+    words = re.findall(r'[A-Za-z0-9]+', str(label))
+    return ''.join(word[:1].upper() + word[1:] for word in words) or "All"
+
+def _daypart_for(content: str) -> str:
+    content_lower = content.lower()
+    if "news" in content_lower:
+        return "Morning"
+    if "sport" in content_lower:
+        return "Weekend"
+    return "Prime Time"
+
+def _frequency_cap_for(objective: str, device: str) -> str:
+    per_day = FREQUENCY_CAPS.get((objective or "awareness").lower(), 3)
+    if device.lower() != "ctv":
+        per_day += 1
+    return f"{per_day}/day"
+
+def build_line_items(advertiser: str,
+                     budget: float,
+                     preferences: Dict[str, Any],
+                     audience_segments: List[Dict[str, Any]],
+                     pricing_grid: Optional[PricingGrid] = None,
+                     objective: str = "awareness",
+                     min_line_items: int = MIN_LINE_ITEMS,
+                     max_line_items: int = MAX_LINE_ITEMS,
+                     min_households: int = MIN_HOUSEHOLDS,
+                     min_affinity: float = MIN_AFFINITY) -> CampaignStructure:
+    """
+    Build line items from the content x geo x device x audience cross product
+
+    Every combination is scored in one vectorized pass: affinity comes from
+    preference rank, estimated households from segment scale split across
+    the other dimensions. Low-affinity and under-scale combinations are
+    pruned, the best max_line_items survive, and budget is provisionally
+    split in proportion to score. Daily caps are the spend each line's
+    households can absorb at its frequency cap.
+    """
+    content = list(dict.fromkeys(preferences.get("content_preferences") or ["Mixed Content"]))
+    geos = list(dict.fromkeys(preferences.get("geo_preferences") or ["Nationwide"]))
+    devices = list(dict.fromkeys(preferences.get("device_preferences") or ["CTV"]))
+    audiences = [seg for seg in audience_segments if seg.get("name")] or [
+        {"name": "General Audience", "cpm": 32.0, "scale": 2000000, "reach": 10.0}
+    ]
+    audience_names = [seg["name"] for seg in audiences]
+
+    # Per-dimension affinity and share of households
+    content_affinity = _rank_weights(len(content))
+    geo_affinity = _rank_weights(len(geos))
+    device_share = np.array([DEFAULT_DEVICE_SHARES.get(d, 1.0 / len(devices)) for d in devices], dtype=float)
+    device_affinity = device_share / device_share.max()
+    reach = np.array([float(seg.get("reach") or 1.0) for seg in audiences], dtype=float)
+    audience_affinity = reach / reach.max()
+    audience_scale = np.array([float(seg.get("scale") or 0) for seg in audiences], dtype=float)
+
+    content_share = content_affinity / content_affinity.sum()
+    geo_share = geo_affinity / geo_affinity.sum()
+    device_share = device_share / device_share.sum()
+
+    # Broadcast to the (content, geo, device, audience) tensor
+    affinity = (
+        content_affinity[:, None, None, None]
+        * geo_affinity[None, :, None, None]
+        * device_affinity[None, None, :, None]
+        * audience_affinity[None, None, None, :]
+    )
+    households = (
+        content_share[:, None, None, None]
+        * geo_share[None, :, None, None]
+        * device_share[None, None, :, None]
+        * audience_scale[None, None, None, :]
+    )
+    score = affinity * np.sqrt(households)
+
+    flat_score = score.ravel()
+    order = np.argsort(-flat_score, kind="stable")
+    keep = (affinity.ravel() >= min_affinity) & (households.ravel() >= min_households)
+    selected = order[keep[order]][:max_line_items]
+
+    # Too aggressive pruning on small briefs: top up from the best remaining combinations
+    if len(selected) < min_line_items:
+        selected = order[:min(min_line_items, max_line_items, order.size)]
+
+    c_idx, g_idx, d_idx, a_idx = np.unravel_index(selected, score.shape)
+
+    if pricing_grid is not None:
+        bid_cpms = pricing_grid.floor_cpms(
+            [audience_names[i] for i in a_idx],
+            [content[i] for i in c_idx],
+            [devices[i] for i in d_idx],
+            [geos[i] for i in g_idx]
+        )
+    else:
+        bid_cpms = np.array([float(audiences[i].get("cpm") or 32.0) for i in a_idx], dtype=float)
+    bid_cpms = np.round(bid_cpms, 2)
+
+    # Provisional split proportional to score, rounded to cents with an exact total
+    weights = flat_score[selected]
+    weights = weights / weights.sum() if weights.sum() > 0 else np.full(len(selected), 1.0 / max(len(selected), 1))
+    budgets = np.floor(weights * budget * 100) / 100
+    if len(budgets):
+        budgets[0] = round(budget - budgets[1:].sum(), 2)
+
+    # Daily cap is what the line's households can absorb at its frequency cap
+    frequency_caps = [_frequency_cap_for(objective, devices[i]) for i in d_idx]
+    exposures_per_day = np.array([frequency_cap_per_day(cap) for cap in frequency_caps], dtype=float)
+    daily_caps = np.ceil(households.ravel()[selected] * exposures_per_day * bid_cpms / 1000.0)
+
+    advertiser_token = _name_token(advertiser)
+    flat_households = households.ravel()
+    flat_affinity = affinity.ravel()
+    line_items = []
+    seen_names: Dict[str, int] = {}
+    for row, flat_index in enumerate(selected):
+        c, g, d, a = c_idx[row], g_idx[row], d_idx[row], a_idx[row]
+        name = "_".join([
+            advertiser_token,
+            _name_token(geos[g]),
+            _name_token(content[c]),
+            _name_token(devices[d]),
+            _name_token(audience_names[a])
+        ])
+        if name in seen_names:
+            seen_names[name] += 1
+            name = f"{name}_{seen_names[name]}"
+        else:
+            seen_names[name] = 1
+
+        line_items.append(LineItem(
+            name=name,
+            content=content[c],
+            geo=geos[g],
+            device=devices[d],
+            audience=audience_names[a],
+            bid_cpm=float(bid_cpms[row]),
+            daily_cap=float(daily_caps[row]),
+            frequency_cap=frequency_caps[row],
+            budget=float(budgets[row]),
+            targeting_criteria={
+                "daypart": _daypart_for(content[c]),
+                "content_safety": "Brand Safe",
+                "estimated_households": int(flat_households[flat_index]),
+                "affinity_score": round(float(flat_affinity[flat_index]), 4)
+            }
+        ))
+
+    device_budget: Dict[str, float] = {}
+    for item in line_items:
+        device_budget[item.device] = device_budget.get(item.device, 0.0) + item.budget
+    budget_allocation = {
+        device: round(amount / budget, 4) if budget else 0.0
+        for device, amount in device_budget.items()
+    }
+
+    return CampaignStructure(
+        line_items=line_items,
+        total_budget=budget,
+        total_line_items=len(line_items),
+        budget_allocation=budget_allocation,
+        confidence=0.86,
+        deployment_notes=[
+            f"{len(line_items)} line items built from {score.size:,} targeting combinations",
+            f"Pruned combinations under {min_households:,} households or {min_affinity:.0%} affinity",
+            "Bids priced from CPM floor grid" if pricing_grid is not None else "Bids priced from segment CPMs"
+        ]
+    )
@@ -5,12 +5,13 @@ Neural Ads - Connected TV Advertising Platform
 
 import json
 import os
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
+from functools import cached_property
+from .llm import load_environment, create_openai_client
 
-load_dotenv()
+load_environment()
 
 @dataclass
 class LineItem:
@@ -34,6 +35,25 @@ class CampaignStructure:
     confidence: float
     deployment_notes: List[str]
 
+_FREQUENCY_CAP_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(?:x\s*)?(?:/|per)\s*(hour|day|week|month)', re.IGNORECASE)
+
+_PER_DAY = {"hour": 24.0, "day": 1.0, "week": 1 / 7, "month": 1 / 30}
+
+def parse_frequency_cap(frequency_cap: str) -> Optional[Tuple[float, str]]:
+    """Split a frequency cap string ("3/day", "10 per week") into (amount, period); None if unreadable"""
+    match = _FREQUENCY_CAP_PATTERN.search(frequency_cap or "")
+    if not match:
+        return None
+    return float(match.group(1)), match.group(2).lower()
+
+def frequency_cap_per_day(frequency_cap: str, default: float = 3.0) -> float:
+    """Convert a frequency cap string ("3/day", "10/week") into exposures per day"""
+    parsed = parse_frequency_cap(frequency_cap)
+    if parsed is None:
+        return default
+    amount, period = parsed
+    return amount * _PER_DAY[period]
+
 class LineItemGeneratorAgent:
     """
     Specialized agent for building executable ad server line items
@@ -47,17 +67,23 @@ class LineItemGeneratorAgent:
     """
     
     def __init__(self):
-        self.client = AsyncOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY", "your_api_key_here")
-        )
         self.model = os.getenv("AGENT_MODEL", "gpt-4o-mini")
     
+    @cached_property
+    def client(self):
+        """OpenAI client, created the first time this agent calls the LLM"""
+        return create_openai_client()
+    
     async def generate_line_items(self, 
                                  advertiser: str, 
                                  budget: float,
                                  preferences: Dict[str, Any], 
-                                 audience_segments: List[Dict[str, Any]]) -> CampaignStructure:
-        """Generate executable line items based on all previous analysis"""
+                                 audience_segments: List[Dict[str, Any]],
+                                 use_llm: bool = True) -> CampaignStructure:
+        """Generate executable line items based on all previous analysis (template items with use_llm=False)"""
+        
+        if not use_llm:
+            return self._fallback_line_items(advertiser, budget, audience_segments)
         
         # Create simplified segment info for prompt
         segment_info = []
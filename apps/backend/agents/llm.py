@@ -0,0 +1,24 @@
+"""
+LLM Client - Shared Environment and Lazy OpenAI Client Construction
+Neural Ads - Connected TV Advertising Platform
+"""
+
+import os
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def load_environment():
+    """Read .env once per process instead of once per agent module"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+def create_openai_client():
+    """
+    AsyncOpenAI client for an agent. openai is imported here rather than at
+    module level: it is the slowest import in the backend, and briefs served
+    by the rule parser or the step cache never reach an LLM.
+    """
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY", "your_api_key_here")
+    )
@@ -4,16 +4,27 @@ Neural Ads - Connected TV Advertising Platform
 """
 
 import asyncio
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+import contextlib
+import math
+import os
+from typing import Dict, Any, AsyncContextManager, AsyncIterator, Callable, List, Optional
+from dataclasses import dataclass, replace
 from enum import Enum
 import threading
 import time
 
-from .campaign_parser import CampaignParserAgent, CampaignParameters
+from .campaign_parser import CampaignParserAgent, CampaignParameters, parse_flight_window
 from .advertiser_preferences import AdvertiserPreferencesAgent, AdvertiserPreferences
 from .audience_generation import AudienceGenerationAgent, AudienceAnalysis
 from .lineitem_generator import LineItemGeneratorAgent, CampaignStructure
+from .pricing_engine import PricingGrid, build_pricing_grid, apply_floor_prices
+from .lineitem_builder import build_line_items, DEFAULT_DEVICE_SHARES
+from .budget_allocator import allocate_campaign_budget, allocation_objective
+from .pacing_simulator import pacing_check
+from .reach_simulator import ReachReport, simulate_reach, DEFAULT_PANEL_HOUSEHOLDS
+from .scenario_sweep import ScenarioBase, expand_scenario_grid, run_scenarios
+from .step_cache import step_cache, budget_bucket
+from .vector_snapshot import VectorSnapshot
 
 class WorkflowStep(Enum):
     CAMPAIGN_DATA = "campaign_data"
@@ -22,6 +33,62 @@ class WorkflowStep(Enum):
     CAMPAIGN_GENERATION = "campaign_generation"
     COMPLETE = "complete"
 
+# Inputs each step reads; editing any of them invalidates the step.
+# Audience segments depend on the budget only through the step cache's
+# budget bucket, so small budget edits keep the current audience.
+STEP_INPUTS = {
+    WorkflowStep.ADVERTISER_PREFERENCES: ("advertiser", "objective"),
+    WorkflowStep.AUDIENCE_GENERATION: (
+        "advertiser", "budget_bucket",
+        "content_preferences", "geo_preferences", "device_preferences"
+    ),
+    WorkflowStep.CAMPAIGN_GENERATION: (
+        "advertiser", "budget", "objective", "timeline",
+        "content_preferences", "geo_preferences", "device_preferences",
+        "audience_analysis"
+    )
+}
+
+STEP_ORDER = (
+    WorkflowStep.CAMPAIGN_DATA,
+    WorkflowStep.ADVERTISER_PREFERENCES,
+    WorkflowStep.AUDIENCE_GENERATION,
+    WorkflowStep.CAMPAIGN_GENERATION
+)
+
+PARAMETER_FIELDS = ("advertiser", "budget", "objective", "timeline")
+
+# Orchestrator state a step runner may overwrite; saved before speculation so a discarded run can be undone
+STEP_STATE_FIELDS = ("advertiser_preferences", "audience_analysis", "pricing_grid", "campaign_structure", "_audience_version")
+PREFERENCE_FIELDS = ("content_preferences", "geo_preferences", "device_preferences")
+
+def _coerce_edits(edits: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate and normalise /agent/edit values; raises ValueError before anything is applied"""
+    unknown = set(edits) - set(PARAMETER_FIELDS) - set(PREFERENCE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unsupported edit fields: {', '.join(sorted(unknown))}")
+    
+    coerced: Dict[str, Any] = {}
+    for field, value in edits.items():
+        if field == "budget":
+            try:
+                budget = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"budget must be a number, got {value!r}")
+            if not math.isfinite(budget) or budget <= 0:
+                raise ValueError(f"budget must be positive, got {value!r}")
+            coerced[field] = budget
+        elif field in PARAMETER_FIELDS:
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"{field} must be a non-empty string")
+            coerced[field] = value.strip()
+        else:
+            items = [item.strip() for item in value if isinstance(item, str) and item.strip()] if isinstance(value, list) else []
+            if not items or len(items) != len(value):
+                raise ValueError(f"{field} must be a non-empty list of strings")
+            coerced[field] = items
+    return coerced
+
 @dataclass
 class WorkflowResult:
     step: WorkflowStep
@@ -29,6 +96,8 @@ class WorkflowResult:
     action: str
     data: Dict[str, Any]
     confidence: float
+    # Produced by an agent's deterministic fallback because the LLM was skipped under load
+    degraded: bool = False
 
 class MultiAgentOrchestrator:
     """
@@ -44,7 +113,9 @@ class MultiAgentOrchestrator:
     ensuring clean data flow and proper step progression.
     """
     
-    def __init__(self):
+    def __init__(self,
+                 shed_load: Optional[Callable[[], bool]] = None,
+                 speculation_slot: Optional[Callable[[], AsyncContextManager]] = None):
         self.current_step = WorkflowStep.CAMPAIGN_DATA
         self.campaign_context = {}
         
@@ -59,11 +130,155 @@ class MultiAgentOrchestrator:
         self.audience_agent = AudienceGenerationAgent()
         self.lineitem_agent = LineItemGeneratorAgent()
         
+        # "combinatorial" builds line items locally; "llm" asks the line item agent
+        self.line_item_mode = os.getenv("LINE_ITEM_GENERATOR", "combinatorial").lower()
+        
         # Store results from each step
         self.campaign_parameters: Optional[CampaignParameters] = None
         self.advertiser_preferences: Optional[AdvertiserPreferences] = None
         self.audience_analysis: Optional[AudienceAnalysis] = None
         self.campaign_structure: Optional[CampaignStructure] = None
+        self.pricing_grid: Optional[PricingGrid] = None
+        
+        # Brief and latest result of each step, kept for the campaign archive
+        self.brief: Optional[str] = None
+        self.step_results: Dict[WorkflowStep, WorkflowResult] = {}
+        
+        # Inputs each completed step was computed from, for incremental re-planning
+        self._step_inputs: Dict[WorkflowStep, Dict[str, Any]] = {}
+        self._audience_version = 0
+        self._preference_overrides: Dict[str, List[str]] = {}
+        
+        # Speculative precomputation of the next step while the user reviews the current one
+        self.speculative_steps = os.getenv("SPECULATIVE_STEPS", "true").lower() == "true"
+        self._speculative_task: Optional[asyncio.Task] = None
+        self._speculative_step: Optional[WorkflowStep] = None
+        self._speculation_started = False
+        self._precomputed: Dict[WorkflowStep, WorkflowResult] = {}
+        # Held while a speculative step runs, so background work shares the request concurrency limit
+        self._speculation_slot = speculation_slot or contextlib.nullcontext
+        
+        # Version of the persisted session state this orchestrator reflects (0 = never saved)
+        self.state_version = 0
+        
+        # Asked before each step; True means skip the LLM and use the agents' fallbacks
+        self._shed_load = shed_load or (lambda: False)
+    
+    def _step_runner(self, step: WorkflowStep):
+        """Coroutine function that computes a step from the stored upstream results"""
+        return {
+            WorkflowStep.ADVERTISER_PREFERENCES: self._process_advertiser_analysis,
+            WorkflowStep.AUDIENCE_GENERATION: self._process_audience_generation,
+            WorkflowStep.CAMPAIGN_GENERATION: self._process_line_item_generation
+        }[step]
+    
+    def _schedule_speculation(self):
+        """Start the first not-yet-computed step in the background once its prerequisites exist"""
+        if not self.speculative_steps:
+            return
+        if self._speculative_task and not self._speculative_task.done():
+            return
+        if self._shed_load():
+            # Speculative LLM work is the first thing to go under load
+            return
+        
+        for step in STEP_ORDER[1:]:
+            if step in self._step_inputs:
+                continue
+            if self._validate_step_prerequisites(step):
+                print(f"⚡ Speculatively precomputing: {step.value}")
+                self._speculative_step = step
+                self._speculation_started = False
+                self._speculative_task = asyncio.create_task(self._speculate(step))
+            return
+    
+    async def _speculate(self, step: WorkflowStep):
+        saved_state = {name: getattr(self, name) for name in STEP_STATE_FIELDS}
+        saved_inputs = self._step_inputs.get(step)
+        
+        def discard():
+            # Put back what the step runner overwrote, so the step still counts as not computed
+            for name, value in saved_state.items():
+                setattr(self, name, value)
+            if saved_inputs is None:
+                self._step_inputs.pop(step, None)
+            else:
+                self._step_inputs[step] = saved_inputs
+        
+        try:
+            async with self._speculation_slot():
+                # Load may have risen while waiting for the slot
+                if self._shed_load():
+                    print(f"🔻 Skipping speculative {step.value} under load")
+                    return
+                self._speculation_started = True
+                result = await self._step_runner(step)()
+            
+            if result.degraded:
+                # Load rose mid-speculation; leave the step for the request that needs it
+                discard()
+                return
+            self._precomputed[step] = result
+        except asyncio.CancelledError:
+            # Whoever cancelled (a new brief, an edit, a reset or the request itself) rewrites this state
+            print(f"🛑 Speculative {step.value} cancelled")
+            raise
+        except Exception as e:
+            print(f"⚠️ Speculative {step.value} failed: {str(e)}")
+            discard()
+            return
+        finally:
+            if self._speculative_task is asyncio.current_task():
+                self._speculative_task = None
+                self._speculative_step = None
+        
+        self._schedule_speculation()
+    
+    def release(self):
+        """Stop background speculation before this orchestrator is dropped; workflow state is left as is"""
+        self._cancel_speculation()
+    
+    def _cancel_speculation(self):
+        if self._speculative_task and not self._speculative_task.done():
+            self._speculative_task.cancel()
+        self._speculative_task = None
+        self._speculative_step = None
+    
+    async def _take_precomputed(self, step: WorkflowStep, wait: bool = True) -> Optional[WorkflowResult]:
+        """Result of a finished (or, with `wait`, in-flight) speculative run of `step`, if any"""
+        task = self._speculative_task
+        if step not in self._precomputed and task and self._speculative_step == step:
+            if not wait or not self._speculation_started:
+                # Still queued for a background slot: the request runs the step itself rather than wait behind it
+                self._cancel_speculation()
+                return None
+            # asyncio.wait never raises, so a cancelled speculation just falls through
+            await asyncio.wait({task})
+        
+        result = self._precomputed.pop(step, None)
+        if result:
+            print(f"⚡ Serving precomputed step: {step.value}")
+        return result
+    
+    def _current_inputs(self) -> Dict[str, Any]:
+        """Snapshot of every value a step can depend on"""
+        inputs: Dict[str, Any] = {"audience_analysis": self._audience_version}
+        if self.campaign_parameters:
+            for field in PARAMETER_FIELDS:
+                inputs[field] = getattr(self.campaign_parameters, field)
+            inputs["budget_bucket"] = budget_bucket(self.campaign_parameters.budget)
+        if self.advertiser_preferences:
+            for field in PREFERENCE_FIELDS:
+                inputs[field] = tuple(getattr(self.advertiser_preferences, field))
+        return inputs
+    
+    def _record_step_inputs(self, step: WorkflowStep):
+        current = self._current_inputs()
+        self._step_inputs[step] = {name: current.get(name) for name in STEP_INPUTS[step]}
+    
+    def _is_step_stale(self, step: WorkflowStep) -> bool:
+        current = self._current_inputs()
+        return any(self._step_inputs[step].get(name) != current.get(name) for name in STEP_INPUTS[step])
     
     def _validate_step_transition(self, current: WorkflowStep, next_step: WorkflowStep) -> bool:
         """Validate that step transition is valid"""
@@ -105,13 +320,17 @@ class MultiAgentOrchestrator:
                 raise ValueError(f"Prerequisites not met for step: {self.current_step.value}")
             
             if self.current_step == WorkflowStep.CAMPAIGN_DATA:
-                return await self._process_campaign_parsing(user_input)
-            elif self.current_step == WorkflowStep.ADVERTISER_PREFERENCES:
-                return await self._process_advertiser_analysis()
-            elif self.current_step == WorkflowStep.AUDIENCE_GENERATION:
-                return await self._process_audience_generation()
-            elif self.current_step == WorkflowStep.CAMPAIGN_GENERATION:
-                return await self._process_line_item_generation()
+                # A new brief makes every precomputed step stale
+                self._cancel_speculation()
+                self._precomputed = {}
+                self.step_results = {}
+                result = await self._process_campaign_parsing(user_input)
+                self.brief = user_input
+            elif self.current_step in STEP_ORDER:
+                # Under load an unfinished speculative LLM run isn't worth waiting for
+                result = await self._take_precomputed(self.current_step, wait=not self._shed_load())
+                if result is None:
+                    result = await self._step_runner(self.current_step)()
             else:
                 return WorkflowResult(
                     step=self.current_step,
@@ -120,6 +339,10 @@ class MultiAgentOrchestrator:
                     data={"status": "complete"},
                     confidence=1.0
                 )
+            
+            self.step_results[result.step] = result
+            self._schedule_speculation()
+            return result
         except Exception as e:
             print(f"❌ Error processing step {self.current_step.value}: {str(e)}")
             raise
@@ -131,17 +354,16 @@ class MultiAgentOrchestrator:
         """Step 1: Parse campaign requirements"""
         
         try:
-            self.campaign_parameters = await self.campaign_parser.parse_campaign_brief(user_input)
+            degraded = self._shed_load()
+            self.campaign_parameters = await self.campaign_parser.parse_campaign_brief(
+                user_input, use_llm=not degraded
+            )
+            # Well-formed briefs never needed the LLM, so only the rule-parser fallback counts
+            degraded = degraded and self.campaign_parameters.additional_requirements.get("source") == "fallback_parsing"
+            self._step_inputs = {}
+            self._preference_overrides = {}
             reasoning = await self.campaign_parser.generate_reasoning(self.campaign_parameters)
-            
-            # Convert to dict for frontend
-            data = {
-                "advertiser": self.campaign_parameters.advertiser,
-                "budget": self.campaign_parameters.budget,
-                "objective": self.campaign_parameters.objective,
-                "timeline": self.campaign_parameters.timeline,
-                "additional_requirements": self.campaign_parameters.additional_requirements or {}
-            }
+            data = self._campaign_data()
             
             print(f"✅ Campaign parsing complete for: {self.campaign_parameters.advertiser}")
             
@@ -150,12 +372,23 @@ class MultiAgentOrchestrator:
                 reasoning=reasoning,
                 action="Proceed to historical pattern analysis",
                 data=data,
-                confidence=self.campaign_parameters.confidence
+                confidence=self.campaign_parameters.confidence,
+                degraded=degraded
             )
         except Exception as e:
             print(f"❌ Campaign parsing failed: {str(e)}")
             raise ValueError(f"Campaign parsing failed: {str(e)}")
     
+    def _campaign_data(self) -> Dict[str, Any]:
+        """Step 1 parameters as sent to the frontend"""
+        return {
+            "advertiser": self.campaign_parameters.advertiser,
+            "budget": self.campaign_parameters.budget,
+            "objective": self.campaign_parameters.objective,
+            "timeline": self.campaign_parameters.timeline,
+            "additional_requirements": self.campaign_parameters.additional_requirements or {}
+        }
+    
     async def _process_advertiser_analysis(self) -> WorkflowResult:
         """Step 2: Analyze advertiser historical patterns"""
         
@@ -163,10 +396,30 @@ class MultiAgentOrchestrator:
             raise ValueError("Campaign parameters required for advertiser analysis")
         
         try:
-            self.advertiser_preferences = await self.preferences_agent.analyze_advertiser_patterns(
-                self.campaign_parameters.advertiser,
-                self.campaign_parameters.objective
+            cache_key = step_cache.key(
+                WorkflowStep.ADVERTISER_PREFERENCES.value,
+                self.preferences_agent.data_version,
+                advertiser=self.campaign_parameters.advertiser,
+                objective=self.campaign_parameters.objective
             )
+            degraded = False
+            self.advertiser_preferences = step_cache.get(cache_key)
+            if self.advertiser_preferences is not None:
+                print(f"♻️ Reusing cached advertiser analysis for: {self.campaign_parameters.advertiser}")
+            else:
+                degraded = self._shed_load()
+                self.advertiser_preferences = await self.preferences_agent.analyze_advertiser_patterns(
+                    self.campaign_parameters.advertiser,
+                    self.campaign_parameters.objective,
+                    use_llm=not degraded
+                )
+                # Degraded results aren't cached, so the next request gets the LLM again
+                if not degraded:
+                    step_cache.put(cache_key, self.advertiser_preferences)
+            
+            for field, values in self._preference_overrides.items():
+                setattr(self.advertiser_preferences, field, list(values))
+            self._record_step_inputs(WorkflowStep.ADVERTISER_PREFERENCES)
             
             reasoning = await self.preferences_agent.generate_reasoning(self.advertiser_preferences)
             
@@ -189,7 +442,8 @@ class MultiAgentOrchestrator:
                 reasoning=reasoning,
                 action="Generate ACR audience segments",
                 data=data,
-                confidence=self.advertiser_preferences.confidence
+                confidence=self.advertiser_preferences.confidence,
+                degraded=degraded
             )
         except Exception as e:
             print(f"❌ Advertiser analysis failed: {str(e)}")
@@ -209,17 +463,37 @@ class MultiAgentOrchestrator:
                 "device_preferences": self.advertiser_preferences.device_preferences
             }
             
-            self.audience_analysis = await self.audience_agent.generate_audience_segments(
-                self.campaign_parameters.advertiser,
-                preferences_dict,
-                self.campaign_parameters.budget
+            cache_key = step_cache.key(
+                WorkflowStep.AUDIENCE_GENERATION.value,
+                self.preferences_agent.data_version,
+                advertiser=self.campaign_parameters.advertiser,
+                preferences=preferences_dict,
+                budget_bucket=budget_bucket(self.campaign_parameters.budget)
             )
+            degraded = False
+            self.audience_analysis = step_cache.get(cache_key)
+            if self.audience_analysis is not None:
+                print(f"♻️ Reusing cached audience segments for: {self.campaign_parameters.advertiser}")
+            else:
+                degraded = self._shed_load()
+                self.audience_analysis = await self.audience_agent.generate_audience_segments(
+                    self.campaign_parameters.advertiser,
+                    preferences_dict,
+                    self.campaign_parameters.budget,
+                    use_llm=not degraded
+                )
+                if not degraded:
+                    step_cache.put(cache_key, self.audience_analysis)
             
             reasoning = await self.audience_agent.generate_reasoning(
                 self.audience_analysis,
                 self.campaign_parameters.advertiser
             )
             
+            self._audience_version += 1
+            self._record_step_inputs(WorkflowStep.AUDIENCE_GENERATION)
+            self.pricing_grid = self._build_pricing_grid()
+            
             # Convert segments to dict for frontend
             segments_data = []
             for segment in self.audience_analysis.segments:
@@ -236,6 +510,7 @@ class MultiAgentOrchestrator:
                 "segments": segments_data,
                 "pricing_insights": self.audience_analysis.pricing_insights,
                 "yield_signals": self.audience_analysis.yield_signals,
+                "pricing_grid": self.pricing_grid.summary(),
                 "recommendations": self.audience_analysis.recommendations
             }
             
@@ -246,7 +521,8 @@ class MultiAgentOrchestrator:
                 reasoning=reasoning,
                 action="Build executable line items",
                 data=data,
-                confidence=self.audience_analysis.confidence
+                confidence=self.audience_analysis.confidence,
+                degraded=degraded
             )
         except Exception as e:
             print(f"❌ Audience generation failed: {str(e)}")
@@ -276,12 +552,61 @@ class MultiAgentOrchestrator:
                     "reach": segment.reach
                 })
             
-            self.campaign_structure = await self.lineitem_agent.generate_line_items(
-                self.campaign_parameters.advertiser,
-                self.campaign_parameters.budget,
-                preferences_dict,
-                audience_segments
+            # Cheap to rebuild, and keeps the grid axes in step with edited targeting
+            self.pricing_grid = self._build_pricing_grid()
+            
+            # Combinatorial line items never call the LLM, so only "llm" mode degrades
+            degraded = self.line_item_mode == "llm" and self._shed_load()
+            if self.line_item_mode == "llm":
+                self.campaign_structure = await self.lineitem_agent.generate_line_items(
+                    self.campaign_parameters.advertiser,
+                    self.campaign_parameters.budget,
+                    preferences_dict,
+                    audience_segments,
+                    use_llm=not degraded
+                )
+            else:
+                self.campaign_structure = build_line_items(
+                    self.campaign_parameters.advertiser,
+                    self.campaign_parameters.budget,
+                    preferences_dict,
+                    audience_segments,
+                    pricing_grid=self.pricing_grid,
+                    objective=self.campaign_parameters.objective
+                )
+            
+            # Enforce grid floor prices on every bid
+            apply_floor_prices(self.campaign_structure.line_items, self.pricing_grid)
+            
+            flight_start, flight_end = parse_flight_window(self.campaign_parameters.timeline)
+            
+            # Re-split the budget under CPM, scale and daily cap constraints
+            device_mix = (self.campaign_structure.budget_allocation if self.line_item_mode == "llm"
+                          else DEFAULT_DEVICE_SHARES)
+            allocation = allocate_campaign_budget(
+                self.campaign_structure,
+                (flight_end - flight_start).days + 1,
+                device_mix=device_mix,
+                segment_scale={segment.name: segment.scale for segment in self.audience_analysis.segments},
+                objective=allocation_objective(self.campaign_parameters.objective)
             )
+            if not allocation.feasible:
+                self.campaign_structure.deployment_notes.append(
+                    f"${allocation.unallocated:,.0f} could not be placed within line item caps and scale"
+                )
+            
+            # Check the plan can actually deliver over the flight
+            # Line items are trafficked with even pacing; ASAP is projected alongside to show front-loading
+            pacing_summary = pacing_check(self.campaign_structure, flight_start, flight_end, pacing="even")
+            if pacing_summary["flags"]:
+                self.campaign_structure.deployment_notes.append(
+                    f"Pacing check flagged {len(pacing_summary['flags'])} line items - review caps before trafficking"
+                )
+            early_under_asap = pacing_summary["alternatives"]["asap"]["early_exhaustion_lines"]
+            if early_under_asap:
+                self.campaign_structure.deployment_notes.append(
+                    f"{early_under_asap} line items would spend out early under ASAP pacing - keep even pacing on"
+                )
             
             reasoning = await self.lineitem_agent.generate_reasoning(
                 self.campaign_structure,
@@ -309,9 +634,13 @@ class MultiAgentOrchestrator:
                 "total_budget": self.campaign_structure.total_budget,
                 "total_line_items": self.campaign_structure.total_line_items,
                 "budget_allocation": self.campaign_structure.budget_allocation,
+                "allocation": allocation.summary(),
+                "pacing": pacing_summary,
                 "deployment_notes": self.campaign_structure.deployment_notes
             }
             
+            self._record_step_inputs(WorkflowStep.CAMPAIGN_GENERATION)
+            
             print(f"✅ Line item generation complete: {len(line_items_data)} items")
             
             return WorkflowResult(
@@ -319,19 +648,188 @@ class MultiAgentOrchestrator:
                 reasoning=reasoning,
                 action="Campaign structure ready for deployment",
                 data=data,
-                confidence=self.campaign_structure.confidence
+                confidence=self.campaign_structure.confidence,
+                degraded=degraded
             )
         except Exception as e:
             print(f"❌ Line item generation failed: {str(e)}")
             raise ValueError(f"Line item generation failed: {str(e)}")
     
-    def advance_step(self) -> WorkflowStep:
+    async def edit_campaign(self, edits: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply brief edits and re-run only the completed steps they invalidate
+        
+        Campaign parameters (advertiser, budget, objective, timeline) and
+        targeting preferences can be edited. A budget change, for example,
+        re-runs line item generation but reuses parsing, preferences and
+        audience results.
+        """
+        # Every value is checked before any is applied, so a bad edit changes nothing
+        edits = _coerce_edits(edits)
+        
+        with self._lock:
+            if self._processing:
+                raise ValueError("Another request is already being processed")
+            self._processing = True
+        
+        try:
+            if not self.campaign_parameters:
+                raise ValueError("Campaign parameters required before editing")
+            
+            self._cancel_speculation()
+            
+            for field in PARAMETER_FIELDS:
+                if field in edits:
+                    setattr(self.campaign_parameters, field, edits[field])
+            
+            for field in PREFERENCE_FIELDS:
+                if field in edits:
+                    self._preference_overrides[field] = list(edits[field])
+                    if self.advertiser_preferences:
+                        setattr(self.advertiser_preferences, field, list(edits[field]))
+            
+            # Status and the archive read the step 1 result, so it shows the edited parameters
+            parsed = self.step_results.get(WorkflowStep.CAMPAIGN_DATA)
+            if parsed is not None:
+                self.step_results[WorkflowStep.CAMPAIGN_DATA] = replace(
+                    parsed,
+                    data=self._campaign_data(),
+                    reasoning=await self.campaign_parser.generate_reasoning(self.campaign_parameters)
+                )
+            
+            results: Dict[str, WorkflowResult] = {}
+            reused = [WorkflowStep.CAMPAIGN_DATA.value]
+            for step in STEP_ORDER[1:]:
+                if step not in self._step_inputs:
+                    continue
+                if self._is_step_stale(step):
+                    print(f"🔄 Re-planning step: {step.value}")
+                    results[step.value] = await self._step_runner(step)()
+                    if step in self.step_results:
+                        self.step_results[step] = results[step.value]
+                    # Steps the user hasn't reached yet are served from the fresh result
+                    if STEP_ORDER.index(step) >= self._step_position():
+                        self._precomputed[step] = results[step.value]
+                else:
+                    reused.append(step.value)
+            
+            self._schedule_speculation()
+            
+            return {
+                "recomputed": list(results),
+                "reused": reused,
+                "results": results
+            }
+        finally:
+            with self._lock:
+                self._processing = False
+    
+    def _step_position(self) -> int:
+        if self.current_step in STEP_ORDER:
+            return STEP_ORDER.index(self.current_step)
+        return len(STEP_ORDER)
+    
+    def _build_pricing_grid(self,
+                            audience_analysis: Optional[AudienceAnalysis] = None,
+                            preferences: Optional[AdvertiserPreferences] = None) -> PricingGrid:
+        """Build the CPM floor grid over the insight labels plus the advertiser's own targeting"""
+        audience_analysis = audience_analysis or self.audience_analysis
+        preferences = preferences or self.advertiser_preferences
+        insights = audience_analysis.pricing_insights or {}
+        return build_pricing_grid(
+            audience_analysis,
+            content=list(insights.get("content_premiums", {})) + preferences.content_preferences,
+            devices=list(insights.get("device_multipliers", {})) + preferences.device_preferences,
+            regions=list(insights.get("regional_variance", {})) + preferences.geo_preferences
+        )
+    
+    async def run_scenarios(self,
+                            grid: Dict[str, List[Any]],
+                            user_input: Optional[str] = None,
+                            workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Compare budget/objective/flight variants of one plan
+        
+        With a brief, steps 1-3 (and their LLM calls) run once and are shared
+        by every variant; without one, the current workflow's results are
+        reused. Only deterministic step 4 planning fans out per variant.
+        """
+        variants = expand_scenario_grid(grid)
+        
+        if user_input:
+            parameters = await self.campaign_parser.parse_campaign_brief(user_input)
+            preferences = await self.preferences_agent.analyze_advertiser_patterns(
+                parameters.advertiser, parameters.objective
+            )
+            audience_analysis = await self.audience_agent.generate_audience_segments(
+                parameters.advertiser,
+                {
+                    "content_preferences": preferences.content_preferences,
+                    "geo_preferences": preferences.geo_preferences,
+                    "device_preferences": preferences.device_preferences
+                },
+                parameters.budget
+            )
+        elif self._validate_step_prerequisites(WorkflowStep.CAMPAIGN_GENERATION):
+            parameters = self.campaign_parameters
+            preferences = self.advertiser_preferences
+            audience_analysis = self.audience_analysis
+        else:
+            raise ValueError("Scenario sweep needs a campaign brief or a workflow through audience generation")
+        
+        base = ScenarioBase(
+            advertiser=parameters.advertiser,
+            budget=parameters.budget,
+            objective=parameters.objective,
+            timeline=parameters.timeline,
+            preferences=preferences,
+            audience_analysis=audience_analysis,
+            pricing_grid=self._build_pricing_grid(audience_analysis, preferences)
+        )
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, run_scenarios, base, variants, workers)
+    
+    def simulate_campaign_reach(self,
+                                panel_households: int = DEFAULT_PANEL_HOUSEHOLDS,
+                                seed: int = 0,
+                                workers: Optional[int] = None) -> ReachReport:
+        """Monte Carlo reach/frequency for the generated campaign structure"""
+        if not self.campaign_structure or not self.audience_analysis:
+            raise ValueError("Campaign structure required for reach simulation")
+        
+        segments = [
+            {"name": segment.name, "scale": segment.scale, "reach": segment.reach}
+            for segment in self.audience_analysis.segments
+        ]
+        flight_start, flight_end = parse_flight_window(self.campaign_parameters.timeline)
+        
+        return simulate_reach(
+            self.campaign_structure,
+            segments,
+            (flight_end - flight_start).days + 1,
+            panel_households=panel_households,
+            seed=seed,
+            workers=workers
+        )
+    
+    async def run_all_steps(self, brief: str) -> AsyncIterator[WorkflowResult]:
+        """
+        Run the whole workflow for a brief without pausing for review,
+        yielding each step's result as it completes (used by background jobs)
+        """
+        self.reset_workflow()
+        while self.current_step != WorkflowStep.COMPLETE:
+            yield await self.process_step(brief if self.current_step == WorkflowStep.CAMPAIGN_DATA else "")
+            self.advance_step(debounce=False)
+    
+    def advance_step(self, debounce: bool = True) -> WorkflowStep:
         """Advance to the next workflow step with validation"""
         
         with self._lock:
             # Prevent rapid successive advances
             current_time = time.time()
-            if current_time - self._last_advance_time < 1.0:  # 1 second debounce
+            if debounce and current_time - self._last_advance_time < 1.0:  # 1 second debounce
                 print(f"⏳ Advance debounced, too recent")
                 return self.current_step
             
@@ -362,6 +860,58 @@ class MultiAgentOrchestrator:
         
         return self.current_step
     
+    def reload_data(self, snapshot: Optional[VectorSnapshot] = None) -> str:
+        """
+        Reload the advertiser vector database (or adopt `snapshot`, already
+        reloaded by another session) and drop everything cached from the old one
+        """
+        previous_version = self.preferences_agent.data_version
+        data_version = self.preferences_agent.reload_database(snapshot)
+        self.campaign_parser.reset_advertiser_names()
+        if data_version != previous_version:
+            dropped = step_cache.invalidate(data_version=previous_version)
+            print(f"♻️ Advertiser data changed ({previous_version} → {data_version}); dropped {dropped} cached steps")
+        return data_version
+    
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Everything needed to resume this workflow in another process"""
+        return {
+            "current_step": self.current_step.value,
+            "campaign_context": self.campaign_context,
+            "brief": self.brief,
+            "step_results": {step.value: result for step, result in self.step_results.items()},
+            "campaign_parameters": self.campaign_parameters,
+            "advertiser_preferences": self.advertiser_preferences,
+            "audience_analysis": self.audience_analysis,
+            "campaign_structure": self.campaign_structure,
+            "pricing_grid": self.pricing_grid,
+            "step_inputs": {step.value: inputs for step, inputs in self._step_inputs.items()},
+            "audience_version": self._audience_version,
+            "preference_overrides": self._preference_overrides,
+            "precomputed": {step.value: result for step, result in self._precomputed.items()},
+            "last_advance_time": self._last_advance_time
+        }
+    
+    def restore_state(self, state: Dict[str, Any], version: int):
+        """Load a snapshot saved by snapshot_state (possibly by another worker)"""
+        with self._lock:
+            self._cancel_speculation()
+            self.current_step = WorkflowStep(state["current_step"])
+            self.campaign_context = state["campaign_context"]
+            self.brief = state.get("brief")
+            self.step_results = {WorkflowStep(step): result for step, result in state.get("step_results", {}).items()}
+            self.campaign_parameters = state["campaign_parameters"]
+            self.advertiser_preferences = state["advertiser_preferences"]
+            self.audience_analysis = state["audience_analysis"]
+            self.campaign_structure = state["campaign_structure"]
+            self.pricing_grid = state["pricing_grid"]
+            self._step_inputs = {WorkflowStep(step): inputs for step, inputs in state["step_inputs"].items()}
+            self._audience_version = state["audience_version"]
+            self._preference_overrides = state["preference_overrides"]
+            self._precomputed = {WorkflowStep(step): result for step, result in state["precomputed"].items()}
+            self._last_advance_time = state["last_advance_time"]
+            self.state_version = version
+    
     def get_current_status(self) -> Dict[str, Any]:
         """Get current orchestrator status"""
         
@@ -385,19 +935,28 @@ class MultiAgentOrchestrator:
             "current_step": step_mapping[self.current_step],
             "progress": progress_mapping[self.current_step],
             "avatar_state": "complete" if self.current_step == WorkflowStep.COMPLETE else "thinking",
-            "processing": self._processing
+            "processing": self._processing,
+            "precomputed_steps": [step.value for step in self._precomputed],
+            "speculating": self._speculative_step.value if self._speculative_step else None
         }
     
     def reset_workflow(self):
         """Reset workflow to initial state"""
         with self._lock:
             print("🔄 Resetting workflow to initial state")
+            self._cancel_speculation()
+            self._precomputed = {}
             self.current_step = WorkflowStep.CAMPAIGN_DATA
             self.campaign_context = {}
+            self.brief = None
+            self.step_results = {}
             self.campaign_parameters = None
             self.advertiser_preferences = None
             self.audience_analysis = None
             self.campaign_structure = None
+            self.pricing_grid = None
+            self._step_inputs = {}
+            self._preference_overrides = {}
             self._processing = False
             self._last_advance_time = 0
             print("✅ Workflow reset complete") 
\ No newline at end of file
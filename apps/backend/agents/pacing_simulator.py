@@ -0,0 +1,157 @@
+"""
+Pacing Simulator - Day-by-Day Delivery Projection for Campaign Structures
+Neural Ads - Connected TV Advertising Platform
+"""
+
+from typing import Dict, Any, List
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+
+from .lineitem_generator import CampaignStructure
+
+PACING_MODES = ("even", "asap")
+
+# Lines that finish with more than this share of the flight left count as exhausting early
+EARLY_EXHAUSTION_THRESHOLD = 0.1
+
+@dataclass
+class PacingReport:
+    dates: List[date]
+    line_names: List[str]
+    spend: np.ndarray  # days x line items
+    impressions: np.ndarray  # days x line items
+    budgets: np.ndarray
+    exhaustion_day: np.ndarray  # -1 when the line never fully spends
+    pacing: str
+
+    @property
+    def delivered(self) -> np.ndarray:
+        return self.spend.sum(axis=0)
+
+    @property
+    def shortfall(self) -> np.ndarray:
+        return np.maximum(self.budgets - self.delivered, 0.0)
+
+    def flags(self) -> List[Dict[str, Any]]:
+        """Line items that cannot spend their budget or finish well before the flight ends"""
+        flagged = []
+        days = len(self.dates)
+        shortfall = self.shortfall
+        days_dark = days - 1 - self.exhaustion_day
+
+        for i in np.flatnonzero(shortfall >= 0.01):
+            flagged.append({
+                "line_item": self.line_names[i],
+                "issue": "underdelivery",
+                "budget": round(float(self.budgets[i]), 2),
+                "projected_spend": round(float(self.delivered[i]), 2),
+                "shortfall": round(float(shortfall[i]), 2)
+            })
+
+        early = (self.exhaustion_day >= 0) & (self.budgets > 0) & (days_dark > days * EARLY_EXHAUSTION_THRESHOLD)
+        for i in np.flatnonzero(early):
+            flagged.append({
+                "line_item": self.line_names[i],
+                "issue": "exhausts_early",
+                "exhaustion_date": self.dates[int(self.exhaustion_day[i])].isoformat(),
+                "days_dark": int(days_dark[i])
+            })
+
+        return flagged
+
+    def daily_curve(self) -> List[Dict[str, Any]]:
+        """Campaign-level delivery per flight day"""
+        daily_spend = self.spend.sum(axis=1)
+        daily_impressions = self.impressions.sum(axis=1)
+        cumulative = np.cumsum(daily_spend)
+        return [
+            {
+                "date": day.isoformat(),
+                "spend": round(float(daily_spend[i]), 2),
+                "impressions": int(daily_impressions[i]),
+                "cumulative_spend": round(float(cumulative[i]), 2)
+            }
+            for i, day in enumerate(self.dates)
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        flags = self.flags()
+        total_budget = float(self.budgets.sum())
+        delivered = float(self.delivered.sum())
+        return {
+            "pacing": self.pacing,
+            "flight_start": self.dates[0].isoformat() if self.dates else None,
+            "flight_end": self.dates[-1].isoformat() if self.dates else None,
+            "flight_days": len(self.dates),
+            "projected_spend": round(delivered, 2),
+            "delivery_rate": round(delivered / total_budget, 4) if total_budget else 0.0,
+            "underdelivering_lines": sum(1 for flag in flags if flag["issue"] == "underdelivery"),
+            "early_exhaustion_lines": sum(1 for flag in flags if flag["issue"] == "exhausts_early"),
+            "flags": flags
+        }
+
+def simulate_pacing(structure: CampaignStructure,
+                    start_date: date,
+                    end_date: date,
+                    pacing: str = "even") -> PacingReport:
+    """
+    Project daily spend for every line item across the flight
+
+    "even" pacing targets remaining budget / remaining days each day (so
+    it catches up after capped days); "asap" spends up to the daily cap
+    until the budget is gone. Both are bounded by daily_cap.
+    """
+    if pacing not in PACING_MODES:
+        raise ValueError(f"Unknown pacing mode: {pacing}")
+
+    days = max((end_date - start_date).days + 1, 1)
+    dates = [start_date + timedelta(days=i) for i in range(days)]
+    line_items = structure.line_items
+
+    budgets = np.array([float(item.budget) for item in line_items], dtype=float)
+    caps = np.array([float(item.daily_cap) for item in line_items], dtype=float)
+    cpms = np.maximum(np.array([float(item.bid_cpm) for item in line_items], dtype=float), 0.01)
+
+    spend = np.zeros((days, len(line_items)), dtype=float)
+    remaining = budgets.copy()
+    for day in range(days):
+        if pacing == "even":
+            target = remaining / (days - day)
+        else:
+            target = remaining
+        spend[day] = np.minimum(target, caps)
+        remaining -= spend[day]
+
+    # Treat sub-cent leftovers as fully spent
+    cumulative = np.cumsum(spend, axis=0)
+    spent_out = cumulative >= (budgets - 0.005)
+    exhaustion_day = np.where(spent_out.any(axis=0), spent_out.argmax(axis=0), -1)
+
+    return PacingReport(
+        dates=dates,
+        line_names=[item.name for item in line_items],
+        spend=spend,
+        impressions=spend * 1000.0 / cpms,
+        budgets=budgets,
+        exhaustion_day=exhaustion_day,
+        pacing=pacing
+    )
+
+def pacing_check(structure: CampaignStructure,
+                 start_date: date,
+                 end_date: date,
+                 pacing: str = "even") -> Dict[str, Any]:
+    """
+    Summary and daily delivery curve for the pacing the plan is trafficked
+    with, plus the same for every other mode, so the plan shows both its
+    own projection and what goes wrong if a line is trafficked differently
+    """
+    reports = {mode: simulate_pacing(structure, start_date, end_date, mode) for mode in PACING_MODES}
+    check = {**reports[pacing].summary(), "daily_curve": reports[pacing].daily_curve()}
+    check["alternatives"] = {
+        mode: {**report.summary(), "daily_curve": report.daily_curve()}
+        for mode, report in reports.items() if mode != pacing
+    }
+    return check
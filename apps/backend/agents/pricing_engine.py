@@ -0,0 +1,220 @@
+"""
+Pricing Engine - CPM Floor Grid from Audience Pricing Intelligence
+Neural Ads - Connected TV Advertising Platform
+"""
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .audience_generation import AudienceAnalysis
+
+# Inventory pressure is a 0-1 utilization signal; 0.5 is treated as neutral
+NEUTRAL_INVENTORY_PRESSURE = 0.5
+INVENTORY_PRESSURE_SENSITIVITY = 0.2
+
+DEFAULT_CONTENT = ["Mixed Content"]
+DEFAULT_DEVICES = ["CTV", "Mobile", "Desktop"]
+DEFAULT_REGIONS = ["Nationwide"]
+
+
+def _resolve_multiplier(label: str, table: Dict[str, float]) -> float:
+    """Resolve a label against a multiplier table (exact, then keyword match)"""
+    if not table:
+        return 1.0
+
+    label_lower = str(label).lower()
+    lowered = {str(k).lower(): float(v) for k, v in table.items()}
+
+    if label_lower in lowered:
+        return lowered[label_lower]
+
+    # "Family Animation" picks up the "Animation" premium
+    matches = [v for k, v in lowered.items() if k and k in label_lower]
+    if matches:
+        return max(matches)
+
+    return 1.0
+
+
+def compute_yield_multiplier(yield_signals: Optional[Dict[str, float]]) -> float:
+    """Collapse yield management signals into one scalar CPM multiplier"""
+    signals = yield_signals or {}
+
+    pressure = float(signals.get("inventory_pressure", NEUTRAL_INVENTORY_PRESSURE))
+    multiplier = 1.0 + INVENTORY_PRESSURE_SENSITIVITY * (pressure - NEUTRAL_INVENTORY_PRESSURE)
+    multiplier *= float(signals.get("seasonal_adjustment", 1.0))
+    multiplier *= float(signals.get("advertiser_premium", 1.0))
+
+    return multiplier
+
+
+@dataclass
+class PricingGrid:
+    """
+    Dense segment x content x device x region CPM floor tensor
+
+    Known labels resolve through index maps, so every lookup is O(1)
+    regardless of how many line items are being priced.
+    """
+    segments: List[str]
+    content: List[str]
+    devices: List[str]
+    regions: List[str]
+    cpm: np.ndarray
+    yield_multiplier: float
+    base_cpms: Dict[str, float]
+    content_premiums: Dict[str, float] = field(default_factory=dict)
+    device_multipliers: Dict[str, float] = field(default_factory=dict)
+    regional_variance: Dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._segment_index = {name: i for i, name in enumerate(self.segments)}
+        self._content_index = {name: i for i, name in enumerate(self.content)}
+        self._device_index = {name: i for i, name in enumerate(self.devices)}
+        self._region_index = {name: i for i, name in enumerate(self.regions)}
+        self._default_base_cpm = float(np.mean(list(self.base_cpms.values()))) if self.base_cpms else 32.0
+
+    @property
+    def shape(self) -> Tuple[int, int, int, int]:
+        return self.cpm.shape
+
+    def floor_cpm(self, segment: str, content: str, device: str, region: str) -> float:
+        """Floor CPM for one combination; labels outside the grid are priced from the raw multipliers"""
+        try:
+            return float(self.cpm[
+                self._segment_index[segment],
+                self._content_index[content],
+                self._device_index[device],
+                self._region_index[region]
+            ])
+        except KeyError:
+            base = self.base_cpms.get(segment, self._default_base_cpm)
+            return float(
+                base
+                * _resolve_multiplier(content, self.content_premiums)
+                * _resolve_multiplier(device, self.device_multipliers)
+                * _resolve_multiplier(region, self.regional_variance)
+                * self.yield_multiplier
+            )
+
+    def floor_cpms(self,
+                   segments: Sequence[str],
+                   content: Sequence[str],
+                   devices: Sequence[str],
+                   regions: Sequence[str]) -> np.ndarray:
+        """Vectorized floor lookup for many combinations at once"""
+        if all(
+            label in index
+            for labels, index in (
+                (segments, self._segment_index),
+                (content, self._content_index),
+                (devices, self._device_index),
+                (regions, self._region_index),
+            )
+            for label in labels
+        ):
+            return self.cpm[
+                np.fromiter((self._segment_index[s] for s in segments), dtype=np.intp, count=len(segments)),
+                np.fromiter((self._content_index[c] for c in content), dtype=np.intp, count=len(content)),
+                np.fromiter((self._device_index[d] for d in devices), dtype=np.intp, count=len(devices)),
+                np.fromiter((self._region_index[r] for r in regions), dtype=np.intp, count=len(regions)),
+            ]
+
+        return np.array([
+            self.floor_cpm(s, c, d, r) for s, c, d, r in zip(segments, content, devices, regions)
+        ], dtype=float)
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact description of the grid for API responses"""
+        return {
+            "dimensions": {
+                "segments": len(self.segments),
+                "content": len(self.content),
+                "devices": len(self.devices),
+                "regions": len(self.regions)
+            },
+            "combinations": int(self.cpm.size),
+            "floor_cpm_min": round(float(self.cpm.min()), 2) if self.cpm.size else 0.0,
+            "floor_cpm_max": round(float(self.cpm.max()), 2) if self.cpm.size else 0.0,
+            "yield_multiplier": round(self.yield_multiplier, 4)
+        }
+
+
+def build_pricing_grid(analysis: AudienceAnalysis,
+                       content: Optional[List[str]] = None,
+                       devices: Optional[List[str]] = None,
+                       regions: Optional[List[str]] = None) -> PricingGrid:
+    """
+    Build the full CPM floor tensor in a single broadcast
+
+    Axes default to the labels present in the pricing insights so the grid
+    always covers every premium the audience agent produced.
+    """
+    insights = analysis.pricing_insights or {}
+    content_premiums = insights.get("content_premiums", {}) or {}
+    device_multipliers = insights.get("device_multipliers", {}) or {}
+    regional_variance = insights.get("regional_variance", {}) or {}
+
+    segments = [segment.name for segment in analysis.segments]
+    base_cpms = {segment.name: float(segment.cpm or 0.0) for segment in analysis.segments}
+
+    content = list(dict.fromkeys(content or list(content_premiums) or DEFAULT_CONTENT))
+    devices = list(dict.fromkeys(devices or list(device_multipliers) or DEFAULT_DEVICES))
+    regions = list(dict.fromkeys(regions or list(regional_variance) or DEFAULT_REGIONS))
+
+    segment_axis = np.array([base_cpms[name] for name in segments], dtype=float)
+    content_axis = np.array([_resolve_multiplier(c, content_premiums) for c in content], dtype=float)
+    device_axis = np.array([_resolve_multiplier(d, device_multipliers) for d in devices], dtype=float)
+    region_axis = np.array([_resolve_multiplier(r, regional_variance) for r in regions], dtype=float)
+
+    yield_multiplier = compute_yield_multiplier(analysis.yield_signals)
+
+    cpm = (
+        segment_axis[:, None, None, None]
+        * content_axis[None, :, None, None]
+        * device_axis[None, None, :, None]
+        * region_axis[None, None, None, :]
+        * yield_multiplier
+    )
+
+    return PricingGrid(
+        segments=segments,
+        content=content,
+        devices=devices,
+        regions=regions,
+        cpm=cpm,
+        yield_multiplier=yield_multiplier,
+        base_cpms=base_cpms,
+        content_premiums=dict(content_premiums),
+        device_multipliers=dict(device_multipliers),
+        regional_variance=dict(regional_variance)
+    )
+
+
+def apply_floor_prices(line_items: List[Any], grid: PricingGrid) -> int:
+    """
+    Raise each line item's bid_cpm to at least its grid floor
+
+    Returns the number of line items whose bid was adjusted.
+    """
+    if not line_items:
+        return 0
+
+    floors = grid.floor_cpms(
+        [item.audience for item in line_items],
+        [item.content for item in line_items],
+        [item.device for item in line_items],
+        [item.geo for item in line_items]
+    )
+    bids = np.array([float(item.bid_cpm) for item in line_items], dtype=float)
+    priced = np.round(np.maximum(bids, floors), 2)
+
+    adjusted = 0
+    for item, bid, new_bid in zip(line_items, bids, priced):
+        if new_bid != bid:
+            item.bid_cpm = float(new_bid)
+            adjusted += 1
+
+    return adjusted
@@ -0,0 +1,218 @@
+"""
+Reach Simulator - Monte Carlo Reach/Frequency Curves for Campaign Structures
+Neural Ads - Connected TV Advertising Platform
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass
+
+import numpy as np
+
+from .lineitem_generator import CampaignStructure, frequency_cap_per_day
+from .compute_pool import compute_pool
+
+DEFAULT_PANEL_HOUSEHOLDS = 1_000_000
+DEFAULT_UNIVERSE_HOUSEHOLDS = 90_000_000
+DEFAULT_BATCH_HOUSEHOLDS = 50_000
+DEFAULT_EFFECTIVE_FREQUENCY = 3
+DEFAULT_CURVE_POINTS = 10
+
+# Frequency histogram buckets; the last bucket collects everything at or above it
+MAX_FREQUENCY_BUCKET = 20
+
+@dataclass
+class ReachReport:
+    panel_households: int
+    universe_households: int
+    effective_frequency: int
+    seed: int
+    frequency_histogram: np.ndarray  # households by exposure count, last bucket is MAX+
+    curve_budget_fractions: np.ndarray
+    curve_reach: np.ndarray  # reached share of universe at each budget fraction
+    curve_effective_reach: np.ndarray
+    impressions: float
+
+    @property
+    def reach(self) -> float:
+        return float(self.curve_reach[-1])
+
+    @property
+    def effective_reach(self) -> float:
+        return float(self.curve_effective_reach[-1])
+
+    @property
+    def average_frequency(self) -> float:
+        exposures = np.arange(len(self.frequency_histogram))
+        reached = self.frequency_histogram[1:].sum()
+        return float((exposures * self.frequency_histogram).sum() / reached) if reached else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "panel_households": self.panel_households,
+            "universe_households": self.universe_households,
+            "seed": self.seed,
+            "reach_pct": round(self.reach * 100, 2),
+            "reach_households": int(self.reach * self.universe_households),
+            "effective_frequency": self.effective_frequency,
+            "effective_reach_pct": round(self.effective_reach * 100, 2),
+            "effective_reach_households": int(self.effective_reach * self.universe_households),
+            "average_frequency": round(self.average_frequency, 2),
+            "frequency_distribution": {
+                (f"{i}+" if i == len(self.frequency_histogram) - 1 else str(i)):
+                    round(float(count) / self.panel_households, 6)
+                for i, count in enumerate(self.frequency_histogram)
+            },
+            "reach_curve": [
+                {
+                    "budget_fraction": round(float(fraction), 4),
+                    "reach_pct": round(float(reach) * 100, 2),
+                    "effective_reach_pct": round(float(effective) * 100, 2)
+                }
+                for fraction, reach, effective in zip(
+                    self.curve_budget_fractions, self.curve_reach, self.curve_effective_reach
+                )
+            ]
+        }
+
+def _estimate_universe(segments: List[Dict[str, Any]]) -> int:
+    """Infer the household universe from segment scale and reach percentages"""
+    estimates = [
+        float(seg["scale"]) / (float(seg["reach"]) / 100.0)
+        for seg in segments
+        if seg.get("scale") and seg.get("reach") and float(seg["reach"]) > 0
+    ]
+    if not estimates:
+        return DEFAULT_UNIVERSE_HOUSEHOLDS
+    return int(max(np.median(estimates), max(float(seg.get("scale") or 0) for seg in segments)))
+
+def _simulate_batch(task: Tuple) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Simulate one batch of panel households
+
+    Module-level so it can be shipped to pool workers. Only eligible
+    households are drawn for each line, so work scales with targeted
+    households rather than panel size x line items. Returns the frequency
+    histogram plus reached / effectively reached counts at each curve
+    fraction.
+    """
+    (batch_households, seed_sequence, membership_probability, line_segment, line_share,
+     line_lambda, line_cap, fractions, effective_frequency) = task
+
+    rng = np.random.default_rng(seed_sequence)
+    members = [
+        np.flatnonzero(rng.random(batch_households) < probability)
+        for probability in membership_probability
+    ]
+
+    # One exposure counter per curve point; the last point is the full budget
+    frequency = np.zeros((len(fractions), batch_households), dtype=np.int32)
+    for segment, share, lam, cap in zip(line_segment, line_share, line_lambda, line_cap):
+        candidates = members[segment]
+        eligible = candidates[rng.random(len(candidates)) < share]
+        draws = rng.poisson(lam, size=len(eligible))
+        exposed = draws > 0
+        eligible, draws = eligible[exposed], draws[exposed]
+        if not len(eligible):
+            continue
+
+        # Binomial thinning of Poisson draws gives exposures at a smaller budget
+        for i, fraction in enumerate(fractions):
+            thinned = draws if fraction >= 1.0 else rng.binomial(draws, fraction)
+            frequency[i, eligible] += np.minimum(thinned, cap).astype(np.int32)
+
+    histogram = np.bincount(
+        np.minimum(frequency[-1], MAX_FREQUENCY_BUCKET), minlength=MAX_FREQUENCY_BUCKET + 1
+    ).astype(np.int64)
+    reached = (frequency >= 1).sum(axis=1).astype(np.int64)
+    effective = (frequency >= effective_frequency).sum(axis=1).astype(np.int64)
+
+    return histogram, reached, effective
+
+def simulate_reach(structure: CampaignStructure,
+                   segments: List[Dict[str, Any]],
+                   flight_days: int,
+                   panel_households: int = DEFAULT_PANEL_HOUSEHOLDS,
+                   universe_households: Optional[int] = None,
+                   seed: int = 0,
+                   workers: Optional[int] = None,
+                   batch_households: int = DEFAULT_BATCH_HOUSEHOLDS,
+                   effective_frequency: int = DEFAULT_EFFECTIVE_FREQUENCY,
+                   curve_points: int = DEFAULT_CURVE_POINTS) -> ReachReport:
+    """
+    Monte Carlo reach and frequency for a campaign structure
+
+    A synthetic panel of households is assigned to audience segments in
+    proportion to segment scale, each line item's impressions are spread
+    over its eligible households as Poisson exposures, and exposures are
+    clipped at the line's frequency cap for the flight. Batches get their
+    own child seed, so results depend only on `seed` - not on how many
+    workers ran them.
+    """
+    line_items = structure.line_items
+    flight_days = max(int(flight_days), 1)
+    segment_names = [seg["name"] for seg in segments if seg.get("name")]
+    segment_scale = {seg["name"]: float(seg.get("scale") or 0) for seg in segments if seg.get("name")}
+    universe = int(universe_households or _estimate_universe(segments))
+
+    # Line items on audiences we have no segment for get their own pseudo-segment
+    for item in line_items:
+        if item.audience not in segment_scale:
+            segment_names.append(item.audience)
+            segment_scale[item.audience] = float(item.targeting_criteria.get("estimated_households") or 0)
+
+    segment_index = {name: i for i, name in enumerate(segment_names)}
+    lines_per_segment: Dict[str, int] = {}
+    for item in line_items:
+        lines_per_segment[item.audience] = lines_per_segment.get(item.audience, 0) + 1
+
+    membership_probability = np.clip(
+        np.array([segment_scale[name] for name in segment_names], dtype=float) / universe, 0.0, 1.0
+    )
+    line_segment = np.array([segment_index[item.audience] for item in line_items], dtype=np.intp)
+    impressions = np.array([
+        float(item.budget) * 1000.0 / max(float(item.bid_cpm), 0.01) for item in line_items
+    ], dtype=float)
+    pool = np.array([
+        float(item.targeting_criteria.get("estimated_households")
+              or segment_scale[item.audience] / lines_per_segment[item.audience])
+        for item in line_items
+    ], dtype=float)
+    segment_size = np.array([segment_scale[item.audience] for item in line_items], dtype=float)
+    line_share = np.clip(np.divide(pool, segment_size, out=np.ones_like(pool), where=segment_size > 0), 0.0, 1.0)
+    line_lambda = np.divide(impressions, pool, out=np.zeros_like(pool), where=pool > 0)
+    line_cap = np.ceil(np.array([
+        frequency_cap_per_day(item.frequency_cap) for item in line_items
+    ], dtype=float) * flight_days).astype(np.int64)
+
+    fractions = np.linspace(1.0 / curve_points, 1.0, curve_points)
+
+    seeds = np.random.SeedSequence(seed).spawn(int(np.ceil(panel_households / batch_households)))
+    tasks = [
+        (min(batch_households, panel_households - i * batch_households), child,
+         membership_probability, line_segment, line_share, line_lambda, line_cap,
+         fractions, effective_frequency)
+        for i, child in enumerate(seeds)
+    ]
+
+    # Batches go to the shared compute pool; workers=1 runs them in the calling thread
+    workers = workers if workers is not None else compute_pool.workers
+    if workers > 1 and len(tasks) > 1 and len(line_items):
+        results = compute_pool.map(_simulate_batch, tasks)
+    else:
+        results = [_simulate_batch(task) for task in tasks]
+
+    histogram = sum(result[0] for result in results)
+    reached = sum(result[1] for result in results)
+    effective = sum(result[2] for result in results)
+
+    return ReachReport(
+        panel_households=panel_households,
+        universe_households=universe,
+        effective_frequency=effective_frequency,
+        seed=seed,
+        frequency_histogram=histogram,
+        curve_budget_fractions=fractions,
+        curve_reach=reached / panel_households,
+        curve_effective_reach=effective / panel_households,
+        impressions=float(impressions.sum())
+    )
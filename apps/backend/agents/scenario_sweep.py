@@ -0,0 +1,113 @@
+"""
+Scenario Sweep - Parallel Budget/Objective/Flight What-If Planning
+Neural Ads - Connected TV Advertising Platform
+"""
+
+import itertools
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass
+
+from .campaign_parser import parse_flight_window
+from .advertiser_preferences import AdvertiserPreferences
+from .audience_generation import AudienceAnalysis
+from .pricing_engine import PricingGrid, apply_floor_prices
+from .lineitem_builder import build_line_items, DEFAULT_DEVICE_SHARES
+from .budget_allocator import allocate_campaign_budget, allocation_objective
+from .pacing_simulator import simulate_pacing
+from .compute_pool import compute_pool
+
+SCENARIO_FIELDS = ("budget", "objective", "timeline")
+
+@dataclass
+class ScenarioBase:
+    """Steps 1-3 results shared by every variant; only step 4 is re-run"""
+    advertiser: str
+    budget: float
+    objective: str
+    timeline: str
+    preferences: AdvertiserPreferences
+    audience_analysis: AudienceAnalysis
+    pricing_grid: PricingGrid
+
+def expand_scenario_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Cartesian product of override values, e.g. {"budget": [250000, 500000], "objective": [...]}"""
+    unknown = set(grid) - set(SCENARIO_FIELDS)
+    if unknown:
+        raise ValueError(f"Unsupported scenario overrides: {', '.join(sorted(unknown))}")
+
+    keys = [key for key in SCENARIO_FIELDS if grid.get(key)]
+    if not keys:
+        return [{}]
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+def _run_scenario(task: Tuple[ScenarioBase, Dict[str, Any]]) -> Dict[str, Any]:
+    """Plan one variant; module-level so it can run in a pool worker"""
+    base, overrides = task
+    budget = float(overrides.get("budget", base.budget))
+    objective = str(overrides.get("objective", base.objective))
+    timeline = str(overrides.get("timeline", base.timeline))
+
+    preferences_dict = {
+        "content_preferences": base.preferences.content_preferences,
+        "geo_preferences": base.preferences.geo_preferences,
+        "device_preferences": base.preferences.device_preferences
+    }
+    audience_segments = [
+        {"name": segment.name, "cpm": segment.cpm, "scale": segment.scale, "reach": segment.reach}
+        for segment in base.audience_analysis.segments
+    ]
+
+    structure = build_line_items(
+        base.advertiser,
+        budget,
+        preferences_dict,
+        audience_segments,
+        pricing_grid=base.pricing_grid,
+        objective=objective
+    )
+    apply_floor_prices(structure.line_items, base.pricing_grid)
+
+    flight_start, flight_end = parse_flight_window(timeline)
+    allocation = allocate_campaign_budget(
+        structure,
+        (flight_end - flight_start).days + 1,
+        device_mix=DEFAULT_DEVICE_SHARES,
+        segment_scale={segment["name"]: segment["scale"] for segment in audience_segments},
+        objective=allocation_objective(objective)
+    )
+    pacing = simulate_pacing(structure, flight_start, flight_end).summary()
+    impressions = int(allocation.impressions.sum())
+
+    return {
+        "overrides": overrides,
+        "budget": budget,
+        "objective": objective,
+        "timeline": timeline,
+        "flight_days": pacing["flight_days"],
+        "line_items": structure.total_line_items,
+        "allocated": round(allocation.allocated, 2),
+        "unallocated": round(allocation.unallocated, 2),
+        "estimated_impressions": impressions,
+        "estimated_reach": int(allocation.reach.sum()),
+        "effective_cpm": round(allocation.allocated * 1000.0 / impressions, 2) if impressions else 0.0,
+        "budget_allocation": structure.budget_allocation,
+        "delivery_rate": pacing["delivery_rate"],
+        "pacing_flags": len(pacing["flags"])
+    }
+
+def run_scenarios(base: ScenarioBase,
+                  variants: List[Dict[str, Any]],
+                  workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Plan every variant against the shared base and return one comparison row each
+
+    Variants fan out across the shared compute pool (workers=1 plans them
+    in the calling thread); rows come back in variant order.
+    """
+    tasks = [(base, variant) for variant in variants]
+    workers = workers if workers is not None else compute_pool.workers
+
+    if workers > 1 and len(tasks) > 1:
+        return compute_pool.map(_run_scenario, tasks)
+
+    return [_run_scenario(task) for task in tasks]
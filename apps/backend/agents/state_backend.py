@@ -0,0 +1,263 @@
+"""
+State Backend - Persistent Per-Session Workflow State
+Neural Ads - Connected TV Advertising Platform
+"""
+
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from dataclasses import dataclass
+
+DEFAULT_SESSION = "default"
+DEFAULT_STATE_DB = os.path.join(os.path.dirname(__file__), "..", "data", "state", "workflow.db")
+
+# Orchestrators kept warm per worker process; evicted ones reload from the backend
+MAX_CACHED_SESSIONS = 64
+
+class StaleStateError(Exception):
+    """The session was saved by another request or worker since it was loaded"""
+
+@dataclass
+class SessionState:
+    session_id: str
+    version: int
+    state: Dict[str, Any]
+    updated_at: float
+
+def serialize_state(state: Dict[str, Any]) -> bytes:
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+class StateBackend(ABC):
+    """
+    Versioned key-value store for workflow state
+
+    save() is a compare-and-set on the version: it only succeeds if the
+    stored version still equals the one the caller loaded. Version 0 means
+    "not stored yet". It takes the already-serialized state, so the caller
+    snapshots and pickles on its own thread and only the write runs here.
+    """
+
+    @abstractmethod
+    def version(self, session_id: str) -> int:
+        ...
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[SessionState]:
+        ...
+
+    @abstractmethod
+    def save(self, session_id: str, payload: bytes, expected_version: int) -> int:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        ...
+
+    @abstractmethod
+    def sessions(self) -> List[Dict[str, Any]]:
+        ...
+
+class MemoryStateBackend(StateBackend):
+    """Single-process backend; state is lost on restart"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # session_id -> (version, pickled state, updated_at)
+        self._states: Dict[str, Tuple[int, bytes, float]] = {}
+
+    def version(self, session_id: str) -> int:
+        stored = self._states.get(session_id)
+        return stored[0] if stored else 0
+
+    def load(self, session_id: str) -> Optional[SessionState]:
+        stored = self._states.get(session_id)
+        if stored is None:
+            return None
+        version, payload, updated_at = stored
+        return SessionState(session_id, version, pickle.loads(payload), updated_at)
+
+    def save(self, session_id: str, payload: bytes, expected_version: int) -> int:
+        with self._lock:
+            if self.version(session_id) != expected_version:
+                raise StaleStateError(f"Session {session_id} changed since version {expected_version}")
+            version = expected_version + 1
+            self._states[session_id] = (version, payload, time.time())
+            return version
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        return [
+            {"session_id": session_id, "version": version, "updated_at": updated_at}
+            for session_id, (version, _, updated_at) in self._states.items()
+        ]
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Local SQLite store in WAL mode
+
+    WAL lets every uvicorn worker read while one writes; versions are
+    bumped with a conditional UPDATE, so concurrent writers can't both win.
+    State is pickled - the database is only ever written by this service.
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_DB):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_sessions (
+                session_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                state BLOB NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads; one per thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def version(self, session_id: str) -> int:
+        row = self._connection().execute(
+            "SELECT version FROM workflow_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def load(self, session_id: str) -> Optional[SessionState]:
+        row = self._connection().execute(
+            "SELECT version, state, updated_at FROM workflow_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return SessionState(session_id, row[0], pickle.loads(row[1]), row[2])
+
+    def save(self, session_id: str, payload: bytes, expected_version: int) -> int:
+        connection = self._connection()
+        version = expected_version + 1
+
+        with connection:
+            if expected_version == 0:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO workflow_sessions (session_id, version, state, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (session_id, version, payload, time.time())
+                )
+            else:
+                cursor = connection.execute(
+                    "UPDATE workflow_sessions SET version = ?, state = ?, updated_at = ? "
+                    "WHERE session_id = ? AND version = ?",
+                    (version, payload, time.time(), session_id, expected_version)
+                )
+        if cursor.rowcount != 1:
+            raise StaleStateError(f"Session {session_id} changed since version {expected_version}")
+        return version
+
+    def delete(self, session_id: str):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM workflow_sessions WHERE session_id = ?", (session_id,))
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT session_id, version, updated_at FROM workflow_sessions ORDER BY updated_at DESC"
+        ).fetchall()
+        return [{"session_id": row[0], "version": row[1], "updated_at": row[2]} for row in rows]
+
+def create_state_backend() -> StateBackend:
+    """Backend chosen by STATE_BACKEND ("sqlite" or "memory")"""
+    kind = os.getenv("STATE_BACKEND", "sqlite").lower()
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend(os.getenv("STATE_DB_PATH", DEFAULT_STATE_DB))
+    raise ValueError(f"Unknown state backend: {kind}")
+
+class WorkflowSessions:
+    """
+    Per-session orchestrators backed by a StateBackend
+
+    Each worker keeps recently used orchestrators in memory (so agents,
+    LLM clients and background speculation survive between requests) and
+    reloads a session only when another worker has saved a newer version.
+    """
+
+    def __init__(self,
+                 backend: StateBackend,
+                 factory: Callable[[], Any],
+                 max_cached: int = MAX_CACHED_SESSIONS):
+        self.backend = backend
+        self.factory = factory
+        self.max_cached = max_cached
+        self._orchestrators: "OrderedDict[str, Any]" = OrderedDict()
+
+    async def checkout(self, session_id: str = DEFAULT_SESSION):
+        """Orchestrator for a session, refreshed from the backend if it's behind"""
+        orchestrator = self._orchestrators.get(session_id)
+        stored_version = await asyncio.to_thread(self.backend.version, session_id)
+
+        if orchestrator is None or orchestrator.state_version != stored_version:
+            stored = await asyncio.to_thread(self.backend.load, session_id) if stored_version else None
+            if orchestrator is None:
+                orchestrator = self.factory()
+            if stored is not None:
+                orchestrator.restore_state(stored.state, stored.version)
+            elif orchestrator.state_version:
+                # Deleted elsewhere (reset on another worker)
+                orchestrator.reset_workflow()
+                orchestrator.state_version = 0
+
+        self._orchestrators[session_id] = orchestrator
+        self._orchestrators.move_to_end(session_id)
+        while len(self._orchestrators) > self.max_cached:
+            # Dropped, not reset: its state is already saved and the
+            # instance may still be serving an in-flight request
+            _, evicted = self._orchestrators.popitem(last=False)
+            evicted.release()
+        return orchestrator
+
+    async def commit(self, session_id: str, orchestrator) -> int:
+        """Persist the orchestrator's state; raises StaleStateError on a lost race"""
+        # Snapshot and pickle on the loop, where nothing else can mutate the
+        # orchestrator mid-copy; only the bytes go to the worker thread
+        payload = serialize_state(orchestrator.snapshot_state())
+        version = await asyncio.to_thread(
+            self.backend.save, session_id, payload, orchestrator.state_version
+        )
+        orchestrator.state_version = version
+        return version
+
+    def invalidate_caches(self, snapshot=None, skip=None) -> int:
+        """
+        Point every warm orchestrator in this worker except `skip` (typically
+        the one that triggered the reload) at the already reloaded `snapshot`
+        and drop their data-derived caches; returns how many were refreshed
+        """
+        refreshed = 0
+        for orchestrator in list(self._orchestrators.values()):
+            if orchestrator is not skip:
+                orchestrator.reload_data(snapshot)
+                refreshed += 1
+        return refreshed
+
+    async def discard(self, session_id: str):
+        await asyncio.to_thread(self.backend.delete, session_id)
+        orchestrator = self._orchestrators.get(session_id)
+        if orchestrator is not None:
+            orchestrator.state_version = 0
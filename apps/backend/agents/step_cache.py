@@ -0,0 +1,114 @@
+"""
+Step Cache - Cross-Session Memoization of Workflow Step Results
+Neural Ads - Connected TV Advertising Platform
+"""
+
+import copy
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Optional, Tuple
+from dataclasses import dataclass
+
+DEFAULT_MAX_ENTRIES = 512
+
+# Entries expire so results produced while the LLM was unavailable don't stick around
+DEFAULT_TTL_SECONDS = 3600
+
+# Budgets within the same ~25% band share audience results
+BUDGET_BUCKET_RATIO = 1.25
+
+def budget_bucket(budget: float) -> int:
+    """Geometric bucket index for a budget"""
+    return int(math.floor(math.log(max(float(budget), 1.0)) / math.log(BUDGET_BUCKET_RATIO)))
+
+def normalize_input(value: Any) -> Hashable:
+    """Case/whitespace-insensitive strings and hashable sequences, so equivalent inputs share a key"""
+    if isinstance(value, str):
+        return re.sub(r'\s+', ' ', value).strip().casefold()
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_input(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), normalize_input(item)) for key, item in value.items()))
+    return value
+
+@dataclass
+class _Entry:
+    value: Any
+    data_version: str
+    created_at: float
+
+class StepCache:
+    """
+    LRU + TTL cache of agent outputs shared by every session in a worker
+
+    Keys are (step, data snapshot version, normalized inputs). Values are
+    deep-copied in and out, because sessions mutate their step results
+    (edits overwrite preference lists in place).
+    """
+
+    def __init__(self,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(step: str, data_version: str, **inputs: Any) -> Tuple:
+        return (step, data_version, normalize_input(inputs))
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry.created_at > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry.value
+        return copy.deepcopy(value)
+
+    def put(self, key: Tuple, value: Any):
+        entry = _Entry(copy.deepcopy(value), key[1], time.time())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, data_version: Optional[str] = None, step: Optional[str] = None) -> int:
+        """Drop entries for a data version and/or step; everything when called bare"""
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if (data_version is None or entry.data_version == data_version)
+                and (step is None or key[0] == step)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+step_cache = StepCache(
+    max_entries=int(os.getenv("STEP_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+    ttl_seconds=float(os.getenv("STEP_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+)
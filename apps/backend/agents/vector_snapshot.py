@@ -0,0 +1,281 @@
+"""
+Vector Snapshot - Shared Read-Only Advertiser Feature Matrix
+Neural Ads - Connected TV Advertising Platform
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Mapping
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from dataclasses import dataclass
+
+import numpy as np
+
+_DATABASE_PATHS = (
+    os.path.join(os.path.dirname(__file__), "../advertiser_vector_database_full.json"),
+    os.path.join(os.path.dirname(__file__), "../../advertiser_vector_database_full.json")
+)
+
+# tmpfs pages are shared by every process that maps the file; fall back to local disk
+_SHM_DIR = "/dev/shm"
+DEFAULT_SNAPSHOT_DIR = (
+    os.path.join(_SHM_DIR, "neural_ads_vectors") if os.path.isdir(_SHM_DIR)
+    else os.path.join(os.path.dirname(__file__), "..", "data", "snapshots")
+)
+
+# float64 keeps values identical to the JSON source
+MATRIX_DTYPE = np.float64
+
+FEATURE_PREFIXES = ("genre", "channel", "network", "zip")
+
+def locate_database() -> str:
+    for db_path in _DATABASE_PATHS:
+        if os.path.exists(db_path):
+            return os.path.abspath(db_path)
+    raise FileNotFoundError("advertiser_vector_database_full.json not found")
+
+class FeatureVector(Mapping):
+    """
+    Dict-like view of one advertiser row (feature name -> weight)
+
+    Values are read straight from the shared matrix; nothing is copied
+    until a caller asks for a concrete value.
+    """
+
+    def __init__(self, snapshot: "VectorSnapshot", row: int):
+        self._snapshot = snapshot
+        self._values = snapshot.matrix[row]
+
+    def __getitem__(self, feature: str) -> float:
+        return float(self._values[self._snapshot.feature_index[feature]])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.vocabulary)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.vocabulary)
+
+    def __contains__(self, feature: object) -> bool:
+        return feature in self._snapshot.feature_index
+
+    def top(self, prefix: str, top_n: int) -> List[Tuple[str, float]]:
+        """Highest positive weights for a feature prefix, ties in vocabulary order"""
+        start, end = self._snapshot.prefix_spans.get(prefix, (0, 0))
+        values = self._values[start:end]
+        order = np.argsort(-values, kind="stable")
+        return [
+            (self._snapshot.vocabulary[start + column], float(values[column]))
+            for column in order[:top_n] if values[column] > 0
+        ]
+
+@dataclass
+class VectorSnapshot:
+    """
+    Advertisers x features matrix plus the lookups derived from it
+
+    The vocabulary is grouped by prefix (genre, channel, network, zip), so
+    each prefix is a contiguous column span and per-prefix rankings are a
+    slice of a row rather than a scan over every feature.
+    """
+    version: str
+    ids: Tuple[str, ...]
+    advertisers: Tuple[str, ...]
+    total_counts: Tuple[int, ...]
+    vocabulary: Tuple[str, ...]
+    prefix_spans: Dict[str, Tuple[int, int]]
+    matrix: np.ndarray
+    shared: bool = False
+
+    def __post_init__(self):
+        self.feature_index = {feature: column for column, feature in enumerate(self.vocabulary)}
+        self._by_name = {name.lower(): row for row, name in enumerate(self.advertisers)}
+
+    def find(self, advertiser_name: str) -> Optional[int]:
+        """Row for an advertiser: exact, then partial, then reverse partial match"""
+        advertiser_lower = advertiser_name.lower()
+        if advertiser_lower in self._by_name:
+            return self._by_name[advertiser_lower]
+        for name, row in self._by_name.items():
+            if advertiser_lower in name:
+                return row
+        for name, row in self._by_name.items():
+            if name in advertiser_lower:
+                return row
+        return None
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Row in the database's record shape ({'id', 'metadata', 'vector'})"""
+        return {
+            "id": self.ids[row],
+            "metadata": {"advertiser": self.advertisers[row], "total_count": self.total_counts[row]},
+            "vector": FeatureVector(self, row)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "advertisers": len(self.advertisers),
+            "features": len(self.vocabulary),
+            "matrix_bytes": int(self.matrix.nbytes),
+            "shared": self.shared
+        }
+
+def build_snapshot(raw: bytes) -> VectorSnapshot:
+    """Dense snapshot from the JSON database bytes"""
+    records = json.loads(raw)
+
+    seen: Dict[str, None] = {}
+    for record in records:
+        for feature in record.get("vector", {}):
+            seen.setdefault(feature, None)
+    # Group by prefix, keeping first-seen order inside each group
+    rank = {prefix: position for position, prefix in enumerate(FEATURE_PREFIXES)}
+    vocabulary = tuple(sorted(seen, key=lambda feature: rank.get(feature.split(":", 1)[0], len(rank))))
+
+    prefix_spans: Dict[str, Tuple[int, int]] = {}
+    for column, feature in enumerate(vocabulary):
+        prefix = feature.split(":", 1)[0]
+        start, _ = prefix_spans.get(prefix, (column, column))
+        prefix_spans[prefix] = (start, column + 1)
+
+    feature_index = {feature: column for column, feature in enumerate(vocabulary)}
+    matrix = np.zeros((len(records), len(vocabulary)), dtype=MATRIX_DTYPE)
+    for row, record in enumerate(records):
+        for feature, value in record.get("vector", {}).items():
+            matrix[row, feature_index[feature]] = value
+
+    return VectorSnapshot(
+        version=hashlib.sha256(raw).hexdigest()[:16],
+        ids=tuple(str(record.get("id", f"advertiser_{row}")) for row, record in enumerate(records)),
+        advertisers=tuple(record["metadata"]["advertiser"] for record in records),
+        total_counts=tuple(int(record["metadata"].get("total_count", 0)) for record in records),
+        vocabulary=vocabulary,
+        prefix_spans=prefix_spans,
+        matrix=matrix
+    )
+
+class SnapshotPublisher:
+    """
+    Publishes snapshots as memory-mapped files that every worker attaches to
+
+    Each version is written once as <dir>/vectors_<version>.npy (the matrix)
+    plus a .json sidecar (vocabulary, names, prefix spans). Files are named
+    by content hash and renamed into place, so concurrent workers publishing
+    the same database write identical bytes and readers never see a partial
+    file. Workers map the matrix read-only; with the default /dev/shm
+    directory the pages live in shared memory and are held once per host
+    instead of once per worker and session.
+    """
+
+    def __init__(self, directory: str = DEFAULT_SNAPSHOT_DIR):
+        self.directory = os.path.abspath(directory)
+        self._lock = threading.Lock()
+        self._attached: Dict[str, VectorSnapshot] = {}
+        # (path, mtime_ns, size) -> version, so unchanged files aren't re-hashed
+        self._stat_versions: Dict[Tuple[str, int, int], str] = {}
+
+    def _paths(self, version: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, f"vectors_{version}")
+        return f"{base}.npy", f"{base}.json"
+
+    def _write_atomic(self, path: str, write):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".vectors_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            # mkstemp creates 0600; workers may run as another user
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _publish(self, snapshot: VectorSnapshot):
+        os.makedirs(self.directory, exist_ok=True)
+        matrix_path, meta_path = self._paths(snapshot.version)
+        self._write_atomic(matrix_path, lambda f: np.save(f, snapshot.matrix))
+        meta = {
+            "version": snapshot.version,
+            "ids": snapshot.ids,
+            "advertisers": snapshot.advertisers,
+            "total_counts": snapshot.total_counts,
+            "vocabulary": snapshot.vocabulary,
+            "prefix_spans": snapshot.prefix_spans
+        }
+        # Sidecar last: its presence marks a complete snapshot
+        self._write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+        self._remove_stale(snapshot.version)
+
+    def _remove_stale(self, current: str):
+        """Older versions can go; processes still mapping them keep their pages until they detach"""
+        for name in os.listdir(self.directory):
+            if name.startswith("vectors_") and not name.startswith(f"vectors_{current}."):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _attach(self, version: str) -> Optional[VectorSnapshot]:
+        matrix_path, meta_path = self._paths(version)
+        try:
+            with open(meta_path, "rb") as f:
+                meta = json.loads(f.read())
+            matrix = np.load(matrix_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return VectorSnapshot(
+            version=meta["version"],
+            ids=tuple(meta["ids"]),
+            advertisers=tuple(meta["advertisers"]),
+            total_counts=tuple(meta["total_counts"]),
+            vocabulary=tuple(meta["vocabulary"]),
+            prefix_spans={prefix: tuple(span) for prefix, span in meta["prefix_spans"].items()},
+            matrix=matrix,
+            shared=True
+        )
+
+    def load(self, db_path: Optional[str] = None, refresh: bool = False) -> VectorSnapshot:
+        """
+        Snapshot for the current database file, attached read-only.
+        refresh=True re-hashes the file even if its size and mtime are unchanged.
+        """
+        db_path = db_path or locate_database()
+        stat = os.stat(db_path)
+        stat_key = (db_path, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            version = None if refresh else self._stat_versions.get(stat_key)
+            if version in self._attached:
+                return self._attached[version]
+
+            with open(db_path, "rb") as f:
+                raw = f.read()
+            version = hashlib.sha256(raw).hexdigest()[:16]
+            self._stat_versions = {stat_key: version}
+            if version in self._attached:
+                return self._attached[version]
+
+            snapshot = self._attach(version)
+            if snapshot is None:
+                built = build_snapshot(raw)
+                try:
+                    self._publish(built)
+                    snapshot = self._attach(version)
+                except OSError as e:
+                    print(f"⚠️ Could not publish vector snapshot to {self.directory}: {e}")
+                snapshot = snapshot or built
+
+            # One snapshot per process; drop references to older versions
+            self._attached = {version: snapshot}
+            print(f"✅ Loaded advertiser vector snapshot {version} "
+                  f"({len(snapshot.advertisers)} advertisers, {len(snapshot.vocabulary)} features)")
+            return snapshot
+
+snapshot_publisher = SnapshotPublisher(os.getenv("VECTOR_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR))
+
+def load_vector_snapshot(refresh: bool = False) -> VectorSnapshot:
+    return snapshot_publisher.load(refresh=refresh)
@@ -0,0 +1,227 @@
+from typing import Dict, Any, List, Optional
+from datetime import date, datetime, time as datetime_time
+import json
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+
+ARCHIVE_DB = os.path.join(os.path.dirname(__file__), "..", "data", "archive", "campaigns.db")
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT,
+    advertiser TEXT NOT NULL,
+    objective TEXT NOT NULL,
+    budget REAL NOT NULL,
+    timeline TEXT,
+    line_items INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    brief TEXT,
+    reasoning TEXT,
+    exports TEXT NOT NULL,
+    state BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS campaigns_advertiser ON campaigns (advertiser COLLATE NOCASE, created_at);
+CREATE INDEX IF NOT EXISTS campaigns_objective ON campaigns (objective COLLATE NOCASE, created_at);
+CREATE INDEX IF NOT EXISTS campaigns_created ON campaigns (created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS campaigns_fts USING fts5 (
+    advertiser, brief, reasoning,
+    content='campaigns', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS campaigns_fts_insert AFTER INSERT ON campaigns BEGIN
+    INSERT INTO campaigns_fts (rowid, advertiser, brief, reasoning)
+    VALUES (new.id, new.advertiser, new.brief, new.reasoning);
+END;
+CREATE TRIGGER IF NOT EXISTS campaigns_fts_delete AFTER DELETE ON campaigns BEGIN
+    INSERT INTO campaigns_fts (campaigns_fts, rowid, advertiser, brief, reasoning)
+    VALUES ('delete', old.id, old.advertiser, old.brief, old.reasoning);
+END;
+"""
+
+_SUMMARY_COLUMNS = "c.id, c.session_id, c.advertiser, c.objective, c.budget, c.timeline, c.line_items, c.created_at, c.exports"
+
+def _fts_query(text: str) -> str:
+    """Quote each word so user input can't break FTS5 query syntax; a trailing * keeps prefix search"""
+    terms = []
+    for word in re.findall(r'[\w*]+', text):
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+        if word:
+            terms.append(f'"{word}"' + ('*' if prefix else ''))
+    return " ".join(terms)
+
+def _timestamp(value: Optional[str], end_of_day: bool = False) -> Optional[float]:
+    if not value:
+        return None
+    parsed = date.fromisoformat(value[:10])
+    return datetime.combine(parsed, datetime_time.max if end_of_day else datetime_time.min).timestamp()
+
+def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "session_id": row["session_id"],
+        "advertiser": row["advertiser"],
+        "objective": row["objective"],
+        "budget": row["budget"],
+        "timeline": row["timeline"],
+        "line_items": row["line_items"],
+        "created_at": datetime.fromtimestamp(row["created_at"]).isoformat(timespec="seconds"),
+        "exports": json.loads(row["exports"])
+    }
+
+class CampaignArchive:
+    """
+    Completed workflows, searchable by advertiser, objective, date and text
+
+    Each entry keeps the brief, every step's result and the full workflow
+    snapshot, so a past plan can be restored into a session without
+    re-running any agent. Briefs and step reasoning are indexed with FTS5.
+    """
+
+    def __init__(self, path: str = ARCHIVE_DB):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def add(self,
+            state: Dict[str, Any],
+            exports: Optional[Dict[str, str]] = None,
+            session_id: Optional[str] = None) -> int:
+        """Archive a completed workflow snapshot (MultiAgentOrchestrator.snapshot_state)"""
+        parameters = state.get("campaign_parameters")
+        structure = state.get("campaign_structure")
+        if parameters is None or structure is None:
+            raise ValueError("Only completed workflows can be archived")
+
+        step_results = state.get("step_results") or {}
+        reasoning = "\n\n".join(result.reasoning for result in step_results.values() if result.reasoning)
+
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "INSERT INTO campaigns (session_id, advertiser, objective, budget, timeline, line_items, "
+                "created_at, brief, reasoning, exports, state) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session_id,
+                    parameters.advertiser,
+                    parameters.objective,
+                    float(parameters.budget),
+                    parameters.timeline,
+                    len(structure.line_items),
+                    time.time(),
+                    state.get("brief"),
+                    reasoning,
+                    json.dumps(exports or {}),
+                    pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+                )
+            )
+        return cursor.lastrowid
+
+    def search(self,
+               query: Optional[str] = None,
+               advertiser: Optional[str] = None,
+               objective: Optional[str] = None,
+               date_from: Optional[str] = None,
+               date_to: Optional[str] = None,
+               page: int = 1,
+               page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        Filter and page through archived campaigns.
+        With a text query results are ranked by relevance, otherwise newest first.
+        """
+        page = max(int(page), 1)
+        page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+
+        joins, conditions, params = "", [], []
+        order = "c.created_at DESC"
+        fts = _fts_query(query or "")
+        if fts:
+            joins = "JOIN campaigns_fts f ON f.rowid = c.id"
+            conditions.append("campaigns_fts MATCH ?")
+            params.append(fts)
+            order = "bm25(campaigns_fts), c.created_at DESC"
+        if advertiser:
+            conditions.append("c.advertiser = ? COLLATE NOCASE")
+            params.append(advertiser)
+        if objective:
+            conditions.append("c.objective = ? COLLATE NOCASE")
+            params.append(objective)
+        if date_from:
+            conditions.append("c.created_at >= ?")
+            params.append(_timestamp(date_from))
+        if date_to:
+            conditions.append("c.created_at <= ?")
+            params.append(_timestamp(date_to, end_of_day=True))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        connection = self._connection()
+        total = connection.execute(f"SELECT COUNT(*) FROM campaigns c {joins} {where}", params).fetchone()[0]
+        rows = connection.execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM campaigns c {joins} {where} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [page_size, (page - 1) * page_size]
+        ).fetchall()
+
+        return {
+            "items": [_summary(row) for row in rows],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "pages": (total + page_size - 1) // page_size
+        }
+
+    def get(self, campaign_id: int) -> Optional[Dict[str, Any]]:
+        """Archived campaign with its brief and every step's result"""
+        row = self._connection().execute(
+            f"SELECT {_SUMMARY_COLUMNS}, c.brief, c.state FROM campaigns c WHERE c.id = ?", (campaign_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        state = pickle.loads(row["state"])
+        return {
+            **_summary(row),
+            "brief": row["brief"],
+            "steps": {
+                step: {
+                    "reasoning": result.reasoning,
+                    "action": result.action,
+                    "data": result.data,
+                    "confidence": result.confidence
+                }
+                for step, result in (state.get("step_results") or {}).items()
+            }
+        }
+
+    def load_state(self, campaign_id: int) -> Optional[Dict[str, Any]]:
+        """Workflow snapshot to restore into a session"""
+        row = self._connection().execute(
+            "SELECT state FROM campaigns WHERE id = ?", (campaign_id,)
+        ).fetchone()
+        return pickle.loads(row["state"]) if row else None
+
+    def delete(self, campaign_id: int) -> bool:
+        with self._connection() as connection:
+            cursor = connection.execute("DELETE FROM campaigns WHERE id = ?", (campaign_id,))
+        return cursor.rowcount == 1
+
+campaign_archive = CampaignArchive(os.getenv("ARCHIVE_DB_PATH", ARCHIVE_DB))
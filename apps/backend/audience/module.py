@@ -1,17 +1,15 @@
 import csv
 import os
 from typing import List, Dict, Any
+from catalog.module import FileCatalog
 
-def list_segments() -> List[Dict[str, Any]]:
-    """
-    List available audience segments.
-    Currently reads from CSV file.
-    """
-    segments_path = os.path.join(os.path.dirname(__file__), "..", "data", "segments", "segments.csv")
+SEGMENTS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "segments", "segments.csv")
+
+def _load_segments(path: str) -> List[Dict[str, Any]]:
     segments = []
-    
+
     try:
-        with open(segments_path, 'r') as f:
+        with open(path, 'r') as f:
             reader = csv.DictReader(f)
             for row in reader:
                 segments.append({
@@ -46,4 +44,17 @@ def list_segments() -> List[Dict[str, Any]]:
                 "geo": "Chicago",
                 "demoTags": ["Comedy", "18-49"]
             }
-        ] 
\ No newline at end of file
+        ]
+
+segments_catalog = FileCatalog(SEGMENTS_PATH, _load_segments)
+
+def list_segments() -> List[Dict[str, Any]]:
+    """
+    List available audience segments.
+    Currently reads from CSV file.
+    """
+    return segments_catalog.get()
+
+async def list_segments_async() -> List[Dict[str, Any]]:
+    """list_segments for async endpoints; served from memory, file checks run off the loop"""
+    return await segments_catalog.aget()
@@ -0,0 +1,66 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+
+# How stale an in-memory catalog may get before the file is stat'ed again
+CATALOG_RECHECK_SECONDS = float(os.getenv("CATALOG_RECHECK_SECONDS", "5"))
+
+class FileCatalog:
+    """
+    A data file parsed once and served from memory, reloaded when it changes
+
+    The event loop only ever reads the cached value. The stat and any
+    reload run in a worker thread, at most once per recheck interval, and
+    callers that arrive during a reload wait for that reload instead of
+    starting their own. Values are shared between requests: treat them
+    as read-only.
+    """
+
+    def __init__(self,
+                 path: str,
+                 loader: Callable[[str], Any],
+                 recheck_seconds: float = CATALOG_RECHECK_SECONDS):
+        self.path = os.path.abspath(path)
+        self.loader = loader
+        self.recheck_seconds = recheck_seconds
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._value: Any = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self.loads = 0
+
+    def _fresh(self) -> bool:
+        return self._loaded and time.monotonic() - self._checked_at < self.recheck_seconds
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self) -> Any:
+        """Current contents. May touch the disk, so don't call it on the event loop"""
+        with self._lock:
+            if self._fresh():
+                return self._value
+            signature = self._stat()
+            if not self._loaded or signature != self._signature:
+                self._value = self.loader(self.path)
+                self._signature = signature
+                self._loaded = True
+                self.loads += 1
+            self._checked_at = time.monotonic()
+            return self._value
+
+    async def aget(self) -> Any:
+        """Current contents without blocking the event loop"""
+        if self._fresh():
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "loaded": self._loaded, "loads": self.loads}
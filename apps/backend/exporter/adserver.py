@@ -0,0 +1,154 @@
+"""
+Ad Server Export - Streamed Bulk Upload Payloads for Trafficking
+Neural Ads - Connected TV Advertising Platform
+"""
+
+from typing import Dict, Any, Iterator, Optional
+import itertools
+import json
+
+from agents.lineitem_generator import parse_frequency_cap
+from exporter.module import (
+    ExportSource, export_rows, export_name, export_objective, export_budget, slugify
+)
+
+ADSERVER_FORMATS = ("jsonl", "batches")
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 10000
+
+# Lines are grouped into chunks of roughly this many bytes before being yielded
+STREAM_CHUNK_BYTES = 64 * 1024
+
+def _frequency_cap(frequency_cap: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    The planned cap in its own period ("10/week" -> 10 per WEEK), parsed the
+    same way the allocator and reach simulation read it. Ad servers take
+    whole impressions, so fractional amounts are rounded, to at least 1.
+    """
+    parsed = parse_frequency_cap(frequency_cap)
+    if parsed is None or parsed[0] <= 0:
+        return None
+    amount, period = parsed
+    return {"impressions": max(1, round(amount)), "period": period.upper()}
+
+def _date(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def adserver_line_item(row: Dict[str, Any], campaign_id: str) -> Dict[str, Any]:
+    """
+    Map one export row onto a generic ad-server line item.
+    Line items are created paused so trafficking can review before launch.
+    """
+    targeting = {
+        "networks": row["networks"],
+        "genres": row["genres"],
+        "devices": row["devices"],
+        "geos": row["locations"],
+        "audiences": [row["audience"]] if row.get("audience") else [],
+        "segment_ids": row["segment_ids"]
+    }
+    if row.get("targeting"):
+        targeting["attributes"] = row["targeting"]
+
+    line_item = {
+        "external_id": f"{campaign_id}:{row['line_item_id']}",
+        "campaign_external_id": campaign_id,
+        "name": row["line_item_name"],
+        "status": "PAUSED",
+        "flight": {"start": _date(row["start_date"]), "end": _date(row["end_date"])},
+        "budget": {"amount": round(float(row["budget"]), 2), "currency": "USD", "pacing": "EVEN"},
+        "bid": None,
+        "caps": {},
+        "targeting": targeting
+    }
+    if row.get("bid_cpm") is not None:
+        line_item["bid"] = {"type": "CPM", "amount": round(float(row["bid_cpm"]), 2)}
+    if row.get("daily_cap") is not None:
+        line_item["caps"]["daily_spend"] = round(float(row["daily_cap"]), 2)
+    frequency = _frequency_cap(row.get("frequency_cap"))
+    if frequency:
+        line_item["caps"]["frequency"] = frequency
+
+    return line_item
+
+def campaign_header(source: ExportSource) -> Dict[str, Any]:
+    return {
+        "external_id": slugify(export_name(source)),
+        "name": export_name(source),
+        "objective": export_objective(source),
+        "budget": {"amount": round(float(export_budget(source)), 2), "currency": "USD"}
+    }
+
+def _line_count(source: ExportSource) -> int:
+    line_items = getattr(source, "line_items", None)
+    if line_items is None:
+        line_items = getattr(source, "structure", source).line_items
+    return len(line_items)
+
+def _chunked(lines: Iterator[str]) -> Iterator[str]:
+    """Group small JSON lines into ~STREAM_CHUNK_BYTES writes"""
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= STREAM_CHUNK_BYTES:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+def iter_jsonl(source: ExportSource) -> Iterator[str]:
+    """
+    Stream a campaign as JSON Lines: one campaign record, then one line per
+    line item. Rows are mapped as they're written, so memory doesn't grow
+    with plan size.
+    """
+    header = campaign_header(source)
+
+    def lines() -> Iterator[str]:
+        yield json.dumps({"type": "campaign", **header}) + "\n"
+        for row in export_rows(source):
+            yield json.dumps({"type": "line_item", **adserver_line_item(row, header["external_id"])}) + "\n"
+
+    return _chunked(lines())
+
+def iter_batches(source: ExportSource, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield batch-API payloads of at most batch_size line items each"""
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+
+    header = campaign_header(source)
+    total = _line_count(source)
+    total_batches = max((total + batch_size - 1) // batch_size, 1)
+    line_items = (adserver_line_item(row, header["external_id"]) for row in export_rows(source))
+
+    for index in range(total_batches):
+        batch = list(itertools.islice(line_items, batch_size))
+        yield {
+            "campaign": header,
+            "batch": index + 1,
+            "total_batches": total_batches,
+            "line_items": batch
+        }
+
+def iter_batch_jsonl(source: ExportSource, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """Batch payloads as newline-delimited JSON, one request body per line"""
+    for payload in iter_batches(source, batch_size):
+        yield json.dumps(payload) + "\n"
+
+def iter_adserver(source: ExportSource,
+                  format: str = "jsonl",
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """Pick the streamed bulk format; validates eagerly so errors surface before streaming"""
+    if format not in ADSERVER_FORMATS:
+        raise ValueError(f"Unknown ad server format: {format}")
+    if format == "batches":
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+        return iter_batch_jsonl(source, batch_size)
+    return iter_jsonl(source)
+
+def adserver_filename(source: ExportSource, format: str = "jsonl") -> str:
+    suffix = "_batches" if format == "batches" else ""
+    return f"adserver_{slugify(export_name(source))}{suffix}.jsonl"
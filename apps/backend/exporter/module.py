@@ -1,41 +1,353 @@
 from models.campaign import CampaignPlan
+from agents.lineitem_generator import CampaignStructure
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional, Sequence, Union
+from dataclasses import dataclass
+from datetime import date, datetime
 import csv
+import hashlib
+import io
+import json
 import os
+import re
+import tempfile
+import uuid
+import zipfile
+from exporter.store import EXPORTS_DIR, export_store
 
-def export_csv(plan: CampaignPlan) -> str:
-    """
-    Export campaign plan to CSV and return file path.
-    """
-    # Create exports directory if it doesn't exist
-    exports_dir = os.path.join(os.path.dirname(__file__), "..", "data", "exports")
-    os.makedirs(exports_dir, exist_ok=True)
-    
-    # Generate filename
-    filename = f"campaign_plan_{plan.campaign.name.replace(' ', '_').lower()}.csv"
-    filepath = os.path.join(exports_dir, filename)
-    
-    # Write CSV
-    with open(filepath, 'w', newline='') as csvfile:
-        fieldnames = [
-            'line_item_id', 'line_item_name', 'budget', 'start_date', 'end_date',
-            'networks', 'genres', 'devices', 'locations', 'segment_ids'
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        for line_item in plan.line_items:
-            writer.writerow({
+if TYPE_CHECKING:
+    import pandas as pd
+
+DATASETS_DIR = os.path.join(EXPORTS_DIR, "datasets")
+
+PARQUET_COMPRESSION = "zstd"
+
+# The /plan CSV columns; planner plan CSVs keep exactly this set
+PLAN_CSV_FIELDS = [
+    'line_item_id', 'line_item_name', 'budget', 'start_date', 'end_date',
+    'networks', 'genres', 'devices', 'locations', 'segment_ids'
+]
+
+# One row schema for both planner plans and agent-built campaign structures;
+# columns a source doesn't have are left empty. Used by Parquet and by
+# structure CSVs.
+EXPORT_FIELDS = PLAN_CSV_FIELDS + ['audience', 'bid_cpm', 'daily_cap', 'frequency_cap', 'targeting']
+
+LIST_FIELDS = ('networks', 'genres', 'devices', 'locations', 'segment_ids')
+
+@dataclass
+class StructureExport:
+    """A multi-agent CampaignStructure plus the campaign context it lacks"""
+    structure: CampaignStructure
+    name: str = "campaign"
+    objective: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+ExportSource = Union[CampaignPlan, CampaignStructure, StructureExport]
+
+def slugify(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_') or "campaign"
+
+def _as_structure_export(source: ExportSource) -> Union[CampaignPlan, StructureExport]:
+    if isinstance(source, CampaignStructure):
+        return StructureExport(structure=source)
+    return source
+
+def export_name(source: ExportSource) -> str:
+    source = _as_structure_export(source)
+    if isinstance(source, CampaignPlan):
+        return source.campaign.name
+    return source.name
+
+def export_objective(source: ExportSource) -> Optional[str]:
+    source = _as_structure_export(source)
+    if isinstance(source, CampaignPlan):
+        return source.campaign.objective
+    return source.objective
+
+def export_budget(source: ExportSource) -> float:
+    source = _as_structure_export(source)
+    if isinstance(source, CampaignPlan):
+        return source.campaign.total_budget
+    return source.structure.total_budget
+
+def export_rows(source: ExportSource) -> Iterator[Dict[str, Any]]:
+    """
+    Map a plan or campaign structure onto EXPORT_FIELDS, one line item at a time.
+    Values keep their types (lists, dates, dicts); writers format them.
+    """
+    source = _as_structure_export(source)
+
+    if isinstance(source, CampaignPlan):
+        for line_item in source.line_items:
+            yield {
                 'line_item_id': line_item.id,
                 'line_item_name': line_item.name,
                 'budget': line_item.budget,
-                'start_date': line_item.start_date.isoformat(),
-                'end_date': line_item.end_date.isoformat(),
-                'networks': '|'.join(line_item.networks),
-                'genres': '|'.join(line_item.genres),
-                'devices': '|'.join(line_item.devices),
-                'locations': '|'.join(line_item.locations),
-                'segment_ids': '|'.join(map(str, line_item.segment_ids))
-            })
-    
+                'start_date': line_item.start_date,
+                'end_date': line_item.end_date,
+                'networks': list(line_item.networks),
+                'genres': list(line_item.genres),
+                'devices': list(line_item.devices),
+                'locations': list(line_item.locations),
+                'segment_ids': [int(segment_id) for segment_id in line_item.segment_ids],
+                'audience': None,
+                'bid_cpm': None,
+                'daily_cap': None,
+                'frequency_cap': None,
+                'targeting': line_item.targeting
+            }
+        return
+
+    for i, line_item in enumerate(source.structure.line_items):
+        yield {
+            'line_item_id': f"line_{i+1}",
+            'line_item_name': line_item.name,
+            'budget': line_item.budget,
+            'start_date': source.start_date,
+            'end_date': source.end_date,
+            'networks': [],
+            'genres': [line_item.content],
+            'devices': [line_item.device],
+            'locations': [line_item.geo],
+            'segment_ids': [],
+            'audience': line_item.audience,
+            'bid_cpm': line_item.bid_cpm,
+            'daily_cap': line_item.daily_cap,
+            'frequency_cap': line_item.frequency_cap,
+            'targeting': line_item.targeting_criteria
+        }
+
+class _HashingWriter(io.RawIOBase):
+    """Binary sink that hashes bytes on their way into the underlying file"""
+
+    def __init__(self, f):
+        self._f = f
+        self.digest = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.digest.update(data)
+        return self._f.write(data)
+
+    def flush(self):
+        self._f.flush()
+
+def _write_content_addressed(write, prefix: str, suffix: str) -> str:
+    """
+    Run write(f) against a binary temp file, hashing the bytes as they're
+    written, then atomically rename it to {prefix}_{sha256 prefix}{suffix}
+    in the exports dir. Returns the filename.
+    """
+    os.makedirs(EXPORTS_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=EXPORTS_DIR, prefix=".export_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            sink = _HashingWriter(f)
+            write(sink)
+
+        filename = f"{prefix}_{sink.digest.hexdigest()[:16]}{suffix}"
+        # mkstemp creates 0600; the static /exports mount serves these
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, os.path.join(EXPORTS_DIR, filename))
+        export_store.register(filename)
+        return filename
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _format_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def csv_fields(source: ExportSource) -> List[str]:
+    """Planner plans keep the original /plan columns; structures get the full schema"""
+    return PLAN_CSV_FIELDS if isinstance(source, CampaignPlan) else EXPORT_FIELDS
+
+def csv_row(row: Dict[str, Any], fields: Sequence[str] = EXPORT_FIELDS) -> Dict[str, Any]:
+    """Format one export row for CSV: lists '|'-joined, targeting as JSON"""
+    formatted = {field: _format_value(row.get(field)) for field in fields}
+    for field in LIST_FIELDS:
+        formatted[field] = '|'.join(map(str, row.get(field) or []))
+    if 'targeting' in formatted:
+        formatted['targeting'] = json.dumps(row['targeting'], sort_keys=True) if row.get('targeting') else ''
+    return formatted
+
+def iter_csv(source: ExportSource) -> Iterator[str]:
+    """
+    Yield a plan or campaign structure as CSV text, one row at a time.
+    Memory stays constant regardless of line item count.
+    """
+    fields = csv_fields(source)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+
+    writer.writeheader()
+    for row in export_rows(source):
+        writer.writerow(csv_row(row, fields))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    # Header-only export for plans without line items
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def csv_filename(source: ExportSource) -> str:
+    return f"campaign_plan_{slugify(export_name(source))}.csv"
+
+class _ZipStream:
+    """
+    Write-only sink for ZipFile that hands bytes back out as they're produced.
+    It has no tell(), so ZipFile treats it as unseekable and writes data
+    descriptors instead of seeking back to patch headers.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_zip(sources: Sequence[ExportSource]) -> Iterator[bytes]:
+    """
+    Yield a zip archive with one CSV per campaign, built incrementally.
+    Each compressed chunk is yielded as soon as it's written, so only one
+    row's worth of data is buffered at a time.
+    """
+    stream = _ZipStream()
+    seen_names: Dict[str, int] = {}
+
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for source in sources:
+            name = csv_filename(source)
+            if name in seen_names:
+                seen_names[name] += 1
+                name = f"{name[:-len('.csv')]}_{seen_names[name]}.csv"
+            else:
+                seen_names[name] = 1
+
+            with archive.open(name, 'w', force_zip64=True) as member:
+                for chunk in iter_csv(source):
+                    member.write(chunk.encode('utf-8'))
+                    data = stream.drain()
+                    if data:
+                        yield data
+            # Member trailer: flushed compressor output and data descriptor
+            yield stream.drain()
+
+    # Central directory
+    yield stream.drain()
+
+def zip_filename(sources: Sequence[ExportSource]) -> str:
+    return f"campaign_plans_{len(sources)}.zip"
+
+def export_csv(plan: ExportSource) -> str:
+    """
+    Export a campaign plan or structure to CSV and return its URL path.
+
+    Files are content-addressed (campaign slug + SHA-256 prefix), written
+    to a temp file in the exports dir and atomically renamed into place,
+    so campaigns that share a name never overwrite each other and readers
+    never see a partial file.
+    """
+    def write(f):
+        for chunk in iter_csv(plan):
+            f.write(chunk.encode('utf-8'))
+
+    filename = _write_content_addressed(write, f"campaign_plan_{slugify(export_name(plan))}", ".csv")
+
     # Return relative URL path for frontend
-    return f"/exports/{filename}" 
\ No newline at end of file
+    return f"/exports/{filename}"
+
+def plan_to_frame(plans: Sequence[ExportSource]) -> "pd.DataFrame":
+    """
+    One row per line item across one or more plans or structures.
+    List targeting stays as list columns and dates as timestamps, so
+    Parquet keeps the real types instead of '|'-joined strings.
+    """
+    # pandas is only needed for Parquet; importing it at startup costs ~0.4s
+    import pandas as pd
+
+    records = []
+    for plan in plans:
+        campaign_columns = {
+            'campaign': slugify(export_name(plan)),
+            'campaign_name': export_name(plan),
+            'objective': export_objective(plan),
+            'campaign_budget': export_budget(plan)
+        }
+        for row in export_rows(plan):
+            row['targeting'] = json.dumps(row['targeting'], sort_keys=True) if row.get('targeting') else None
+            records.append({**campaign_columns, **row})
+
+    frame = pd.DataFrame.from_records(
+        records, columns=['campaign', 'campaign_name', 'objective', 'campaign_budget'] + EXPORT_FIELDS
+    )
+    frame['start_date'] = pd.to_datetime(frame['start_date'])
+    frame['end_date'] = pd.to_datetime(frame['end_date'])
+    for field in ('bid_cpm', 'daily_cap'):
+        frame[field] = frame[field].astype(float)
+    return frame
+
+def export_parquet(plan: ExportSource) -> str:
+    """
+    Export a campaign plan or structure to Parquet and return its URL path.
+    Content-addressed and atomically renamed like export_csv.
+    """
+    frame = plan_to_frame([plan])
+    filename = _write_content_addressed(
+        lambda f: frame.to_parquet(f, engine="pyarrow", compression=PARQUET_COMPRESSION, index=False),
+        f"campaign_plan_{slugify(export_name(plan))}",
+        ".parquet"
+    )
+    return f"/exports/{filename}"
+
+def export_parquet_dataset(plans: List[ExportSource],
+                           dataset: str,
+                           partition_cols: Sequence[str] = ("campaign",)) -> Dict[str, Any]:
+    """
+    Append many plans to one Hive-partitioned Parquet dataset.
+
+    Each call writes uniquely named part files, so concurrent or repeated
+    exports add to the dataset without clobbering earlier parts.
+    """
+    frame = plan_to_frame(plans)
+    dataset_dir = os.path.join(DATASETS_DIR, slugify(dataset))
+    os.makedirs(dataset_dir, exist_ok=True)
+
+    if len(frame):
+        frame.to_parquet(
+            dataset_dir,
+            engine="pyarrow",
+            compression=PARQUET_COMPRESSION,
+            index=False,
+            partition_cols=list(partition_cols),
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore"
+        )
+        export_store.register(f"datasets/{slugify(dataset)}")
+
+    return {
+        "dataset": slugify(dataset),
+        "path": f"/exports/datasets/{slugify(dataset)}",
+        "partition_cols": list(partition_cols),
+        "campaigns": len(plans),
+        "rows": int(len(frame))
+    }
@@ -0,0 +1,271 @@
+"""
+Export Store - Disk-Bounded Exports Directory with LRU/TTL Eviction
+Neural Ads - Connected TV Advertising Platform
+"""
+
+from typing import Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+EXPORTS_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "exports")
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTL_HOURS = 24 * 7
+
+# Formats worth gzipping on the way out; parquet and zip are already compressed
+COMPRESSIBLE_SUFFIXES = (".csv", ".jsonl", ".json", ".txt")
+GZIP_DIR = ".gzip"
+
+# In-flight temp files younger than this are never evicted
+TEMP_FILE_GRACE_SECONDS = 3600
+
+@dataclass
+class StoreEntry:
+    """One evictable unit: a top-level export file or a whole dataset directory"""
+    name: str
+    size: int
+    last_access: float
+
+class ExportStore:
+    """
+    Keeps the exports directory under a disk quota
+
+    Every export and dataset is tracked with its size and last access time.
+    Entries unused for longer than the TTL are dropped, then least recently
+    used entries go until the directory fits the quota. Access times are
+    written back as file atimes (mtime untouched, so Last-Modified stays
+    stable), which lets the LRU order survive restarts.
+    """
+
+    def __init__(self,
+                 root: str = EXPORTS_DIR,
+                 max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.getenv("EXPORTS_MAX_BYTES", DEFAULT_MAX_BYTES)
+        )
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("EXPORTS_TTL_HOURS", DEFAULT_TTL_HOURS)
+        ) * 3600
+        self._lock = threading.Lock()
+        self._entries: Dict[str, StoreEntry] = {}
+        self.evictions = 0
+
+        os.makedirs(self.root, exist_ok=True)
+        self._scan()
+        self.evict()
+
+    def _unit_for(self, relative_path: str) -> str:
+        """Datasets are evicted as a whole; everything else file by file"""
+        parts = relative_path.replace(os.sep, "/").split("/")
+        if parts[0] == "datasets" and len(parts) > 1:
+            return f"datasets/{parts[1]}"
+        return parts[0]
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, *name.split("/"))
+
+    def _gzip_path(self, name: str) -> str:
+        return os.path.join(self.root, GZIP_DIR, name.replace("/", "__") + ".gz")
+
+    def _measure(self, name: str) -> Tuple[int, float]:
+        """Size (including any gzip copy) and last access time of one unit"""
+        path = self._path(name)
+        if os.path.isdir(path):
+            size, last_access = 0, 0.0
+            for directory, _, files in os.walk(path):
+                for filename in files:
+                    stat = os.stat(os.path.join(directory, filename))
+                    size += stat.st_size
+                    last_access = max(last_access, stat.st_atime, stat.st_mtime)
+            return size, last_access
+
+        stat = os.stat(path)
+        size = stat.st_size
+        gzip_path = self._gzip_path(name)
+        if os.path.exists(gzip_path):
+            size += os.path.getsize(gzip_path)
+        return size, max(stat.st_atime, stat.st_mtime)
+
+    def _scan(self):
+        with self._lock:
+            self._entries.clear()
+            for name in os.listdir(self.root):
+                if name.startswith("."):
+                    continue
+                units = ([f"datasets/{dataset}" for dataset in os.listdir(self._path(name))]
+                         if name == "datasets" and os.path.isdir(self._path(name)) else [name])
+                for unit in units:
+                    try:
+                        size, last_access = self._measure(unit)
+                    except FileNotFoundError:
+                        continue
+                    self._entries[unit] = StoreEntry(unit, size, last_access)
+
+    def _remove(self, name: str):
+        path = self._path(name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+        gzip_path = self._gzip_path(name)
+        if os.path.exists(gzip_path):
+            os.remove(gzip_path)
+        self._entries.pop(name, None)
+        self.evictions += 1
+
+    def register(self, relative_path: str):
+        """Record a new or rewritten export, then enforce the quota"""
+        name = self._unit_for(relative_path)
+        with self._lock:
+            try:
+                size, _ = self._measure(name)
+            except FileNotFoundError:
+                self._entries.pop(name, None)
+                return
+            self._entries[name] = StoreEntry(name, size, time.time())
+        self.evict(keep=name)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Drop expired entries, then least recently used ones until under quota"""
+        now = time.time()
+        evicted = 0
+        with self._lock:
+            for entry in list(self._entries.values()):
+                if entry.name != keep and now - entry.last_access > self.ttl_seconds:
+                    self._remove(entry.name)
+                    evicted += 1
+
+            total = sum(entry.size for entry in self._entries.values())
+            for entry in sorted(self._entries.values(), key=lambda e: e.last_access):
+                if total <= self.max_bytes:
+                    break
+                if entry.name == keep:
+                    continue
+                total -= entry.size
+                self._remove(entry.name)
+                evicted += 1
+
+            # Temp files left behind by crashed writers
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name.startswith(".export_") and now - os.path.getmtime(path) > TEMP_FILE_GRACE_SECONDS:
+                    os.remove(path)
+
+        return evicted
+
+    def resolve(self, relative_path: str) -> Optional[str]:
+        """Absolute path of a servable export, or None if missing, hidden or outside the store"""
+        parts = [part for part in relative_path.replace("\\", "/").split("/") if part]
+        if not parts or any(part.startswith(".") for part in parts):
+            return None
+
+        path = os.path.abspath(os.path.join(self.root, *parts))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+
+        name = self._unit_for("/".join(parts))
+        entry = self._entries.get(name)
+        if entry and time.time() - entry.last_access > self.ttl_seconds:
+            with self._lock:
+                self._remove(name)
+            return None
+        return path
+
+    def touch(self, relative_path: str):
+        """Mark an export as just used; mtime is kept so Last-Modified doesn't move"""
+        relative_path = relative_path.strip("/")
+        path = self.resolve(relative_path)
+        if path is None:
+            return
+        now = time.time()
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except OSError:
+            pass
+
+        name = self._unit_for(relative_path)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                size, _ = self._measure(name)
+                self._entries[name] = StoreEntry(name, size, now)
+            else:
+                entry.last_access = now
+
+    def gzip_variant(self, relative_path: str) -> Optional[str]:
+        """
+        Path of a cached gzip copy of a compressible export, built on first
+        request. Returns None for formats that are already compressed.
+        """
+        name = relative_path.strip("/")
+        path = self.resolve(name)
+        if path is None or "/" in name or not path.endswith(COMPRESSIBLE_SUFFIXES):
+            return None
+
+        gzip_path = self._gzip_path(name)
+        if os.path.exists(gzip_path) and os.path.getmtime(gzip_path) >= os.path.getmtime(path):
+            return gzip_path
+
+        os.makedirs(os.path.dirname(gzip_path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(gzip_path), prefix=".gzip_")
+        try:
+            with os.fdopen(fd, "wb") as raw, open(path, "rb") as source:
+                # mtime=0 keeps the gzip bytes deterministic for the same export
+                with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as compressed:
+                    shutil.copyfileobj(source, compressed, 1 << 20)
+            os.replace(temp_path, gzip_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self.register(name)
+        return gzip_path
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(entry.size for entry in self._entries.values())
+            return {
+                "entries": len(self._entries),
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "ttl_hours": round(self.ttl_seconds / 3600, 2),
+                "utilization": round(total / self.max_bytes, 4) if self.max_bytes else 0.0,
+                "evictions": self.evictions
+            }
+
+def etag_for(path: str, variant: str = "") -> str:
+    """Validator from size and mtime; content-addressed names already pin the content"""
+    stat = os.stat(path)
+    suffix = f"-{variant}" if variant else ""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}{suffix}"'
+
+def last_modified_for(path: str) -> str:
+    return formatdate(os.stat(path).st_mtime, usegmt=True)
+
+def is_not_modified(request_headers, etag: str, path: str) -> bool:
+    """Conditional GET check: If-None-Match wins over If-Modified-Since"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(os.stat(path).st_mtime) <= since
+
+    return False
+
+export_store = ExportStore()
@@ -0,0 +1,217 @@
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+from dataclasses import dataclass
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_DB = os.path.join(os.path.dirname(__file__), "..", "data", "idempotency", "keys.db")
+
+# Completed responses are replayed for this long
+TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+# How long a retry waits for the original request to finish before giving up
+WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "120"))
+# In-progress claims older than this are presumed abandoned (crashed worker)
+LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "300"))
+
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.1
+PURGE_INTERVAL_SECONDS = 60.0
+
+# Transient outcomes a retry should get a fresh attempt at
+_UNCACHED_STATUSES = (408, 409, 429)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    status_code INTEGER,
+    body BLOB,
+    headers TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+CREATE INDEX IF NOT EXISTS idempotency_created ON idempotency_keys (created_at);
+"""
+
+class IdempotencyMismatch(ValueError):
+    """The key was already used for a different request body"""
+
+class IdempotencyInProgress(Exception):
+    """The original request is still running after the wait limit"""
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: bytes
+    headers: Dict[str, str]
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a JSON-compatible request payload"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def is_cacheable(status_code: int) -> bool:
+    return status_code < 500 and status_code not in _UNCACHED_STATUSES
+
+class IdempotencyStore:
+    """
+    Responses stored by (scope, Idempotency-Key) so retries replay them
+
+    The first request with a key claims it with a row insert, runs, and
+    stores its response. A retry gets the stored response back without
+    running anything again. A retry that arrives while the first request
+    is still running waits for it: on its own event-loop future in the
+    same worker, or by polling the shared SQLite file from other workers.
+    Server errors and transient statuses aren't stored, so a retry after
+    one of those runs the request again.
+    """
+
+    def __init__(self,
+                 path: str = IDEMPOTENCY_DB,
+                 ttl_seconds: float = TTL_SECONDS,
+                 wait_seconds: float = WAIT_SECONDS,
+                 lock_seconds: float = LOCK_SECONDS):
+        self.path = os.path.abspath(path)
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.lock_seconds = lock_seconds
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._last_purge = 0.0
+        self.replayed = 0
+        self.executed = 0
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit; claims open their own IMMEDIATE transaction
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _claim(self, scope: str, key: str, fingerprint: str) -> Tuple[str, Optional[StoredResponse]]:
+        """'claimed', 'completed' (with the response), 'in_progress' or 'mismatch'"""
+        connection = self._connection()
+        now = time.time()
+        if now - self._last_purge > PURGE_INTERVAL_SECONDS:
+            self._last_purge = now
+            connection.execute(
+                "DELETE FROM idempotency_keys WHERE status_code IS NOT NULL AND created_at < ?",
+                (now - self.ttl_seconds,)
+            )
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT fingerprint, status_code, body, headers, created_at FROM idempotency_keys "
+                "WHERE scope = ? AND key = ?", (scope, key)
+            ).fetchone()
+            if row is not None:
+                completed = row[1] is not None
+                if now - row[4] > (self.ttl_seconds if completed else self.lock_seconds):
+                    connection.execute("DELETE FROM idempotency_keys WHERE scope = ? AND key = ?", (scope, key))
+                    row = None
+            if row is None:
+                connection.execute(
+                    "INSERT INTO idempotency_keys (scope, key, fingerprint, created_at) VALUES (?, ?, ?, ?)",
+                    (scope, key, fingerprint, now)
+                )
+                connection.execute("COMMIT")
+                return "claimed", None
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        if row[0] != fingerprint:
+            return "mismatch", None
+        if row[1] is None:
+            return "in_progress", None
+        return "completed", StoredResponse(row[1], row[2], json.loads(row[3] or "{}"))
+
+    def _complete(self, scope: str, key: str, response: StoredResponse):
+        self._connection().execute(
+            "UPDATE idempotency_keys SET status_code = ?, body = ?, headers = ?, created_at = ? "
+            "WHERE scope = ? AND key = ?",
+            (response.status_code, response.body, json.dumps(response.headers), time.time(), scope, key)
+        )
+
+    def _release(self, scope: str, key: str):
+        self._connection().execute(
+            "DELETE FROM idempotency_keys WHERE scope = ? AND key = ? AND status_code IS NULL", (scope, key)
+        )
+
+    async def run(self,
+                  scope: str,
+                  key: str,
+                  fingerprint: str,
+                  execute: Callable[[], Awaitable[StoredResponse]]) -> Tuple[StoredResponse, bool]:
+        """
+        The response for this key, running `execute` only if no earlier
+        request with the key has completed. Returns (response, replayed).
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise IdempotencyMismatch(f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            state, stored = await asyncio.to_thread(self._claim, scope, key, fingerprint)
+            if state == "claimed":
+                break
+            if state == "completed":
+                self.replayed += 1
+                return stored, True
+            if state == "mismatch":
+                raise IdempotencyMismatch(f"{IDEMPOTENCY_HEADER} was already used for a different request")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyInProgress("The original request with this key is still being processed")
+            original = self._inflight.get((scope, key))
+            if original is not None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(original), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(min(POLL_SECONDS, remaining))
+
+        done = asyncio.get_running_loop().create_future()
+        self._inflight[(scope, key)] = done
+        try:
+            try:
+                response = await execute()
+            except BaseException:
+                await asyncio.to_thread(self._release, scope, key)
+                raise
+            self.executed += 1
+            if is_cacheable(response.status_code):
+                await asyncio.to_thread(self._complete, scope, key, response)
+            else:
+                await asyncio.to_thread(self._release, scope, key)
+            return response, False
+        finally:
+            # Waiters re-read the row: a replay if stored, otherwise they claim it themselves
+            del self._inflight[(scope, key)]
+            done.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+idempotency_store = IdempotencyStore(os.getenv("IDEMPOTENCY_DB_PATH", IDEMPOTENCY_DB))
@@ -0,0 +1,285 @@
+from fastapi import UploadFile
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import BinaryIO, Dict, Iterable, Optional
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from xml.etree import ElementTree
+import asyncio
+import codecs
+import hashlib
+import io
+import os
+import zipfile
+from agents.compute_pool import worker_context
+
+MAX_UPLOAD_BYTES = int(float(os.getenv("INGEST_MAX_UPLOAD_MB", "20")) * 1024 * 1024)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+READ_CHUNK_BYTES = 1024 * 1024
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+TEXT_CACHE_SIZE = 256
+
+# Briefs longer than this are truncated before parsing
+MAX_TEXT_CHARS = 200_000
+
+SUPPORTED_FORMATS = ("pdf", "docx", "txt")
+
+_WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+class IngestError(ValueError):
+    """Upload can't be turned into brief text"""
+
+class UploadTooLarge(IngestError):
+    pass
+
+class UnsupportedDocument(IngestError):
+    pass
+
+@dataclass
+class ReceivedUpload:
+    data: bytes
+    filename: str
+    size: int
+    sha256: str
+
+@dataclass
+class IngestedDocument:
+    filename: str
+    format: str
+    size: int
+    sha256: str
+    text: str
+    cached: bool
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "filename": self.filename,
+            "format": self.format,
+            "size": self.size,
+            "sha256": self.sha256,
+            "characters": len(self.text),
+            "cached": self.cached
+        }
+
+def detect_format(filename: str, head: bytes) -> str:
+    """Sniff magic bytes first; fall back to the extension for plain text"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        if extension in ("", ".docx"):
+            return "docx"
+        raise UnsupportedDocument(f"Unsupported archive upload: {filename}")
+    if head.startswith(b"\xd0\xcf\x11\xe0"):
+        raise UnsupportedDocument("Legacy .doc files aren't supported; save the brief as .docx or PDF")
+    if extension in ("", ".txt", ".text", ".md", ".csv"):
+        return "txt"
+    raise UnsupportedDocument(f"Unsupported file type: {extension}")
+
+def _decode_text(data: bytes) -> str:
+    for bom, encoding in ((codecs.BOM_UTF8, "utf-8-sig"),
+                          (codecs.BOM_UTF16_LE, "utf-16"),
+                          (codecs.BOM_UTF16_BE, "utf-16")):
+        if data.startswith(bom):
+            return data.decode(encoding, errors="replace")
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+def _extract_pdf(data: bytes) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    pages = []
+    size = 0
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        pages.append(text)
+        size += len(text)
+        if size >= MAX_TEXT_CHARS:
+            break
+    return "\n".join(pages)
+
+def _extract_docx(data: bytes) -> str:
+    """Paragraph text from word/document.xml; tables and lists come through as paragraphs"""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        try:
+            document = archive.read("word/document.xml")
+        except KeyError:
+            raise UnsupportedDocument("Archive is not a Word document")
+
+    paragraphs = []
+    for paragraph in ElementTree.fromstring(document).iter(f"{_WORD_NAMESPACE}p"):
+        runs = []
+        for node in paragraph.iter():
+            if node.tag == f"{_WORD_NAMESPACE}t" and node.text:
+                runs.append(node.text)
+            elif node.tag == f"{_WORD_NAMESPACE}tab":
+                runs.append("\t")
+        paragraphs.append("".join(runs))
+    return "\n".join(paragraphs)
+
+def extract_text(data: bytes, format: str) -> str:
+    """Extract brief text from upload bytes; module-level so it runs in pool workers"""
+    if format == "pdf":
+        text = _extract_pdf(data)
+    elif format == "docx":
+        text = _extract_docx(data)
+    else:
+        text = _decode_text(data[:MAX_TEXT_CHARS * 4])
+    return text[:MAX_TEXT_CHARS].strip()
+
+def _read_upload(file: BinaryIO, filename: str, max_bytes: int) -> ReceivedUpload:
+    file.seek(0)
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    while True:
+        chunk = file.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes // (1024 * 1024)} MB limit")
+        digest.update(chunk)
+        chunks.append(chunk)
+    return ReceivedUpload(data=b"".join(chunks), filename=filename, size=size, sha256=digest.hexdigest())
+
+async def read_upload(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> ReceivedUpload:
+    """
+    Read and hash the file Starlette already spooled while parsing the form,
+    off the event loop. The request size itself is capped earlier by
+    UploadSizeLimit, before the form is parsed.
+    """
+    return await asyncio.to_thread(_read_upload, upload.file, upload.filename or "", max_bytes)
+
+class UploadSizeLimit:
+    """
+    ASGI middleware that caps request bodies on upload routes
+
+    FastAPI parses (and spools) the whole multipart body before the
+    handler runs, so the limit has to apply here: a too-large
+    Content-Length is refused outright, and a body that streams past the
+    limit without one is cut off as soon as it does. Either way the
+    client gets 413.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str], max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_bytes + MULTIPART_OVERHEAD_BYTES
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send):
+        response = JSONResponse(
+            {"detail": f"Upload exceeds {self.max_bytes // (1024 * 1024)} MB limit"}, status_code=413
+        )
+        await response(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_body_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    exceeded = True
+                    raise UploadTooLarge(f"Upload exceeds {self.max_bytes // (1024 * 1024)} MB limit")
+            return message
+
+        async def guarded_send(message: Message):
+            # Whatever error the app made of the aborted body is replaced by the 413
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await self._reject(scope, receive, send)
+
+class DocumentIngestor:
+    """
+    Turns uploaded briefs into text without blocking the event loop
+
+    Extraction runs in a process pool, and results are cached by content
+    hash. Identical uploads that arrive while one is still being extracted
+    wait on the same job instead of starting their own.
+    """
+
+    def __init__(self, workers: int = INGEST_WORKERS, cache_size: int = TEXT_CACHE_SIZE):
+        self.workers = workers
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=worker_context())
+        return self._executor
+
+    def _remember(self, sha256: str, text: str):
+        self._cache[sha256] = text
+        self._cache.move_to_end(sha256)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def ingest(self, upload: UploadFile) -> IngestedDocument:
+        received = await read_upload(upload)
+        format = detect_format(received.filename, received.data[:8])
+        document = IngestedDocument(
+            filename=received.filename, format=format, size=received.size,
+            sha256=received.sha256, text="", cached=True
+        )
+
+        if received.sha256 in self._cache:
+            self._cache.move_to_end(received.sha256)
+            document.text = self._cache[received.sha256]
+            return document
+
+        if received.sha256 in self._inflight:
+            document.text = await asyncio.shield(self._inflight[received.sha256])
+            return document
+
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self._pool(), extract_text, received.data, format)
+        self._inflight[received.sha256] = job
+        try:
+            text = await job
+        except IngestError:
+            raise
+        except Exception as e:
+            raise UnsupportedDocument(f"Could not read {format.upper()} document: {e}")
+        finally:
+            self._inflight.pop(received.sha256, None)
+
+        self._remember(received.sha256, text)
+        document.text = text
+        document.cached = False
+        return document
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+document_ingestor = DocumentIngestor()
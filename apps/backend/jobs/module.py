@@ -0,0 +1,227 @@
+from typing import Dict, Any, Awaitable, Callable, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+import asyncio
+import itertools
+import os
+import time
+import uuid
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+MAX_QUEUED_JOBS = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+
+# Finished jobs kept for polling before the oldest are forgotten
+JOB_HISTORY = 1000
+
+# Longest a single long-poll may hold a connection
+MAX_WAIT_SECONDS = 60.0
+
+MIN_PRIORITY = -10
+MAX_PRIORITY = 10
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+FINISHED = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+class QueueFull(Exception):
+    """Too many jobs are waiting; the caller should retry later"""
+
+@dataclass
+class Job:
+    id: str
+    payload: Dict[str, Any]
+    priority: int = 0
+    status: JobStatus = JobStatus.QUEUED
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # Bumped on every change, so long-polls can ask for "anything newer than N"
+    version: int = 0
+
+    def __post_init__(self):
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def update(self, **changes: Any):
+        for name, value in changes.items():
+            setattr(self, name, value)
+        self.version += 1
+        # Wake current waiters; later waiters get a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def summary(self, include_result: bool = True) -> Dict[str, Any]:
+        summary = {
+            "id": self.id,
+            "status": self.status.value,
+            "priority": self.priority,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "version": self.version
+        }
+        if include_result:
+            summary["result"] = self.result
+        return summary
+
+class JobQueue:
+    """
+    Background jobs on a bounded pool of worker tasks
+
+    Jobs wait in a priority queue (higher priority first, FIFO within a
+    priority) and at most `workers` run at once, so a burst of submissions
+    can't start unbounded LLM work. Queued jobs can be cancelled before
+    they start; running ones are cancelled at their next await. Jobs live
+    in the memory of the worker process that accepted them.
+    """
+
+    def __init__(self,
+                 runner: Callable[[Job], Awaitable[Any]],
+                 workers: int = JOB_WORKERS,
+                 max_queued: int = MAX_QUEUED_JOBS,
+                 history: int = JOB_HISTORY):
+        self.runner = runner
+        self.workers = workers
+        self.max_queued = max_queued
+        self.history = history
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sequence = itertools.count()
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def start(self):
+        """Start the worker tasks on the running loop; idempotent"""
+        loop = asyncio.get_running_loop()
+        if self._workers and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        for job in self._jobs.values():
+            if job.status == JobStatus.QUEUED:
+                self._enqueue(job)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        # Workers cancel their running job on the way out; cancelling the job
+        # first would look like a per-job cancel and the worker would carry on
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _enqueue(self, job: Job):
+        self._queue.put_nowait((-job.priority, next(self._sequence), job.id))
+
+    def queued(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == JobStatus.QUEUED)
+
+    def submit(self, payload: Dict[str, Any], priority: int = 0) -> Job:
+        if self.queued() >= self.max_queued:
+            raise QueueFull(f"{self.max_queued} jobs are already queued")
+        self.start()
+
+        job = Job(id=uuid.uuid4().hex, payload=payload, priority=max(MIN_PRIORITY, min(MAX_PRIORITY, int(priority))))
+        self._jobs[job.id] = job
+        self._enqueue(job)
+        self._forget_finished()
+        return job
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, status: Optional[str] = None) -> List[Job]:
+        return [job for job in reversed(self._jobs.values()) if status is None or job.status.value == status]
+
+    async def wait(self, job_id: str, timeout: float, since_version: Optional[int] = None) -> Optional[Job]:
+        """
+        Long-poll: return once the job has changed since `since_version`
+        (or has finished, when no version is given), or when `timeout` runs out
+        """
+        job = self._jobs.get(job_id)
+        deadline = time.monotonic() + min(max(timeout, 0.0), MAX_WAIT_SECONDS)
+        while job is not None and not job.finished:
+            if since_version is not None and job.version > since_version:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(job._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.status == JobStatus.QUEUED:
+            # Left in the heap; workers skip it when it comes up
+            self.cancelled += 1
+            job.update(status=JobStatus.CANCELLED, finished_at=time.time())
+        elif job._task is not None:
+            job._task.cancel()
+        return job
+
+    async def _work(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.QUEUED:
+                continue
+
+            job.update(status=JobStatus.RUNNING, started_at=time.time())
+            job._task = asyncio.create_task(self.runner(job))
+            try:
+                result = await asyncio.shield(job._task)
+                self.completed += 1
+                job.update(status=JobStatus.SUCCEEDED, result=result, finished_at=time.time())
+            except asyncio.CancelledError:
+                stopping = not job._task.cancelled()
+                if stopping:
+                    # The worker itself is being stopped; take the job down with it
+                    job._task.cancel()
+                self.cancelled += 1
+                job.update(status=JobStatus.CANCELLED, finished_at=time.time())
+                if stopping:
+                    raise
+            except Exception as e:
+                self.failed += 1
+                job.update(status=JobStatus.FAILED, error=str(e), finished_at=time.time())
+            finally:
+                job._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": sum(1 for job in self._jobs.values() if job.status == JobStatus.RUNNING),
+            "queued": self.queued(),
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled
+        }
@@ -1,18 +1,70 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.encoders import jsonable_encoder
 from parser.module import parse_campaign
-from prefs.module import get_preferences
-from audience.module import list_segments
+from ingest.module import document_ingestor, UploadSizeLimit, UploadTooLarge, IngestError
+from archive.module import campaign_archive
+from prefs.module import get_preferences_async, preferences_catalog
+from audience.module import list_segments_async, segments_catalog
+from monitor.module import loop_monitor
+from jobs.module import Job, JobQueue, QueueFull
+from admission.module import agent_admission, load_shedder, Overloaded
+from idempotency.module import (
+    IDEMPOTENCY_HEADER, StoredResponse, IdempotencyMismatch, IdempotencyInProgress,
+    idempotency_store, request_fingerprint
+)
 from planner.module import build_plan
-from exporter.module import export_csv
+from exporter.module import (
+    StructureExport, export_csv, export_parquet, export_parquet_dataset,
+    iter_csv, csv_filename, iter_zip, zip_filename
+)
+from exporter.adserver import iter_adserver, adserver_filename
+from exporter.store import export_store, etag_for, last_modified_for, is_not_modified
 from models.campaign import CampaignSpec, CampaignPlan
-from agents.multi_agent_orchestrator import MultiAgentOrchestrator
+from agents.multi_agent_orchestrator import MultiAgentOrchestrator, WorkflowStep
+from agents.state_backend import WorkflowSessions, StaleStateError, create_state_backend, DEFAULT_SESSION
+from agents.step_cache import step_cache
+from agents.campaign_parser import parse_flight_window
+from agents.vector_snapshot import load_vector_snapshot
+from agents.compute_pool import compute_pool
+from warmup.module import StartupReport, WARMUP_ON_STARTUP
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import functools
+import importlib
+import json
+import mimetypes
 import os
 
+startup_report = StartupReport(_import_started)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_report.mark_serving()
+    loop_monitor.start()
+    plan_jobs.start()
+    compute_pool.start()
+    # Warm in the background so the port opens immediately; /ready reports when it's done
+    warmup_task = asyncio.create_task(startup_report.warm_up(warmup_tasks())) if WARMUP_ON_STARTUP else None
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    await plan_jobs.stop()
+    await loop_monitor.stop()
+    document_ingestor.shutdown()
+    compute_pool.shutdown()
+
 # Create FastAPI app
-app = FastAPI(title="CTV Campaign Management API", version="1.0.0")
+app = FastAPI(title="CTV Campaign Management API", version="1.0.0", lifespan=lifespan)
+
+# Cap upload bodies before FastAPI parses the form (added first so CORS still wraps the 413)
+app.add_middleware(UploadSizeLimit, paths=("/parse", "/ingest"))
 
 # Add CORS middleware
 app.add_middleware(
@@ -21,99 +73,527 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the browser read retry hints and replay markers on cross-origin responses
+    expose_headers=["Retry-After", "Idempotent-Replayed"],
+)
+
+# Workflow state is persisted per session, so any worker can serve any step.
+# Interactive steps fall back to the deterministic agents while admission is overloaded,
+# and speculative steps run in low-priority admission slots.
+sessions = WorkflowSessions(
+    create_state_backend(),
+    functools.partial(MultiAgentOrchestrator,
+                      shed_load=load_shedder.should_shed,
+                      speculation_slot=agent_admission.admit_background)
 )
 
-# Initialize Multi-Agent Orchestrator
-orchestrator = MultiAgentOrchestrator()
+# Clients send this header to keep separate workflows; omitted means the shared default session
+SESSION_HEADER = "X-Session-ID"
 
-# Mount static files for exports
-exports_dir = os.path.join(os.path.dirname(__file__), "data", "exports")
-os.makedirs(exports_dir, exist_ok=True)
-app.mount("/exports", StaticFiles(directory=exports_dir), name="exports")
 
 class AgentRequest(BaseModel):
     input: str
     files: list = []
 
+class EditRequest(BaseModel):
+    edits: Dict[str, Any]
+
+class ScenarioRequest(BaseModel):
+    input: Optional[str] = None
+    grid: Dict[str, List[Any]]
+
+class ReachSimulationRequest(BaseModel):
+    households: int = 1_000_000
+    seed: int = 0
+
+class DatasetExportRequest(BaseModel):
+    name: str
+    specs: List[CampaignSpec]
+
+class BulkExportRequest(BaseModel):
+    specs: List[CampaignSpec] = []
+    include_agent_plan: bool = False
+
+class PlanJobRequest(BaseModel):
+    input: str
+    priority: int = 0
+
+def agent_plan_export(orchestrator: MultiAgentOrchestrator) -> StructureExport:
+    """The orchestrator's current campaign structure, ready for the exporter"""
+    structure = orchestrator.campaign_structure
+    parameters = orchestrator.campaign_parameters
+    if structure is None or parameters is None:
+        raise HTTPException(status_code=400, detail="No campaign structure has been generated yet")
+    
+    flight_start, flight_end = parse_flight_window(parameters.timeline)
+    return StructureExport(
+        structure=structure,
+        name=parameters.advertiser,
+        objective=parameters.objective,
+        start_date=flight_start,
+        end_date=flight_end
+    )
+
+def too_busy(e: Overloaded) -> HTTPException:
+    """429 telling the client when to come back, instead of an error it would retry immediately"""
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def idempotent(key: Optional[str],
+                     scope: str,
+                     payload: Any,
+                     handler: Callable[[], Awaitable[Any]],
+                     status_code: int = 200):
+    """
+    Run an endpoint handler at most once per Idempotency-Key.
+    Retries (including ones that arrive mid-request) get the first
+    response back byte for byte, marked with Idempotent-Replayed: true.
+    """
+    if key is None:
+        return await handler()
+    
+    async def execute() -> StoredResponse:
+        try:
+            result = await handler()
+            return StoredResponse(status_code, json.dumps(jsonable_encoder(result)).encode("utf-8"), {})
+        except HTTPException as e:
+            return StoredResponse(e.status_code, json.dumps({"detail": e.detail}).encode("utf-8"), dict(e.headers or {}))
+    
+    try:
+        stored, replayed = await idempotency_store.run(
+            scope, key, request_fingerprint(jsonable_encoder(payload)), execute
+        )
+    except IdempotencyMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "5"})
+    
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={**stored.headers, "Idempotent-Replayed": "true" if replayed else "false"}
+    )
+
+async def archive_workflow(orchestrator: MultiAgentOrchestrator, session_id: str) -> int:
+    """Export the finished plan and file the workflow in the campaign archive"""
+    csv_url = await asyncio.to_thread(export_csv, agent_plan_export(orchestrator))
+    return await asyncio.to_thread(
+        campaign_archive.add, orchestrator.snapshot_state(), {"csv": csv_url}, session_id
+    )
+
 @app.get("/")
 async def root():
     return {"message": "Neural CTV Campaign Management API", "status": "running", "system": "multi-agent"}
 
-@app.post("/agent/process")
-async def process_agent_request(request: AgentRequest):
+async def process_agent_step(request: AgentRequest, session_id: str) -> Dict[str, Any]:
     """Process campaign request through Multi-Agent Orchestrator"""
     try:
-        # Process through orchestrator
-        result = await orchestrator.process_step(request.input)
+        async with agent_admission.admit(session_id):
+            orchestrator = await sessions.checkout(session_id)
         
-        # Get current status
-        status = orchestrator.get_current_status()
+            # Process through orchestrator
+            result = await orchestrator.process_step(request.input)
+            await sessions.commit(session_id, orchestrator)
         
-        return {
-            "step": result.step.value,
-            "reasoning": result.reasoning,
-            "action": result.action,
-            "data": result.data,
-            "confidence": result.confidence,
-            "progress": status["progress"],
-            "current_step": status["current_step"],
-            "avatar_state": status["avatar_state"],
-            "status": "success"
-        }
+            archive_id = None
+            if result.step == WorkflowStep.CAMPAIGN_GENERATION:
+                archive_id = await archive_workflow(orchestrator, session_id)
+        
+            # Get current status
+            status = orchestrator.get_current_status()
+        
+            return {
+                "step": result.step.value,
+                "reasoning": result.reasoning,
+                "action": result.action,
+                "data": result.data,
+                "confidence": result.confidence,
+                "degraded": result.degraded,
+                "progress": status["progress"],
+                "current_step": status["current_step"],
+                "avatar_state": status["avatar_state"],
+                "archive_id": archive_id,
+                "status": "success"
+            }
+    except Overloaded as e:
+        raise too_busy(e)
+    except StaleStateError as e:
+        raise HTTPException(status_code=409, detail=f"Agent processing conflict: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent processing error: {str(e)}")
 
+@app.post("/agent/process")
+async def process_agent_request(request: AgentRequest,
+                                session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER),
+                                idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)):
+    """Process the current step; a retried Idempotency-Key replays the first response"""
+    return await idempotent(idempotency_key, f"agent/process:{session_id}", request.dict(),
+                            lambda: process_agent_step(request, session_id))
+
+@app.get("/agent/sessions")
+async def list_agent_sessions():
+    """Persisted workflow sessions, most recently updated first"""
+    try:
+        return {"sessions": await asyncio.to_thread(sessions.backend.sessions)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Session error: {str(e)}")
+
+@app.get("/agent/cache")
+async def step_cache_stats():
+    """Cross-session step result cache counters"""
+    return step_cache.stats()
+
+@app.post("/agent/data/reload")
+async def reload_advertiser_data(session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER)):
+    """Reload the advertiser vector database and invalidate cached step results built from it"""
+    try:
+        async with agent_admission.admit(session_id):
+            orchestrator = await sessions.checkout(session_id)
+            data_version = await asyncio.to_thread(orchestrator.reload_data)
+            # Other warm sessions in this worker must not keep serving the old snapshot
+            snapshot = orchestrator.preferences_agent.snapshot
+            sessions.invalidate_caches(snapshot, skip=orchestrator)
+            return {
+                "data_version": data_version,
+                "snapshot": snapshot.stats() if snapshot else None,
+                "cache": step_cache.stats()
+            }
+    except Overloaded as e:
+        raise too_busy(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload error: {str(e)}")
+
 @app.get("/agent/status")
-async def get_agent_status():
+async def get_agent_status(session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER)):
     """Get current multi-agent orchestrator status"""
     try:
+        orchestrator = await sessions.checkout(session_id)
         status = orchestrator.get_current_status()
         return status
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Status error: {str(e)}")
 
-@app.post("/agent/advance")
-async def advance_agent_step():
+async def advance_workflow_step(session_id: str) -> Dict[str, Any]:
     """Advance orchestrator to next step"""
     try:
-        next_step = orchestrator.advance_step()
-        status = orchestrator.get_current_status()
-        return {
-            "current_step": next_step.value,
-            "status": status
-        }
+        async with agent_admission.admit(session_id):
+            orchestrator = await sessions.checkout(session_id)
+            next_step = orchestrator.advance_step()
+            await sessions.commit(session_id, orchestrator)
+            status = orchestrator.get_current_status()
+            return {
+                "current_step": next_step.value,
+                "status": status
+            }
+    except Overloaded as e:
+        raise too_busy(e)
+    except StaleStateError as e:
+        raise HTTPException(status_code=409, detail=f"Advance conflict: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Advance error: {str(e)}")
 
+@app.post("/agent/advance")
+async def advance_agent_step(session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER),
+                             idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)):
+    """Advance orchestrator to next step; a retried Idempotency-Key doesn't advance twice"""
+    return await idempotent(idempotency_key, f"agent/advance:{session_id}", None,
+                            lambda: advance_workflow_step(session_id))
+
 @app.post("/agent/reset")
-async def reset_workflow():
+async def reset_workflow(session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER)):
     """Reset workflow to initial state"""
     try:
-        orchestrator.reset_workflow()
-        status = orchestrator.get_current_status()
+        # Queued behind any in-flight step of this session, which would otherwise write into the reset state
+        async with agent_admission.admit(session_id):
+            orchestrator = await sessions.checkout(session_id)
+            orchestrator.reset_workflow()
+            await sessions.commit(session_id, orchestrator)
+            status = orchestrator.get_current_status()
+            return {
+                "message": "Workflow reset successfully",
+                "status": status
+            }
+    except Overloaded as e:
+        raise too_busy(e)
+    except StaleStateError as e:
+        raise HTTPException(status_code=409, detail=f"Reset conflict: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reset error: {str(e)}")
+
+@app.post("/agent/simulate/reach")
+async def simulate_reach_endpoint(request: ReachSimulationRequest, session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER)):
+    """Monte Carlo reach/frequency curves for the generated campaign"""
+    try:
+        async with agent_admission.admit(session_id):
+            orchestrator = await sessions.checkout(session_id)
+            report = await asyncio.to_thread(
+                orchestrator.simulate_campaign_reach,
+                panel_households=request.households,
+                seed=request.seed
+            )
+            return report.summary()
+    except Overloaded as e:
+        raise too_busy(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Simulation error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
+
+async def apply_workflow_edits(request: EditRequest, session_id: str) -> Dict[str, Any]:
+    """Apply brief edits and recompute only the invalidated workflow steps"""
+    try:
+        async with agent_admission.admit(session_id):
+            orchestrator = await sessions.checkout(session_id)
+            outcome = await orchestrator.edit_campaign(request.edits)
+            await sessions.commit(session_id, orchestrator)
+            status = orchestrator.get_current_status()
+        
+            # A re-planned campaign the user has already reached is archived as a new entry
+            archive_id = None
+            if (WorkflowStep.CAMPAIGN_GENERATION.value in outcome["recomputed"]
+                    and WorkflowStep.CAMPAIGN_GENERATION in orchestrator.step_results):
+                archive_id = await archive_workflow(orchestrator, session_id)
+        
+            return {
+                "recomputed": outcome["recomputed"],
+                "reused": outcome["reused"],
+                "results": {
+                    step: {
+                        "reasoning": result.reasoning,
+                        "action": result.action,
+                        "data": result.data,
+                        "confidence": result.confidence,
+                        "degraded": result.degraded
+                    }
+                    for step, result in outcome["results"].items()
+                },
+                "progress": status["progress"],
+                "current_step": status["current_step"],
+                "archive_id": archive_id,
+                "status": "success"
+            }
+    except Overloaded as e:
+        raise too_busy(e)
+    except StaleStateError as e:
+        raise HTTPException(status_code=409, detail=f"Edit conflict: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Edit error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Edit error: {str(e)}")
+
+@app.post("/agent/edit")
+async def edit_agent_workflow(request: EditRequest,
+                              session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER),
+                              idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)):
+    """Apply brief edits; a retried Idempotency-Key replays the first response"""
+    return await idempotent(idempotency_key, f"agent/edit:{session_id}", request.dict(),
+                            lambda: apply_workflow_edits(request, session_id))
+
+@app.post("/agent/scenarios")
+async def scenarios_endpoint(request: ScenarioRequest, session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER)):
+    """Compare budget, objective and flight variants of a plan"""
+    try:
+        async with agent_admission.admit(session_id):
+            orchestrator = await sessions.checkout(session_id)
+            scenarios = await orchestrator.run_scenarios(request.grid, user_input=request.input)
+            return {"scenarios": scenarios, "total_scenarios": len(scenarios)}
+    except Overloaded as e:
+        raise too_busy(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Scenario error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Scenario error: {str(e)}")
+
+@app.post("/agent/export")
+async def export_agent_plan(session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER)):
+    """Export the multi-agent campaign structure to CSV."""
+    source = agent_plan_export(await sessions.checkout(session_id))
+    try:
+        csv_url = await asyncio.to_thread(export_csv, source)
+        return {"csvUrl": csv_url, "line_items": len(source.structure.line_items)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
+
+@app.get("/agent/export/csv")
+async def export_agent_plan_csv(session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER)):
+    """Stream the multi-agent campaign structure as a CSV download."""
+    source = agent_plan_export(await sessions.checkout(session_id))
+    return StreamingResponse(
+        iter_csv(source),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{csv_filename(source)}"'}
+    )
+
+@app.get("/agent/export/adserver")
+async def export_agent_plan_adserver(format: str = "jsonl", batch_size: int = 500, session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER)):
+    """Stream the multi-agent campaign structure as an ad-server bulk upload."""
+    source = agent_plan_export(await sessions.checkout(session_id))
+    try:
+        body = iter_adserver(source, format, batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        body,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{adserver_filename(source, format)}"'}
+    )
+
+async def run_plan_job(job: Job) -> Dict[str, Any]:
+    """Run every workflow step for a job's brief on a private orchestrator and archive the plan"""
+    # Background plans aren't latency-bound, so they keep LLM routing under load
+    orchestrator = MultiAgentOrchestrator()
+    try:
+        async for result in orchestrator.run_all_steps(job.payload["input"]):
+            status = orchestrator.get_current_status()
+            job.update(progress={"step": result.step.value, "progress": status["progress"]})
+        
         return {
-            "message": "Workflow reset successfully",
-            "status": status
+            "archive_id": await archive_workflow(orchestrator, None),
+            "steps": {
+                step.value: {"reasoning": result.reasoning, "action": result.action,
+                             "data": result.data, "confidence": result.confidence,
+                             "degraded": result.degraded}
+                for step, result in orchestrator.step_results.items()
+            }
         }
+    finally:
+        # Stops any speculative step still running for this job
+        orchestrator.reset_workflow()
+
+plan_jobs = JobQueue(run_plan_job)
+
+async def queue_plan_job(request: PlanJobRequest) -> Dict[str, Any]:
+    """Queue a full four-step plan for a brief; poll GET /jobs/{id} for the result"""
+    try:
+        job = plan_jobs.submit({"input": request.input}, priority=request.priority)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    return job.summary()
+
+@app.post("/jobs", status_code=202)
+async def submit_plan_job(request: PlanJobRequest,
+                          idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)):
+    """Queue a full plan; a retried Idempotency-Key returns the same job instead of queueing another"""
+    return await idempotent(idempotency_key, "jobs", request.dict(),
+                            lambda: queue_plan_job(request), status_code=202)
+
+@app.get("/jobs")
+async def list_plan_jobs(status: Optional[str] = None):
+    """Known jobs, newest first, without results"""
+    return {
+        "jobs": [job.summary(include_result=False) for job in plan_jobs.list(status)],
+        "stats": plan_jobs.stats()
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_plan_job(job_id: str, wait: float = 0, since: Optional[int] = None):
+    """
+    Job status and, once finished, its result.
+    With wait > 0 this long-polls: it answers when the job finishes, or
+    when its version moves past `since`, or after `wait` seconds.
+    """
+    job = await plan_jobs.wait(job_id, wait, since) if wait > 0 else plan_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.summary()
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_plan_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = plan_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.summary(include_result=False)
+
+@app.get("/archive")
+async def search_archive(q: Optional[str] = None,
+                         advertiser: Optional[str] = None,
+                         objective: Optional[str] = None,
+                         date_from: Optional[str] = None,
+                         date_to: Optional[str] = None,
+                         page: int = 1,
+                         page_size: int = 20):
+    """Search archived campaigns by text, advertiser, objective and date."""
+    try:
+        return await asyncio.to_thread(
+            campaign_archive.search, q, advertiser, objective, date_from, date_to, page, page_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Archive query error: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Reset error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Archive error: {str(e)}")
+
+@app.get("/archive/{campaign_id}")
+async def get_archived_campaign(campaign_id: int):
+    """Archived campaign with its brief and step results."""
+    campaign = await asyncio.to_thread(campaign_archive.get, campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Archived campaign not found")
+    return campaign
+
+@app.post("/archive/{campaign_id}/clone")
+async def clone_archived_campaign(campaign_id: int, session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER)):
+    """Restore an archived campaign into the session without re-running any agent."""
+    state = await asyncio.to_thread(campaign_archive.load_state, campaign_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Archived campaign not found")
+    
+    try:
+        async with agent_admission.admit(session_id):
+            orchestrator = await sessions.checkout(session_id)
+            orchestrator.restore_state(state, orchestrator.state_version)
+            await sessions.commit(session_id, orchestrator)
+            return {
+                "message": f"Cloned archived campaign {campaign_id}",
+                "status": orchestrator.get_current_status()
+            }
+    except Overloaded as e:
+        raise too_busy(e)
+    except StaleStateError as e:
+        raise HTTPException(status_code=409, detail=f"Clone conflict: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Clone error: {str(e)}")
+
+@app.delete("/archive/{campaign_id}")
+async def delete_archived_campaign(campaign_id: int):
+    """Remove a campaign from the archive."""
+    if not await asyncio.to_thread(campaign_archive.delete, campaign_id):
+        raise HTTPException(status_code=404, detail="Archived campaign not found")
+    return {"message": f"Deleted archived campaign {campaign_id}"}
 
 @app.post("/parse", response_model=CampaignSpec)
 async def parse_endpoint(file: UploadFile = File(...)):
-    """Parse campaign specification from uploaded text file."""
+    """Parse campaign specification from an uploaded PDF, DOCX or text brief."""
     try:
-        content = await file.read()
-        text = content.decode('utf-8')
-        campaign_spec = parse_campaign(text)
+        document = await document_ingestor.ingest(file)
+        campaign_spec = parse_campaign(document.text)
         return campaign_spec
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestError as e:
+        raise HTTPException(status_code=415, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error parsing file: {str(e)}")
 
+@app.post("/ingest")
+async def ingest_endpoint(file: UploadFile = File(...)):
+    """Extract brief text from an uploaded PDF, DOCX or text file."""
+    try:
+        document = await document_ingestor.ingest(file)
+        return {**document.summary(), "text": document.text}
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ingestion error: {str(e)}")
+
 @app.get("/preferences/{adv_id}")
 async def prefs_endpoint(adv_id: str):
     """Get advertiser preferences by ID."""
     try:
-        preferences = get_preferences(adv_id)
+        preferences = await get_preferences_async(adv_id)
         return preferences
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Preferences not found: {str(e)}")
@@ -122,20 +602,19 @@ async def prefs_endpoint(adv_id: str):
 async def segments_endpoint():
     """List all available audience segments."""
     try:
-        segments = list_segments()
+        segments = await list_segments_async()
         return {"segments": segments}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading segments: {str(e)}")
 
-@app.post("/plan")
-async def plan_endpoint(spec: CampaignSpec):
+async def generate_plan(spec: CampaignSpec) -> Dict[str, Any]:
     """Generate campaign plan and export to CSV."""
     try:
         # Build the plan
         plan = build_plan(spec)
         
-        # Export to CSV
-        csv_url = export_csv(plan)
+        # Export to CSV off the event loop
+        csv_url = await asyncio.to_thread(export_csv, plan)
         
         return {
             "plan": plan.dict(),
@@ -145,11 +624,187 @@ async def plan_endpoint(spec: CampaignSpec):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating plan: {str(e)}")
 
+@app.post("/plan")
+async def plan_endpoint(spec: CampaignSpec,
+                        idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)):
+    """Generate campaign plan and export to CSV; a retried Idempotency-Key replays the first response"""
+    return await idempotent(idempotency_key, "plan", spec.dict(), lambda: generate_plan(spec))
+
+@app.post("/plan/csv")
+async def plan_csv_endpoint(spec: CampaignSpec):
+    """Generate campaign plan and stream it as a CSV download."""
+    try:
+        plan = build_plan(spec)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating plan: {str(e)}")
+    
+    return StreamingResponse(
+        iter_csv(plan),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{csv_filename(plan)}"'}
+    )
+
+@app.post("/plan/parquet")
+async def plan_parquet_endpoint(spec: CampaignSpec):
+    """Generate campaign plan and export to Parquet."""
+    try:
+        plan = build_plan(spec)
+        parquet_url = await asyncio.to_thread(export_parquet, plan)
+        
+        return {
+            "plan": plan.dict(),
+            "parquetUrl": parquet_url,
+            "summary": plan.summary
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating plan: {str(e)}")
+
+@app.post("/plans/dataset")
+async def plans_dataset_endpoint(request: DatasetExportRequest):
+    """Build many plans and append them to a partitioned Parquet dataset."""
+    try:
+        plans = [build_plan(spec) for spec in request.specs]
+        return await asyncio.to_thread(export_parquet_dataset, plans, request.name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting dataset: {str(e)}")
+
+@app.post("/plan/adserver")
+async def plan_adserver_endpoint(spec: CampaignSpec, format: str = "jsonl", batch_size: int = 500):
+    """Generate campaign plan and stream it as an ad-server bulk upload."""
+    try:
+        plan = build_plan(spec)
+        body = iter_adserver(plan, format, batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating plan: {str(e)}")
+    
+    return StreamingResponse(
+        body,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{adserver_filename(plan, format)}"'}
+    )
+
+@app.post("/plans/zip")
+async def plans_zip_endpoint(request: BulkExportRequest, session_id: str = Header(DEFAULT_SESSION, alias=SESSION_HEADER)):
+    """Build many plans and stream their CSVs as one zip download."""
+    try:
+        sources = [build_plan(spec) for spec in request.specs]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating plan: {str(e)}")
+    
+    if request.include_agent_plan:
+        sources.append(agent_plan_export(await sessions.checkout(session_id)))
+    if not sources:
+        raise HTTPException(status_code=400, detail="No campaigns to export")
+    
+    return StreamingResponse(
+        iter_zip(sources),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{zip_filename(sources)}"'}
+    )
+
+@app.get("/exports/{path:path}")
+async def download_export(path: str, request: Request):
+    """
+    Serve an export from the disk-bounded store.
+    Conditional requests get 304s, gzip-capable clients get a cached gzip
+    copy of text formats, and Range requests are served from the raw file.
+    """
+    file_path = export_store.resolve(path)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="Export not found")
+    await asyncio.to_thread(export_store.touch, path)
+    
+    headers = {
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "Last-Modified": last_modified_for(file_path)
+    }
+    
+    gzip_path = None
+    if "range" not in request.headers and "gzip" in request.headers.get("accept-encoding", ""):
+        gzip_path = await asyncio.to_thread(export_store.gzip_variant, path)
+    
+    headers["ETag"] = etag_for(file_path, "gzip" if gzip_path else "")
+    if is_not_modified(request.headers, headers["ETag"], file_path):
+        return Response(status_code=304, headers=headers)
+    
+    if gzip_path:
+        headers["Content-Encoding"] = "gzip"
+        media_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        return FileResponse(gzip_path, media_type=media_type, headers=headers)
+    
+    return FileResponse(file_path, headers=headers)
+
+@app.get("/storage/exports")
+async def export_storage_stats():
+    """Disk usage and eviction counters for the exports store."""
+    return export_store.stats()
+
+def warmup_tasks() -> Dict[str, Any]:
+    """Everything first requests would otherwise load lazily, in dependency order"""
+
+    async def default_session():
+        orchestrator = await sessions.checkout(DEFAULT_SESSION)
+        agents = (orchestrator.campaign_parser, orchestrator.preferences_agent,
+                  orchestrator.audience_agent, orchestrator.lineitem_agent)
+        # Client construction builds httpx pools; keep it off the loop
+        await asyncio.to_thread(lambda: [agent.client for agent in agents])
+        orchestrator.preferences_agent.snapshot
+
+    return {
+        "vector_snapshot": load_vector_snapshot,
+        "openai": lambda: importlib.import_module("openai"),
+        "parquet": lambda: (importlib.import_module("pandas"), importlib.import_module("pyarrow.parquet")),
+        "catalogs": lambda: (segments_catalog.get(), preferences_catalog.get()),
+        "default_session": default_session
+    }
+
+@app.post("/warmup")
+async def warmup():
+    """Preload snapshots, agents and caches; safe to call repeatedly."""
+    return await startup_report.warm_up(warmup_tasks())
+
+@app.get("/metrics/admission")
+async def admission_metrics():
+    """Agent request slots, wait-queue depth and queue wait percentiles."""
+    return agent_admission.stats()
+
+@app.get("/metrics/shedding")
+async def load_shedding_metrics():
+    """Whether agent steps are currently served by deterministic fallbacks, and the thresholds."""
+    return load_shedder.stats()
+
+@app.get("/metrics/idempotency")
+async def idempotency_metrics():
+    """Requests executed under an Idempotency-Key versus replayed from the store."""
+    return idempotency_store.stats()
+
+@app.get("/metrics/loop")
+async def loop_lag_metrics():
+    """Event-loop lag percentiles; sustained lag means something is blocking the loop."""
+    return loop_monitor.stats()
+
+@app.get("/startup")
+async def startup_status():
+    """Import, serve and ready timings plus per-task warm-up cost."""
+    return startup_report.report()
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness probe: 503 until warm-up has completed."""
+    if not startup_report.ready:
+        response.status_code = 503
+    return {"ready": startup_report.ready, "ready_after": startup_report.report()["ready_after"]}
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "service": "neural-backend", "system": "multi-agent"}
 
+startup_report.mark_imported()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,79 @@
+from typing import Dict, Any, List, Optional
+from collections import deque
+import asyncio
+import math
+import os
+
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "250"))
+
+# Samples kept for percentiles (one minute at the default interval)
+LOOP_LAG_WINDOW = 600
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile; 0.0 for no samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes from a fixed-interval sleep
+
+    Anything that blocks the loop thread - synchronous file I/O, CPU-bound
+    parsing - delays every coroutine at once, and shows up here as lag.
+    A responsive loop stays within a millisecond or two of the interval.
+    """
+
+    def __init__(self,
+                 interval_ms: float = LOOP_LAG_INTERVAL_MS,
+                 warn_ms: float = LOOP_LAG_WARN_MS,
+                 window: int = LOOP_LAG_WINDOW):
+        self.interval = interval_ms / 1000
+        self.warn_ms = warn_ms
+        self._samples: "deque[float]" = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.max_lag_ms = 0.0
+        self.stalls = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, loop.time() - expected) * 1000
+            self._samples.append(lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if lag_ms >= self.warn_ms:
+                self.stalls += 1
+                print(f"⚠️ Event loop blocked for {lag_ms:.0f} ms")
+
+    def stats(self) -> Dict[str, Any]:
+        samples = list(self._samples)
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_ms": self.interval * 1000,
+            "samples": len(samples),
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "max_ms": round(self.max_lag_ms, 2),
+            "stalls": self.stalls,
+            "stall_threshold_ms": self.warn_ms
+        }
+
+loop_monitor = LoopLagMonitor()
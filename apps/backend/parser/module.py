@@ -1,21 +1,25 @@
 from models.campaign import CampaignSpec
-from typing import Dict, Any
-import json
-import re
+from agents.campaign_parser import rule_parse_brief, parse_flight_window
 from datetime import datetime
 
 def parse_campaign(text: str) -> CampaignSpec:
     """
     Parse campaign specification from text input.
-    TODO: implement LLM+regex parsing
+    Uses the deterministic brief parser; field confidences are kept in preferences.
     """
-    # For now, return a basic mock campaign spec
-    # In the future, this would use OpenAI API + regex patterns
+    parameters = rule_parse_brief(text)
+    start_date, end_date = parse_flight_window(parameters.timeline)
+
     return CampaignSpec(
-        name="Parsed Campaign",
-        total_budget=100000.0,
-        start_date=datetime.now(),
-        end_date=datetime.now(),
-        objective="Awareness",
-        description=f"Parsed from: {text[:100]}..."
-    ) 
\ No newline at end of file
+        name=f"{parameters.advertiser} {parameters.objective.title()} Campaign",
+        total_budget=parameters.budget,
+        start_date=datetime.combine(start_date, datetime.min.time()),
+        end_date=datetime.combine(end_date, datetime.min.time()),
+        objective=parameters.objective.title(),
+        description=f"Parsed from: {text[:100]}...",
+        preferences={
+            "advertiser": parameters.advertiser,
+            "parse_confidence": parameters.confidence,
+            **parameters.additional_requirements
+        }
+    )
@@ -1,6 +1,23 @@
 import json
 import os
 from typing import Dict, Any
+from catalog.module import FileCatalog
+
+PREFS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "prefs", "sample_adv.json")
+
+def _load_preferences(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {
+            "networks": ["Hulu", "Roku", "Tubi"],
+            "genres": ["Sports", "Comedy", "Drama"],
+            "devices": ["SmartTV", "Mobile"],
+            "locations": ["Los Angeles", "New York", "Chicago"]
+        }
+
+preferences_catalog = FileCatalog(PREFS_PATH, _load_preferences)
 
 def get_preferences(adv_id: str) -> Dict[str, Any]:
     """
@@ -8,22 +25,14 @@ def get_preferences(adv_id: str) -> Dict[str, Any]:
     Currently reads from sample JSON file.
     """
     # For now, return the sample preferences regardless of adv_id
-    prefs_path = os.path.join(os.path.dirname(__file__), "..", "data", "prefs", "sample_adv.json")
-    
-    try:
-        with open(prefs_path, 'r') as f:
-            prefs = json.load(f)
-        return {
-            "advertiser_id": adv_id,
-            "preferences": prefs
-        }
-    except FileNotFoundError:
-        return {
-            "advertiser_id": adv_id,
-            "preferences": {
-                "networks": ["Hulu", "Roku", "Tubi"],
-                "genres": ["Sports", "Comedy", "Drama"],
-                "devices": ["SmartTV", "Mobile"],
-                "locations": ["Los Angeles", "New York", "Chicago"]
-            }
-        } 
\ No newline at end of file
+    return {
+        "advertiser_id": adv_id,
+        "preferences": preferences_catalog.get()
+    }
+
+async def get_preferences_async(adv_id: str) -> Dict[str, Any]:
+    """get_preferences for async endpoints; served from memory, file checks run off the loop"""
+    return {
+        "advertiser_id": adv_id,
+        "preferences": await preferences_catalog.aget()
+    }
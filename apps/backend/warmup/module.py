@@ -0,0 +1,97 @@
+from typing import Dict, Any, Awaitable, Callable, Optional, Union
+import asyncio
+import inspect
+import os
+import time
+
+# Start warming in the background as soon as the app starts serving
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+WarmupTask = Callable[[], Union[Any, Awaitable[Any]]]
+
+def _process_started() -> Optional[float]:
+    """Process start as a perf_counter reading, from /proc (Linux only)"""
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            # Field 22 is start time in clock ticks since boot; comm (field 2) may contain spaces
+            fields = f.read().rsplit(b")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+        age = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+        return time.perf_counter() - age
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StartupReport:
+    """
+    Where startup time goes, from process start to ready
+
+    Importing the app only loads what every request needs; agents, LLM
+    clients, the vector snapshot and Parquet support load on first use.
+    warm_up() pays those costs up front and records each one, and the
+    app counts as ready once it has finished.
+    """
+
+    def __init__(self, import_started: float):
+        self.process_started = _process_started()
+        self.import_started = import_started
+        self.imported_at: Optional[float] = None
+        self.serving_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self._warmup_lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def mark_imported(self):
+        self.imported_at = time.perf_counter()
+
+    def mark_serving(self):
+        self.serving_at = time.perf_counter()
+
+    async def warm_up(self, tasks: Dict[str, WarmupTask]) -> Dict[str, Any]:
+        """
+        Run each task once, in order; blocking tasks run off the event loop.
+        A failing task is recorded and the rest still run. Calls after a
+        successful warm-up return the existing report.
+        """
+        async with self._warmup_lock:
+            if not self.ready:
+                failed = False
+                for name, task in tasks.items():
+                    if self.tasks.get(name, {}).get("ok"):
+                        continue
+                    started = time.perf_counter()
+                    try:
+                        if inspect.iscoroutinefunction(task):
+                            await task()
+                        else:
+                            await asyncio.to_thread(task)
+                        self.tasks[name] = {"ok": True}
+                    except Exception as e:
+                        failed = True
+                        self.tasks[name] = {"ok": False, "error": str(e)}
+                    self.tasks[name]["seconds"] = round(time.perf_counter() - started, 4)
+                if not failed:
+                    self.ready_at = time.perf_counter()
+        return self.report()
+
+    def _since_start(self, moment: Optional[float]) -> Optional[float]:
+        if moment is None:
+            return None
+        origin = self.process_started if self.process_started is not None else self.import_started
+        return round(moment - origin, 4)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "import_seconds": round(self.imported_at - self.import_started, 4) if self.imported_at else None,
+            # Seconds since process start (or since app import where /proc is unavailable)
+            "imported_after": self._since_start(self.imported_at),
+            "serving_after": self._since_start(self.serving_at),
+            "ready_after": self._since_start(self.ready_at),
+            "warmup": self.tasks
+        }
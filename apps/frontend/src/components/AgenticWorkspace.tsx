@@ -23,6 +23,56 @@ interface ChatMessage {
   timestamp: string;
 }
 
+const MAX_RETRIES = 3;
+const DEFAULT_RETRY_DELAY_MS = 1000;
+const MAX_RETRY_DELAY_MS = 30000;
+
+// One key per logical action; every retry of that action reuses it so the
+// backend replays the first response instead of re-running the step
+const newIdempotencyKey = (): string => {
+  if (typeof crypto !== 'undefined' && 'randomUUID' in crypto) {
+    return crypto.randomUUID();
+  }
+  return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+};
+
+// Retry-After is either delay-seconds or an HTTP date
+const retryDelayMs = (response?: Response): number => {
+  const retryAfter = response?.headers.get('Retry-After');
+  if (!retryAfter) return DEFAULT_RETRY_DELAY_MS;
+
+  const seconds = Number(retryAfter);
+  const delay = Number.isFinite(seconds) ? seconds * 1000 : Date.parse(retryAfter) - Date.now();
+  if (!Number.isFinite(delay)) return DEFAULT_RETRY_DELAY_MS;
+  return Math.min(Math.max(delay, 0), MAX_RETRY_DELAY_MS);
+};
+
+const postWithRetry = async (url: string, label: string, body?: unknown): Promise<any> => {
+  const idempotencyKey = newIdempotencyKey();
+
+  for (let attempt = 1; ; attempt++) {
+    let response: Response | undefined;
+    try {
+      response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey },
+        body: body === undefined ? undefined : JSON.stringify(body)
+      });
+
+      if (!response.ok) {
+        throw new Error(`${label} failed: ${response.status}`);
+      }
+
+      return await response.json();
+    } catch (err) {
+      console.warn(`${label} attempt ${attempt} failed:`, err);
+      if (attempt >= MAX_RETRIES) throw err;
+      // Busy (429/503) and in-progress (409) responses say when to come back
+      await new Promise(resolve => setTimeout(resolve, retryDelayMs(response)));
+    }
+  }
+};
+
 const AgenticWorkspace: React.FC = () => {
   const [agentState, setAgentState] = useState<AgentState>({
     current_step: 'campaign_data',
@@ -108,31 +158,8 @@ const AgenticWorkspace: React.FC = () => {
       console.log(`🔄 Advancing from step: ${agentState.current_step} (${agentState.progress}%)`);
       
       // Step 1: Advance to next step with retry logic
-      let advanceResult;
-      let retryCount = 0;
-      const maxRetries = 3;
-      
-      while (retryCount < maxRetries) {
-        try {
-          const advanceResponse = await fetch('http://localhost:8000/agent/advance', { 
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' }
-          });
-          
-          if (!advanceResponse.ok) {
-            throw new Error(`Advance failed: ${advanceResponse.status}`);
-          }
-          
-          advanceResult = await advanceResponse.json();
-          console.log(`✅ Advanced to step: ${advanceResult.current_step}`);
-          break;
-        } catch (err) {
-          retryCount++;
-          console.warn(`Advance attempt ${retryCount} failed:`, err);
-          if (retryCount >= maxRetries) throw err;
-          await new Promise(resolve => setTimeout(resolve, 1000)); // Wait before retry
-        }
-      }
+      const advanceResult = await postWithRetry('http://localhost:8000/agent/advance', 'Advance');
+      console.log(`✅ Advanced to step: ${advanceResult.current_step}`);
 
       // Validate state transition
       if (!validateStateTransition(agentState.current_step, advanceResult.current_step)) {
@@ -140,34 +167,11 @@ const AgenticWorkspace: React.FC = () => {
       }
       
       // Step 2: Process the new step with retry logic
-      let stepResult;
-      retryCount = 0;
-      
-      while (retryCount < maxRetries) {
-        try {
-          const stepResponse = await fetch('http://localhost:8000/agent/process', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ 
-              input: `Process ${advanceResult.current_step} step`, 
-              files: [] 
-            })
-          });
-          
-          if (!stepResponse.ok) {
-            throw new Error(`Process failed: ${stepResponse.status}`);
-          }
-          
-          stepResult = await stepResponse.json();
-          console.log(`✅ Processed step: ${stepResult.step} with confidence: ${stepResult.confidence}%`);
-          break;
-        } catch (err) {
-          retryCount++;
-          console.warn(`Process attempt ${retryCount} failed:`, err);
-          if (retryCount >= maxRetries) throw err;
-          await new Promise(resolve => setTimeout(resolve, 1000)); // Wait before retry
-        }
-      }
+      const stepResult = await postWithRetry('http://localhost:8000/agent/process', 'Process', {
+        input: `Process ${advanceResult.current_step} step`,
+        files: []
+      });
+      console.log(`✅ Processed step: ${stepResult.step} with confidence: ${stepResult.confidence}%`);
 
       // Step 3: Update UI state atomically
       const newProgress = getProgressForStep(stepResult.step);
@@ -270,32 +274,11 @@ const AgenticWorkspace: React.FC = () => {
       console.log('🚀 Starting new campaign workflow');
       
       // Process initial step with retry logic
-      let result;
-      let retryCount = 0;
-      const maxRetries = 3;
-      
-      while (retryCount < maxRetries) {
-        try {
-          const response = await fetch('http://localhost:8000/agent/process', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ input, files: files ? Array.from(files) : [] })
-          });
-          
-          if (!response.ok) {
-            throw new Error(`Process failed: ${response.status}`);
-          }
-          
-          result = await response.json();
-          console.log(`✅ Initial processing complete: ${result.step}`);
-          break;
-        } catch (err) {
-          retryCount++;
-          console.warn(`Initial process attempt ${retryCount} failed:`, err);
-          if (retryCount >= maxRetries) throw err;
-          await new Promise(resolve => setTimeout(resolve, 1000));
-        }
-      }
+      const result = await postWithRetry('http://localhost:8000/agent/process', 'Initial process', {
+        input,
+        files: files ? Array.from(files) : []
+      });
+      console.log(`✅ Initial processing complete: ${result.step}`);
       
       // Add agent reasoning to chat
       setChatMessages(prev => [...prev, {